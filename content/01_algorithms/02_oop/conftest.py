@@ -0,0 +1,8 @@
+'''
+pytest configuration for the numpy_cv tests.  pytest adds this directory
+to sys.path so the tests can import numpy_cv.
+
+Run from the 02_oop directory:
+
+    python -m pytest tests
+'''
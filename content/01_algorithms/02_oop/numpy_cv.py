@@ -1,7 +1,31 @@
 '''
 temp store for numpy classes
+
+Each splitter's `split` method supports three modes:
+
+* 'copy' (default) yields train_X, test_X, train_y, test_y as new arrays.
+* 'index' yields train and test index arrays (as in scikit-learn, or
+  ranges for TimeSeriesSplit) and does not touch X or y.
+* 'view' yields the test fold and the two training segments either side of
+  it as views of the data, so no data are copied per fold.
+
+`loo_linear` gives leave one out predictions of least squares and ridge
+regression from a single fit, without the n fits of LeaveNOut(n=1).
+
+`cross_validate` fits and scores a model on every fold of a splitter,
+optionally across a process pool that reads X and y from shared memory.
 '''
 
+import os
+import time
+import warnings
+from multiprocessing import shared_memory
+
+import numpy as np
+
+VALID_MODES = ['copy', 'index', 'view']
+
+
 class LeaveNOut:
     '''
     Leave n samples out cross validation of a X, y formatted dataset.
@@ -15,50 +39,125 @@ class LeaveNOut:
         Params:
         -------
         n: int
-            The number of data points to leave out of each 
+            The number of data points to leave out of each fold
         '''
         self.n = n
-    
+
     def __repr__(self):
-        return f'LeaveNOut(n={self.n}'
+        return f'LeaveNOut(n={self.n})'
+
+    def get_n_splits(self, X):
+        '''
+        The number of splits returned by the cross validation
+        method.
+        '''
+        return -(-len(X) // self.n)
 
-    def split(self, X, y):
+    def split(self, X, y=None, mode='copy'):
         '''
         Generator method.  Returns incremental splits of the dataset
         on each call.
-        
+
         Params:
         ------
-        X: array-like 
-            python list or numpy.ndarray containing X data. For multiple features
-            shape should be (n_samples, n_features)
-        
-        y: array-like
-            python list or numpy.ndarray containing y target data. For multiple 
-            targets shape should be (n_samples, n_targets)
-        
+        X: array-like
+            python list or numpy.ndarray containing X data. For multiple
+            features shape should be (n_samples, n_features)
+
+        y: array-like, optional (default=None)
+            python list or numpy.ndarray containing y target data. For multiple
+            targets shape should be (n_samples, n_targets). Not needed when
+            mode='index'.
+
+        mode: str, optional (default='copy')
+            'copy', 'index' or 'view'.  See module docstring.
+
         Returns:
         --------
-        train_X, test_X, train_y, test_y 
-        
-        Where each is a np.ndarray
+        mode='copy': train_X, test_X, train_y, test_y
+            Where each is a np.ndarray
+
+        mode='index': train_index, test_index
+            Where each is a np.ndarray of row indexes
+
+        mode='view': train_X, test_X, train_y, test_y
+            Where train_X and train_y are tuples of the two training
+            segments (before and after the test fold) and all arrays are
+            views of X and y
         '''
-        # convert lists to numpy arrays
-        X, y = np.asarray(X), np.asarray(y)
-        
-        #create the folds
-        for test_index in range(0, len(X), self.n):
-        
-            # training data indexes
-            train_X = np.concatenate([X[:test_index], X[test_index + self.n:]])
-            train_y = np.concatenate([y[:test_index + self.n], y[test_index + self.n:]])
-            
-            # test data
-            test_X, test_y = X[test_index: test_index+self.n], y[test_index: test_index+self.n]
-            
-            yield train_X, test_X, train_y, test_y
-            
-            
+        bounds = np.append(np.arange(0, len(X), self.n), len(X))
+        yield from _contiguous_folds(X, y, bounds, mode=mode)
+
+
+def loo_linear(X, y, alpha=0.0, fit_intercept=True):
+    '''
+    Closed form leave one out cross validation of least squares (alpha=0)
+    or ridge regression.
+
+    Both are linear smoothers: the fitted values are H @ y.  The prediction
+    for row i from a model fitted without row i is y_i - e_i / (1 - h_ii)
+    where e_i is the residual of the fit to all rows and h_ii the diagonal
+    of the hat matrix H.  A single thin SVD of X, O(n_samples *
+    n_features^2), gives both, so no training sets are created.
+
+    Params:
+    ------
+    X: array-like
+        X data, shape (n_samples, n_features)
+
+    y: array-like
+        y target data, shape (n_samples,) or (n_samples, n_targets)
+
+    alpha: float, optional (default=0.0)
+        Ridge penalty.  0.0 is ordinary least squares.
+
+    fit_intercept: bool, optional (default=True)
+        Fit an (unpenalised) intercept.
+
+    Returns:
+    --------
+    loo_pred, loo_error
+        np.ndarrays shaped like y.  loo_error = y - loo_pred.  Rows with a
+        leverage of 1 cannot be predicted without themselves and are nan.
+    '''
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    X = X.reshape(len(X), -1)
+    if alpha < 0:
+        raise ValueError('alpha must not be negative.')
+
+    if len(X) < 2:
+        raise ValueError('at least 2 samples are needed.')
+
+    y_2d = y.reshape(len(y), -1)
+    x_centre = y_centre = 0.0
+    if fit_intercept:
+        x_centre, y_centre = X.mean(axis=0), y_2d.mean(axis=0)
+
+    U, s, _ = np.linalg.svd(X - x_centre, full_matrices=False)
+
+    # shrinkage of each singular direction; for least squares directions
+    # with zero singular value are dropped as in the pseudo inverse
+    s2 = s ** 2
+    if alpha == 0:
+        shrink = (s > s.max(initial=0) * max(X.shape) * np.finfo(float).eps)
+        shrink = shrink.astype(float)
+    else:
+        shrink = s2 / (s2 + alpha)
+
+    fitted = U @ (shrink[:, None] * (U.T @ (y_2d - y_centre))) + y_centre
+    leverage = (U ** 2) @ shrink
+    if fit_intercept:
+        leverage += 1 / len(X)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loo_error = (y_2d - fitted) / (1 - leverage)[:, None]
+    loo_error[np.isclose(leverage, 1)] = np.nan
+
+    loo_error = loo_error.reshape(y.shape)
+    return y - loo_error, loo_error
+
+
 class KFold:
     '''
     K-fold cross validation of a X, y formatted dataset.
@@ -72,85 +171,87 @@ class KFold:
         -------
         k: int
             The number of folds
-            
+
         shuffle: bool, optional (default=False)
             When True the data are randomly shuffled
-            
+
         random_seed: int or None, optional (default=None)
-            When shuffle set to true and random_seed is an integer the shuffling
-            of the dataset is controlled prior to folding.
+            When shuffle set to true and random_seed is an integer the
+            shuffling of the dataset is controlled prior to folding.
         '''
         self.k = k
         self.shuffle = shuffle
+        self.random_seed = random_seed
         self.rng = np.random.default_rng(random_seed)
-    
+
     def __repr__(self):
-        rep = f'KFoldCV(k={self.k}, shuffle={self.shuffle},' \
+        return f'KFold(k={self.k}, shuffle={self.shuffle}, ' \
                 + f'random_seed={self.random_seed})'
 
-    def split(self, X, y):
+    def get_n_splits(self, X):
+        '''
+        Return an integer representing the number of splits that
+        will be generated.
+        '''
+        return self.k
+
+    def split(self, X, y=None, mode='copy'):
         '''
         Generator method.  Returns incremental splits of the dataset
         on each call.
-        
+
+        The first len(X) % k folds have one more sample than the rest.
+
         Params:
         ------
-        X: array-like 
-            python list or numpy.ndarray containing X data. For multiple features
-            shape should be (n_samples, n_features)
-        
-        y: array-like
-            python list or numpy.ndarray containing y target data. For multiple 
-            targets shape should be (n_samples, n_targets)
-        
+        X: array-like
+            python list or numpy.ndarray containing X data. For multiple
+            features shape should be (n_samples, n_features)
+
+        y: array-like, optional (default=None)
+            python list or numpy.ndarray containing y target data. For multiple
+            targets shape should be (n_samples, n_targets). Not needed when
+            mode='index'.
+
+        mode: str, optional (default='copy')
+            'copy', 'index' or 'view'.  See module docstring.  With shuffle
+            and mode='view' a single shuffled copy of X and y is made and
+            the folds are views of it.
+
         Returns:
         --------
-        train_X, test_X, train_y, test_y 
-        
-        Where each is a np.ndarray
+        mode='copy': train_X, test_X, train_y, test_y
+            Where each is a np.ndarray
+
+        mode='index': train_index, test_index
+            Where each is a np.ndarray of row indexes
+
+        mode='view': train_X, test_X, train_y, test_y
+            Where train_X and train_y are tuples of the two training
+            segments (before and after the test fold)
         '''
-        # convert lists to numpy arrays
-        X, y = np.asarray(X), np.asarray(y)
-        
+        n_samples = len(X)
+        _check_k(self.k, n_samples)
+
         # store the indexes of each element - its these that get shuffled.
+        idx = None
         if self.shuffle:
-            idx = self.rng.integers(0, len(X), size=len(X))
-        else:
-            idx = np.arange(len(X), dtype=np.int16)
-        
-        # length of k - 1 splits... final split continues to end.
-        split_len = int(len(X) / (self.k))
-
-        for test_idx in range(0, len(X), split_len):
-        
-            # create k - 1 training folds for X 
-            train_X = self._fold_training_data(X, idx, test_idx, split_len)
-            # X test data for fold
-            test_X = X[idx[test_idx: test_idx+split_len]]
-            
-            # create k - 1 training segments for y
-            train_y = self._fold_training_data(y, idx, test_idx, split_len)
-            # y test data fold
-            test_y = y[idx[test_idx: test_idx+split_len]]
-            
-            yield train_X, test_X, train_y, test_y
-            
-        
-    def _fold_training_data(self, data, idx, test_idx, split_len):
-        '''
-        create training segments for X or y
-        '''
-        train_seg1 = data[idx[:test_idx]]
-        train_seg2 = data[idx[test_idx + split_len: ]]                              
-        return np.concatenate([train_seg1, train_seg2])
-    
-    
-class KFold:
+            idx = self.rng.permutation(n_samples)
+
+        fold_sizes = np.full(self.k, n_samples // self.k)
+        fold_sizes[:n_samples % self.k] += 1
+        bounds = np.concatenate([[0], np.cumsum(fold_sizes)])
+        yield from _contiguous_folds(X, y, bounds, idx, mode)
+
+
+class StratifiedKFold:
     '''
-    K-fold cross validation of a X, y formatted dataset.
-    Optional random shuffling of input data.
-    Note that original data is not shuffled, but a copy of a shuffled
-    array is created.
+    K-fold cross validation that preserves the proportion of each class of
+    y in every fold.  Optional random shuffling within each class.
+
+    Folds are assigned in one vectorised pass: rows are sorted by class and
+    dealt to the folds in turn, so each fold gets (to within one) the same
+    number of rows of every class and the fold sizes differ by at most one.
     '''
     def __init__(self, k=5, shuffle=False, random_seed=None):
         '''
@@ -158,74 +259,504 @@ class KFold:
         -------
         k: int
             The number of folds
-            
+
         shuffle: bool, optional (default=False)
-            When True the data are randomly shuffled
-            
+            When True the rows of each class are randomly shuffled before
+            they are dealt to the folds
+
         random_seed: int or None, optional (default=None)
-            When shuffle set to true and random_seed is an integer the shuffling
-            of the dataset is controlled prior to folding.
+            When shuffle set to true and random_seed is an integer the
+            shuffling of the dataset is controlled prior to folding.
         '''
         self.k = k
         self.shuffle = shuffle
+        self.random_seed = random_seed
         self.rng = np.random.default_rng(random_seed)
-    
+
     def __repr__(self):
-        rep = f'KFoldCV(k={self.k}, shuffle={self.shuffle},' \
+        return f'StratifiedKFold(k={self.k}, shuffle={self.shuffle}, ' \
                 + f'random_seed={self.random_seed})'
 
-    def split(self, X, y):
+    def get_n_splits(self, X):
+        '''
+        Return an integer representing the number of splits that
+        will be generated.
+        '''
+        return self.k
+
+    def split(self, X, y, mode='copy'):
         '''
         Generator method.  Returns incremental splits of the dataset
         on each call.
-        
+
         Params:
         ------
-        X: array-like 
-            python list or numpy.ndarray containing X data. For multiple features
-            shape should be (n_samples, n_features)
-        
+        X: array-like
+            python list or numpy.ndarray containing X data. For multiple
+            features shape should be (n_samples, n_features)
+
         y: array-like
-            python list or numpy.ndarray containing y target data. For multiple 
-            targets shape should be (n_samples, n_targets)
-        
+            class labels, shape (n_samples,).  Needed for every mode.
+
+        mode: str, optional (default='copy')
+            'copy', 'index' or 'view'.  See module docstring.  With
+            mode='view' a single copy of X and y ordered by fold is made
+            and the folds are views of it.
+
+        Returns:
+        --------
+        See KFold.split
+        '''
+        n_samples = len(X)
+        _check_k(self.k, n_samples)
+
+        _, classes = np.unique(np.asarray(y), return_inverse=True)
+        if len(classes) != n_samples:
+            raise ValueError('y must be 1D with one label per row of X.')
+
+        if np.bincount(classes).min() < self.k:
+            warnings.warn('The least populated class has fewer than '
+                          + f'k={self.k} members so some folds will not '
+                          + 'contain it.')
+
+        rows = np.arange(n_samples)
+        if self.shuffle:
+            rows = self.rng.permutation(n_samples)
+
+        # rows grouped by class (in shuffled order within a class)
+        by_class = rows[_stable_argsort(classes[rows])]
+        fold = np.empty(n_samples, dtype=np.intp)
+        fold[by_class] = np.arange(n_samples) % self.k
+
+        idx, bounds = _fold_order(fold, self.k)
+        yield from _contiguous_folds(X, y, bounds, idx, mode)
+
+
+class GroupKFold:
+    '''
+    K-fold cross validation where all rows of a group (e.g. a patient or
+    hospital) are in the same fold, so no group is in both the training
+    and test data.
+
+    Groups are sorted by size and dealt to the folds in a snake order
+    (0, 1, ..., k - 1, k - 1, ..., 0, ...) in one vectorised pass.  This
+    keeps the fold sizes close without a loop over the groups.
+    '''
+    def __init__(self, k=5):
+        '''
+        Params:
+        -------
+        k: int
+            The number of folds
+        '''
+        self.k = k
+
+    def __repr__(self):
+        return f'GroupKFold(k={self.k})'
+
+    def get_n_splits(self, X):
+        '''
+        Return an integer representing the number of splits that
+        will be generated.
+        '''
+        return self.k
+
+    def split(self, X, y=None, groups=None, mode='copy'):
+        '''
+        Generator method.  Returns incremental splits of the dataset
+        on each call.
+
+        Params:
+        ------
+        X: array-like
+            python list or numpy.ndarray containing X data. For multiple
+            features shape should be (n_samples, n_features)
+
+        y: array-like, optional (default=None)
+            python list or numpy.ndarray containing y target data. Not
+            needed when mode='index'.
+
+        groups: array-like
+            group label of each row, shape (n_samples,)
+
+        mode: str, optional (default='copy')
+            'copy', 'index' or 'view'.  See module docstring.  With
+            mode='view' a single copy of X and y ordered by fold is made
+            and the folds are views of it.
+
         Returns:
         --------
-        train_X, test_X, train_y, test_y 
-        
-        Where each is a np.ndarray
+        See KFold.split
         '''
+        if groups is None:
+            raise ValueError('groups must be given.')
+
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        if len(codes) != len(X):
+            raise ValueError('groups must be 1D with one label per row of X.')
+
+        sizes = np.bincount(codes)
+        if self.k < 2 or self.k > len(sizes):
+            raise ValueError('k must be between 2 and the number of groups '
+                             + f'({len(sizes)}).')
+
+        # rank of each group by size (largest first) -> snake order fold
+        rank = np.empty(len(sizes), dtype=np.intp)
+        rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+        lap, position = np.divmod(rank, self.k)
+        group_fold = np.where(lap % 2 == 0, position, self.k - 1 - position)
+
+        idx, bounds = _fold_order(group_fold[codes], self.k)
+        yield from _contiguous_folds(X, y, bounds, idx, mode)
+
+
+class TimeSeriesSplit:
+    '''
+    Forward chaining cross validation of time ordered X, y data e.g. daily
+    ED attendances with one column per hospital.  Test folds are
+    consecutive blocks at the end of the series and each training set only
+    contains rows before its test fold, so no future data leaks into
+    training.
+
+    The training set expands from the first row (window=None) or slides
+    with a fixed length.  An optional gap of rows is left out between the
+    training and test sets.
+    '''
+    def __init__(self, k=5, horizon=None, gap=0, window=None):
+        '''
+        Params:
+        -------
+        k: int
+            The number of folds
+
+        horizon: int or None, optional (default=None)
+            Number of rows in each test fold.  If None
+            n_samples // (k + 1).
+
+        gap: int, optional (default=0)
+            Number of rows left out between the end of each training set
+            and the start of its test fold
+
+        window: int or None, optional (default=None)
+            Maximum training length.  If None the training set expands.
+        '''
+        self.k = k
+        self.horizon = horizon
+        self.gap = gap
+        self.window = window
+
+    def __repr__(self):
+        return f'TimeSeriesSplit(k={self.k}, horizon={self.horizon}, ' \
+                + f'gap={self.gap}, window={self.window})'
+
+    def get_n_splits(self, X=None):
+        '''
+        Return an integer representing the number of splits that
+        will be generated.
+        '''
+        return self.k
+
+    def split(self, X, y=None, mode='copy'):
+        '''
+        Generator method.  Returns incremental splits of the dataset
+        on each call.
+
+        Params:
+        ------
+        X: array-like
+            python list or numpy.ndarray containing X data in time order.
+            For multiple features (or hospitals) shape should be
+            (n_samples, n_features)
+
+        y: array-like, optional (default=None)
+            python list or numpy.ndarray containing y target data. Not
+            needed when mode='index'.
+
+        mode: str, optional (default='copy')
+            'copy', 'index' or 'view'.
+
+        Returns:
+        --------
+        mode='copy': train_X, test_X, train_y, test_y
+            Where each is a np.ndarray
+
+        mode='index': train_index, test_index
+            Where each is a range of row indexes
+
+        mode='view': train_X, test_X, train_y, test_y
+            Where each is a view of X or y (the training set is a single
+            contiguous segment)
+        '''
+        if mode not in VALID_MODES:
+            raise ValueError(f'mode should be one of {VALID_MODES}')
+
+        ranges = self._ranges(len(X))
+        if mode == 'index':
+            yield from ranges
+            return
+
+        if y is None:
+            raise ValueError(f'y is needed when mode={mode!r}')
+
         # convert lists to numpy arrays
         X, y = np.asarray(X), np.asarray(y)
-        
-        # store the indexes of each element - its these that get shuffled.
-        if self.shuffle:
-            idx = self.rng.integers(0, len(X), size=len(X))
+        for train, test in ranges:
+            train, test = slice(train.start, train.stop), \
+                slice(test.start, test.stop)
+            folds = X[train], X[test], y[train], y[test]
+            if mode == 'copy':
+                folds = tuple(fold.copy() for fold in folds)
+            yield folds
+
+    def _ranges(self, n_samples):
+        '''
+        Train and test ranges of every fold
+        '''
+        if self.k < 1 or self.gap < 0:
+            raise ValueError('k must be at least 1 and gap not negative.')
+
+        horizon = self.horizon
+        if horizon is None:
+            horizon = n_samples // (self.k + 1)
+
+        first_test = n_samples - horizon * self.k
+        if horizon < 1 or first_test - self.gap < 1:
+            raise ValueError(f'Too few samples ({n_samples}) for k={self.k} '
+                             + f'folds, horizon={horizon} and gap={self.gap}.')
+
+        if self.window is not None and self.window < 1:
+            raise ValueError('window must be at least 1.')
+
+        ranges = []
+        for test_start in range(first_test, n_samples, horizon):
+            train_stop = test_start - self.gap
+            train_start = 0
+            if self.window is not None:
+                train_start = max(0, train_stop - self.window)
+            ranges.append((range(train_start, train_stop),
+                           range(test_start, test_start + horizon)))
+        return ranges
+
+
+def _check_k(k, n_samples):
+    if not 1 < k <= n_samples:
+        raise ValueError('k must be between 2 and the number of samples '
+                         + f'({n_samples}).')
+
+
+def _fold_order(fold, k):
+    '''
+    Order the rows by fold so each test fold is a contiguous block.
+
+    Params:
+    ------
+    fold: np.ndarray
+        fold number of each row
+
+    k: int
+        number of folds
+
+    Returns:
+    --------
+    idx, bounds
+        row order and the k + 1 boundaries of the folds in that order
+    '''
+    idx = _stable_argsort(fold)
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(fold, minlength=k))])
+    return idx, bounds
+
+
+def _stable_argsort(codes):
+    '''
+    Stable argsort of small non-negative integer codes (class or fold
+    numbers).  Casting to the smallest unsigned dtype lets numpy use a
+    linear time radix sort for up to 65,536 distinct codes.
+    '''
+    if len(codes):
+        codes = codes.astype(np.min_scalar_type(codes.max()), copy=False)
+    return np.argsort(codes, kind='stable')
+
+
+def _contiguous_folds(X, y, bounds, idx=None, mode='copy'):
+    '''
+    Generate folds whose test sets are the contiguous blocks
+    [bounds[i], bounds[i + 1]) of the rows of X and y.  If `idx` is given
+    the rows are taken in that order.
+    '''
+    if mode not in VALID_MODES:
+        raise ValueError(f'mode should be one of {VALID_MODES}')
+
+    if mode == 'index':
+        order = np.arange(len(X)) if idx is None else idx
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield (np.concatenate([order[:start], order[stop:]]),
+                   order[start:stop])
+        return
+
+    if y is None:
+        raise ValueError(f'y is needed when mode={mode!r}')
+
+    # convert lists to numpy arrays
+    X, y = np.asarray(X), np.asarray(y)
+
+    if idx is not None and mode == 'view':
+        # one shuffled copy; every fold is then a view of it
+        X, y, idx = X[idx], y[idx], None
+
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if idx is None:
+            train_X = X[:start], X[stop:]
+            train_y = y[:start], y[stop:]
+            test_X, test_y = X[start:stop], y[start:stop]
+            if mode == 'copy':
+                test_X, test_y = test_X.copy(), test_y.copy()
         else:
-            idx = np.arange(len(X), dtype=np.int16)
-        
-        # length of k - 1 splits... final split continues to end.
-        split_len = int(len(X) / (self.k))
-
-        for test_idx in range(0, len(X), split_len):
-        
-            # create k - 1 training folds for X 
-            train_X = self._fold_training_data(X, idx, test_idx, split_len)
-            # X test data for fold
-            test_X = X[idx[test_idx: test_idx+split_len]]
-            
-            # create k - 1 training segments for y
-            train_y = self._fold_training_data(y, idx, test_idx, split_len)
-            # y test data fold
-            test_y = y[idx[test_idx: test_idx+split_len]]
-            
-            yield train_X, test_X, train_y, test_y
-            
-        
-    def _fold_training_data(self, data, idx, test_idx, split_len):
-        '''
-        create training segments for X or y
-        '''
-        train_seg1 = data[idx[:test_idx]]
-        train_seg2 = data[idx[test_idx + split_len: ]]                              
-        return np.concatenate([train_seg1, train_seg2])
\ No newline at end of file
+            train_X = X[idx[:start]], X[idx[stop:]]
+            train_y = y[idx[:start]], y[idx[stop:]]
+            test_X, test_y = X[idx[start:stop]], y[idx[start:stop]]
+
+        if mode == 'copy':
+            train_X, train_y = np.concatenate(train_X), np.concatenate(train_y)
+
+        yield train_X, test_X, train_y, test_y
+
+
+def cross_validate(model_factory, X, y, splitter, n_jobs=None, scoring=None,
+                   groups=None):
+    '''
+    Fit and score a model on each fold of a splitter.
+
+    With n_jobs > 1 the folds are dispatched to a process pool.  X and y
+    are copied once into shared memory and each task only sends the fold's
+    train and test indexes, so the data are not pickled per fold.
+
+    Params:
+    ------
+    model_factory: callable
+        Returns a new unfitted model with fit(X, y) and score(X, y) methods
+        (or predict(X) if `scoring` is given).  Must be picklable
+        (e.g. a class or module level function) when n_jobs > 1.
+
+    X: array-like
+        numeric X data, shape (n_samples, n_features)
+
+    y: array-like
+        numeric y target data
+
+    splitter: object
+        A splitter supporting split(X, y, mode='index') e.g. KFold
+
+    n_jobs: int, optional (default=None)
+        Number of processes.  -1 uses every core.  If None or 1 the folds
+        are run in the calling process.
+
+    scoring: callable, optional (default=None)
+        scoring(y_true, y_pred).  If None model.score is used.
+
+    groups: array-like, optional (default=None)
+        group label of each row passed to the splitter e.g. GroupKFold
+
+    Returns:
+    --------
+    dict
+        'test_score', 'fit_time' and 'score_time': np.ndarrays with one
+        entry per fold (times in seconds)
+    '''
+    X, y = np.asarray(X), np.asarray(y)
+    group_kwargs = {} if groups is None else {'groups': groups}
+    folds = list(splitter.split(X, y, mode='index', **group_kwargs))
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs is None or n_jobs <= 1:
+        results = [_fit_and_score(model_factory, X, y, train, test, scoring)
+                   for train, test in folds]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with _SharedArrays(X, y) as shared, \
+                ProcessPoolExecutor(max_workers=n_jobs,
+                                    initializer=_attach_shared,
+                                    initargs=(shared.specs,)) as executor:
+            futures = [executor.submit(_fit_and_score_shared, model_factory,
+                                       train, test, scoring)
+                       for train, test in folds]
+            results = [future.result() for future in futures]
+
+    scores, fit_times, score_times = zip(*results)
+    return {'test_score': np.array(scores),
+            'fit_time': np.array(fit_times),
+            'score_time': np.array(score_times)}
+
+
+def _fit_and_score(model_factory, X, y, train, test, scoring=None):
+    '''
+    Fit a new model to the training rows and score it on the test rows.
+
+    Returns:
+    --------
+    score, fit_time, score_time
+    '''
+    start = time.perf_counter()
+    model = model_factory()
+    model.fit(X[train], y[train])
+    fitted = time.perf_counter()
+
+    if scoring is None:
+        score = model.score(X[test], y[test])
+    else:
+        score = scoring(y[test], model.predict(X[test]))
+    return score, fitted - start, time.perf_counter() - fitted
+
+
+# arrays attached to shared memory in each worker process
+_shared = {}
+
+
+def _fit_and_score_shared(model_factory, train, test, scoring):
+    return _fit_and_score(model_factory, _shared['X'], _shared['y'], train,
+                          test, scoring)
+
+
+def _attach_shared(specs):
+    '''
+    Process pool initializer: view the shared X and y as arrays.
+    '''
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        # keep a reference to the block so its buffer stays open
+        _shared[key + '_block'] = block
+        _shared[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+class _SharedArrays:
+    '''
+    Context manager that copies arrays into shared memory blocks and
+    removes the blocks on exit.
+    '''
+    def __init__(self, X, y):
+        for data in (X, y):
+            if data.dtype.hasobject:
+                raise TypeError('X and y must be numeric arrays to share '
+                                + 'them between processes.')
+        self.blocks = []
+        self.specs = {}
+        try:
+            for key, data in (('X', X), ('y', y)):
+                block = shared_memory.SharedMemory(create=True,
+                                                   size=max(data.nbytes, 1))
+                self.blocks.append(block)
+                np.ndarray(data.shape, dtype=data.dtype,
+                           buffer=block.buf)[...] = data
+                self.specs[key] = (block.name, data.shape, data.dtype.str)
+        except Exception:
+            self.__exit__()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,322 @@
+'''
+Tests of the numpy cross validation splitters and helpers.
+'''
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import numpy_cv
+from numpy_cv import (VALID_MODES, GroupKFold, KFold, LeaveNOut,
+                      StratifiedKFold, TimeSeriesSplit, cross_validate,
+                      loo_linear)
+
+
+def fit_predict(train_X, train_y, test_X, alpha, fit_intercept):
+    '''
+    Reference ridge / least squares fit with an unpenalised intercept
+    '''
+    x_centre = y_centre = 0.0
+    if fit_intercept:
+        x_centre, y_centre = train_X.mean(axis=0), train_y.mean(axis=0)
+
+    Xc, yc = train_X - x_centre, train_y - y_centre
+    if alpha == 0:
+        coef = np.linalg.lstsq(Xc, yc, rcond=None)[0]
+    else:
+        coef = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(Xc.shape[1]),
+                               Xc.T @ yc)
+    return (test_X - x_centre) @ coef + y_centre
+
+
+def brute_force_loo(X, y, alpha, fit_intercept):
+    preds = [fit_predict(train_X, train_y, test_X, alpha, fit_intercept)
+             for train_X, test_X, train_y, test_y
+             in LeaveNOut(1).split(X, y)]
+    return np.concatenate(preds).reshape(y.shape)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(40, 4))
+    y = X @ [1.5, -2.0, 0.5, 3.0] + rng.normal(size=40)
+    return X, y
+
+
+@pytest.mark.parametrize('alpha', [0.0, 2.5])
+@pytest.mark.parametrize('fit_intercept', [True, False])
+def test_matches_brute_force(data, alpha, fit_intercept):
+    X, y = data
+    loo_pred, loo_error = loo_linear(X, y, alpha, fit_intercept)
+
+    expected = brute_force_loo(X, y, alpha, fit_intercept)
+    np.testing.assert_allclose(loo_pred, expected, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(loo_error, y - expected, rtol=1e-8,
+                               atol=1e-10)
+
+
+@pytest.mark.parametrize('alpha', [0.0, 2.5])
+def test_multiple_targets(data, alpha):
+    X, y = data
+    Y = np.column_stack([y, 2 * y + 1, X[:, 0] ** 2])
+    loo_pred, _ = loo_linear(X, Y, alpha)
+
+    assert loo_pred.shape == Y.shape
+    np.testing.assert_allclose(loo_pred, brute_force_loo(X, Y, alpha, True),
+                               rtol=1e-8, atol=1e-10)
+
+
+def test_rank_deficient_least_squares(data):
+    X, y = data
+    X = np.column_stack([X, X[:, 0]])
+    loo_pred, _ = loo_linear(X, y)
+
+    np.testing.assert_allclose(loo_pred, brute_force_loo(X, y, 0.0, True),
+                               rtol=1e-8, atol=1e-10)
+
+
+def test_leverage_one_row_is_nan(data):
+    X, y = data
+    # the only row with a non-zero value in the last column
+    X = np.column_stack([X, np.zeros(len(X))])
+    X[0, -1] = 1.0
+    loo_pred, loo_error = loo_linear(X, y, fit_intercept=False)
+
+    assert np.isnan(loo_pred[0]) and np.isnan(loo_error[0])
+    assert np.isfinite(loo_pred[1:]).all()
+
+
+@pytest.mark.parametrize('X, alpha', [(np.ones((1, 2)), 0.0),
+                                      (np.ones((5, 2)), -1.0)])
+def test_invalid_arguments(X, alpha):
+    with pytest.raises(ValueError):
+        loo_linear(X, np.ones(len(X)), alpha)
+
+
+def check_partition(folds, n_samples):
+    '''
+    Test folds are disjoint, cover every row and each training set is the
+    rest of the rows.
+    '''
+    tests = [np.asarray(test) for _, test in folds]
+    all_test = np.concatenate(tests)
+    assert len(all_test) == n_samples
+    np.testing.assert_array_equal(np.sort(all_test), np.arange(n_samples))
+
+    for train, test in folds:
+        assert len(np.intersect1d(train, test)) == 0
+        assert len(train) + len(test) == n_samples
+
+
+@pytest.fixture
+def groups():
+    rng = np.random.default_rng(3)
+    return rng.integers(0, 12, size=100)
+
+
+def test_group_kfold_keeps_groups_together(groups):
+    X = np.arange(len(groups))
+    folds = list(GroupKFold(k=4).split(X, groups=groups, mode='index'))
+
+    assert len(folds) == 4
+    check_partition(folds, len(X))
+    for train, test in folds:
+        assert not set(groups[train]) & set(groups[test])
+
+
+def test_group_kfold_k_above_number_of_groups(groups):
+    n_groups = len(np.unique(groups))
+    with pytest.raises(ValueError, match=f'number of groups \\({n_groups}'):
+        next(GroupKFold(k=n_groups + 1).split(groups, groups=groups,
+                                              mode='index'))
+
+
+class MeanModel:
+    '''
+    Predicts the mean of the training targets.  Module level so it can be
+    pickled for the process pool.
+    '''
+    def fit(self, X, y):
+        self.mean_ = y.mean() + X[:, 0].mean()
+
+    def score(self, X, y):
+        return -np.abs(y - self.mean_).mean()
+
+
+class FailingModel(MeanModel):
+    def fit(self, X, y):
+        raise RuntimeError('fit failed')
+
+
+def test_cross_validate_pool_matches_serial(data):
+    X, y = data
+    splitter = KFold(k=4)
+
+    serial = cross_validate(MeanModel, X, y, splitter, n_jobs=1)
+    pooled = cross_validate(MeanModel, X, y, splitter, n_jobs=2)
+
+    assert len(pooled['test_score']) == 4
+    np.testing.assert_array_equal(pooled['test_score'], serial['test_score'])
+
+
+def test_shared_memory_released_after_worker_error(data, monkeypatch):
+    created = []
+
+    class RecordedArrays(numpy_cv._SharedArrays):
+        def __init__(self, X, y):
+            super().__init__(X, y)
+            created.extend(name for name, _, _ in self.specs.values())
+
+    monkeypatch.setattr(numpy_cv, '_SharedArrays', RecordedArrays)
+    X, y = data
+    with pytest.raises(RuntimeError, match='fit failed'):
+        cross_validate(FailingModel, X, y, KFold(k=4), n_jobs=2)
+
+    assert len(created) == 2
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+# splitter factories and whether their view folds are views of X itself
+# (False when the rows are reordered into a single copy first)
+SPLITTERS = {'leave_n_out': (lambda: LeaveNOut(3), True),
+             'kfold': (lambda: KFold(k=4), True),
+             'kfold_shuffle': (lambda: KFold(k=4, shuffle=True,
+                                             random_seed=7), False),
+             'stratified': (lambda: StratifiedKFold(k=3), False),
+             'group': (lambda: GroupKFold(k=3), False),
+             'time_series': (lambda: TimeSeriesSplit(k=3), True)}
+
+
+@pytest.fixture
+def fold_data():
+    # X owns its data so views of it have X as their base
+    X = np.arange(60, dtype=float).reshape(30, 2).copy()
+    y = np.tile([0, 1, 2], 10)
+    groups = np.repeat(np.arange(6), 5)
+    return X, y, groups
+
+
+def split(name, X, y, groups, mode):
+    splitter = SPLITTERS[name][0]()
+    kwargs = {'groups': groups} if name == 'group' else {}
+    return list(splitter.split(X, y, mode=mode, **kwargs))
+
+
+def join(train):
+    # view mode gives most training sets as two segments
+    return np.concatenate(train) if isinstance(train, tuple) else train
+
+
+@pytest.mark.parametrize('name', SPLITTERS)
+def test_modes_give_the_same_folds(fold_data, name):
+    X, y, groups = fold_data
+    copies = split(name, X, y, groups, 'copy')
+    indexes = split(name, X, y, groups, 'index')
+    views = split(name, X, y, groups, 'view')
+    assert len(copies) == len(indexes) == len(views)
+
+    for copy, index, view in zip(copies, indexes, views):
+        train_X, test_X, train_y, test_y = copy
+        train, test = (np.asarray(rows) for rows in index)
+        np.testing.assert_array_equal(train_X, X[train])
+        np.testing.assert_array_equal(test_X, X[test])
+        np.testing.assert_array_equal(train_y, y[train])
+        np.testing.assert_array_equal(test_y, y[test])
+
+        for copied, viewed in zip(copy, view):
+            np.testing.assert_array_equal(copied, join(viewed))
+
+
+@pytest.mark.parametrize('name', SPLITTERS)
+def test_view_mode_does_not_copy(fold_data, name):
+    X, y, groups = fold_data
+    views_of_X = SPLITTERS[name][1]
+    bases = set()
+
+    for train_X, test_X, _, _ in split(name, X, y, groups, 'view'):
+        segments = train_X if isinstance(train_X, tuple) else (train_X,)
+        for array in segments + (test_X,):
+            bases.add(id(array.base))
+            # an empty segment (e.g. before the first fold) has no memory
+            if views_of_X and len(array):
+                assert np.shares_memory(array, X)
+
+    if views_of_X:
+        assert bases == {id(X)}
+    else:
+        # every fold is a view of the same reordered copy of X
+        assert len(bases) == 1 and id(X) not in bases
+
+    train_X, test_X, _, _ = split(name, X, y, groups, 'copy')[0]
+    assert not np.shares_memory(train_X, X)
+    assert not np.shares_memory(test_X, X)
+
+
+@pytest.mark.parametrize('name', SPLITTERS)
+def test_invalid_mode(fold_data, name):
+    X, y, groups = fold_data
+    assert 'views' not in VALID_MODES
+    with pytest.raises(ValueError, match='mode should be one of'):
+        split(name, X, y, groups, 'views')
+
+
+# StratifiedKFold always needs y
+@pytest.mark.parametrize('name', [name for name in SPLITTERS
+                                  if name != 'stratified'])
+@pytest.mark.parametrize('mode', ['copy', 'view'])
+def test_y_needed_to_copy_or_view(fold_data, name, mode):
+    X, _, groups = fold_data
+    with pytest.raises(ValueError, match='y is needed'):
+        split(name, X, None, groups, mode)
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_stratified_folds_keep_class_proportions(shuffle):
+    rng = np.random.default_rng(5)
+    y = rng.choice(['a', 'b', 'c'], size=103, p=[0.6, 0.3, 0.1])
+    X = np.zeros((len(y), 1))
+    folds = list(StratifiedKFold(k=5, shuffle=shuffle, random_seed=1)
+                 .split(X, y, mode='index'))
+
+    check_partition(folds, len(y))
+    classes, counts = np.unique(y, return_counts=True)
+    proportions = counts / len(y)
+    for _, test in folds:
+        fold_counts = np.array([(y[test] == c).sum() for c in classes])
+        assert (np.abs(fold_counts - proportions * len(test)) <= 1).all()
+
+
+def test_stratified_warns_on_small_class():
+    y = np.array([0] * 10 + [1] * 2)
+    with pytest.warns(UserWarning, match='least populated class'):
+        list(StratifiedKFold(k=3).split(np.zeros(12), y, mode='index'))
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'horizon': 5, 'gap': 2},
+                                    {'horizon': 4, 'window': 10}])
+def test_time_series_split_never_trains_on_the_future(kwargs):
+    n_samples = 50
+    splitter = TimeSeriesSplit(k=4, **kwargs)
+    folds = list(splitter.split(np.arange(n_samples), mode='index'))
+    assert len(folds) == splitter.get_n_splits()
+
+    gap = kwargs.get('gap', 0)
+    for train, test in folds:
+        assert max(train) + gap < min(test)
+        if 'window' in kwargs:
+            assert len(train) <= kwargs['window']
+
+    # consecutive test folds that end with the last row
+    tests = np.concatenate([list(test) for _, test in folds])
+    np.testing.assert_array_equal(tests, np.arange(n_samples - len(tests),
+                                                   n_samples))
+
+
+def test_time_series_split_too_few_samples():
+    with pytest.raises(ValueError, match='Too few samples'):
+        list(TimeSeriesSplit(k=5, horizon=10).split(np.arange(40),
+                                                     mode='index'))
@@ -0,0 +1,59 @@
+'''
+Benchmark the rolling-origin backtest.
+
+`backtest` (naive, seasonal naive and SES) is timed for 4 and 500 synthetic
+hospitals over 3 years with monthly origins, in the calling process and
+across a process pool of every core.  It is compared with a loop that
+copies each split out of the frame and calls `forecast` per method.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_backtest
+'''
+
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_stats import synthetic_wide
+from ts_emergency.backtest import backtest, rolling_origin_splits
+from ts_emergency.forecast import VALID_METHODS, forecast
+
+HOSPITAL_COUNTS = [4, 500]
+N_DAYS = 3 * 365
+HORIZON = 28
+STEP = 28
+
+
+def loop_backtest(wide_df):
+    for split in rolling_origin_splits(wide_df.index, HORIZON, step=STEP):
+        train = wide_df.iloc[split.train].copy()
+        actual = wide_df.iloc[split.test].to_numpy()
+        for method in VALID_METHODS:
+            result = forecast(train, method, horizon=HORIZON)
+            _ = np.abs(actual - result.mean)
+
+
+def seconds(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    workers = os.cpu_count()
+    print(f'{"hosps":>6} {"loop":>8} {"serial":>8} '
+          + f'{f"{workers} workers":>10}')
+    for n_hosps in HOSPITAL_COUNTS:
+        wide_df = synthetic_wide(n_hosps, N_DAYS)
+        t_loop = seconds(loop_backtest, wide_df)
+        t_serial = seconds(backtest, wide_df, horizon=HORIZON, step=STEP)
+        t_pool = seconds(backtest, wide_df, horizon=HORIZON, step=STEP,
+                         workers=workers)
+        print(f'{n_hosps:>6} {t_loop:>7.2f}s {t_serial:>7.2f}s '
+              + f'{t_pool:>9.2f}s')
+
+
+if __name__ == '__main__':
+    main()
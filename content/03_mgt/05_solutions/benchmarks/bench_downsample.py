@@ -0,0 +1,62 @@
+'''
+Benchmark visual downsampling in plot_single_ed.
+
+Ten years of synthetic hourly attendances are plotted and saved to PNG with
+every point and with the 'lttb' and 'minmax' downsampling.  The number of
+vertices drawn and the time to plot and render are reported.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_downsample
+'''
+
+import io
+import timeit
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from ts_emergency.plotting.view import plot_single_ed
+
+N_HOURS = 10 * 365 * 24
+REPEATS = 3
+SEED = 42
+
+
+def synthetic_hourly(n_hours=N_HOURS, random_seed=SEED):
+    '''
+    Return synthetic hourly ED data in wide format for one hospital
+    '''
+    rng = np.random.default_rng(random_seed)
+    dates = pd.date_range('2014-04-01', periods=n_hours, freq='h')
+    return pd.DataFrame({'hosp_1': rng.poisson(10, size=n_hours)},
+                        index=dates)
+
+
+def render(wide_df, downsample):
+    '''
+    Plot and render to PNG.  Returns the number of vertices drawn.
+    '''
+    fig, ax = plot_single_ed(wide_df, 'hosp_1', downsample=downsample)
+    fig.savefig(io.BytesIO(), format='png')
+    n_vertices = len(ax.lines[0].get_xdata())
+    plt.close(fig)
+    return n_vertices
+
+
+def main():
+    wide_df = synthetic_hourly()
+    print(f'{N_HOURS:,} hourly points')
+    for downsample in [None, 'lttb', 'minmax']:
+        n_vertices = render(wide_df, downsample)
+        timings = timeit.repeat(lambda: render(wide_df, downsample),
+                                number=1, repeat=REPEATS)
+        print(f'{str(downsample):>6}: {n_vertices:>6,} vertices '
+              + f'{min(timings) * 1000:.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
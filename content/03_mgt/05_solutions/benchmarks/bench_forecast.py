@@ -0,0 +1,54 @@
+'''
+Benchmark the vectorised baseline forecasts.
+
+`forecast_all` (naive, seasonal naive and SES with fitted alpha) is timed
+for 1, 100 and 1,000 synthetic hospitals over 10 years and compared with
+fitting SES to a single hospital with statsmodels, the per-series approach
+of a Python loop.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_forecast
+'''
+
+import time
+import warnings
+
+from benchmarks.bench_stats import synthetic_wide
+from ts_emergency.forecast import DEFAULT_HORIZON, forecast_all
+
+HOSPITAL_COUNTS = [1, 100, 1_000]
+
+
+def statsmodels_ses(series):
+    from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model = SimpleExpSmoothing(series.to_numpy(dtype=float),
+                                   initialization_method='known',
+                                   initial_level=float(series.iloc[0]))
+        return model.fit().forecast(DEFAULT_HORIZON)
+
+
+def seconds(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    wide_df = synthetic_wide(max(HOSPITAL_COUNTS))
+    # warm up so the import of statsmodels is not timed
+    _ = statsmodels_ses(wide_df['hosp_1'])
+    t_loop = seconds(statsmodels_ses, wide_df['hosp_1'])
+    print(f'statsmodels SES, 1 hospital: {t_loop:.3f}s')
+
+    for n_hosps in HOSPITAL_COUNTS:
+        t_all = seconds(forecast_all, wide_df.iloc[:, :n_hosps])
+        print(f'forecast_all, {n_hosps:>5} hospitals: {t_all:.3f}s '
+              + f'({t_all / t_loop:.1f}x one statsmodels fit)')
+
+
+if __name__ == '__main__':
+    main()
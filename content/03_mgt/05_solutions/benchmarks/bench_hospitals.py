@@ -0,0 +1,79 @@
+'''
+Benchmark the long <-> wide conversions as the number of hospitals grows.
+
+Synthetic long format data are generated for 4, 100 and 1,000 hospitals.
+The vectorised `long_to_wide` / `wide_to_long` are compared with the 
+pandas pivot_table / wide_to_long approach, which leaves float64 / int64
+columns.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_hospitals
+'''
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from ts_emergency.datasets import long_to_wide, wide_to_long
+
+HOSPITAL_COUNTS = [4, 100, 1_000]
+N_DAYS = 3 * 365
+REPEATS = 5
+SEED = 42
+
+
+def synthetic_long(n_hosps, n_days=N_DAYS, random_seed=SEED):
+    '''
+    Return synthetic ED data in long format for `n_hosps` hospitals.
+    '''
+    rng = np.random.default_rng(random_seed)
+    dates = pd.date_range('2014-04-01', periods=n_days, freq='D')
+    return pd.DataFrame({'date': np.tile(dates, n_hosps),
+                         'hosp': np.repeat(np.arange(1, n_hosps + 1), n_days),
+                         'attends': rng.poisson(250, size=n_days * n_hosps)})
+
+
+def pandas_long_to_wide(long_df):
+    return long_df.pivot_table(values='attends', index='date', columns='hosp')
+
+
+def pandas_wide_to_long(wide_df):
+    return (pd.wide_to_long(wide_df.reset_index(), stubnames='hosp_', 
+                            i=['date'], j='hosp')
+              .reset_index())
+
+
+def time_ms(func, data, repeats=REPEATS):
+    '''
+    Return the best of `repeats` timings of func(data) in milliseconds
+    '''
+    timings = timeit.repeat(lambda: func(data), number=1, repeat=repeats)
+    return min(timings) * 1000
+
+
+def mem_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    print(f'{"hosps":>6}{"conversion":>14}{"method":>10}{"best (ms)":>12}'
+          + f'{"result (MB)":>13}')
+
+    for n_hosps in HOSPITAL_COUNTS:
+        long_df = synthetic_long(n_hosps)
+        wide_df = long_to_wide(long_df)
+
+        cases = [('long->wide', 'pandas', pandas_long_to_wide, long_df),
+                 ('long->wide', 'numpy', long_to_wide, long_df),
+                 ('wide->long', 'pandas', pandas_wide_to_long, wide_df),
+                 ('wide->long', 'numpy', wide_to_long, wide_df)]
+
+        for conversion, method, func, data in cases:
+            print(f'{n_hosps:>6}{conversion:>14}{method:>10}'
+                  + f'{time_ms(func, data):>12.1f}{mem_mb(func(data)):>13.2f}')
+
+
+if __name__ == '__main__':
+    main()
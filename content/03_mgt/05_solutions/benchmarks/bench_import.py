@@ -0,0 +1,72 @@
+'''
+Benchmark the import time of ts_emergency modules.
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The cumulative import time is reported along with any heavy dependencies
+that were imported eagerly.  Exits with a non-zero status if a module
+exceeds IMPORT_BUDGET_MS or imports a heavy dependency so that the check 
+can be used to stop import time from regressing.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_import
+'''
+
+import subprocess
+import sys
+
+MODULES = ['ts_emergency',
+           'ts_emergency.datasets',
+           'ts_emergency.plotting.view',
+           'ts_emergency.plotting.tsa']
+
+# dependencies that should only be imported on first use
+HEAVY = ['numpy', 'pandas', 'matplotlib', 'statsmodels', 'asyncio']
+
+IMPORT_BUDGET_MS = 150
+REPEATS = 5
+
+
+def import_times(module):
+    '''
+    Import `module` in a new interpreter.
+
+    Returns:
+    -------
+    (float, set)
+        cumulative import time of `module` in ms and the names of all
+        modules imported.
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             f'import {module}'],
+                            capture_output=True, text=True, check=True)
+
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        imported.add(name.strip())
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+
+    return cumulative, imported
+
+
+def main():
+    failed = False
+    print(f'{"module":<30}{"best (ms)":>10}  eager heavy imports')
+
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(REPEATS)]
+        best = min(cumulative for cumulative, _ in runs)
+        eager = sorted(name for name in runs[0][1] if name in HEAVY)
+
+        failed |= best > IMPORT_BUDGET_MS or bool(eager)
+        print(f'{module:<30}{best:>10.1f}  {", ".join(eager) or "-"}')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+'''
+Benchmark the cost of loading the ED data in each format.
+
+Compares reading each format from its native file with reading the other
+file and converting it (`long_to_wide` / `wide_to_long`).  Both conversions
+are vectorised, so on the bundled four hospital data the difference is
+about a millisecond and close to the run to run noise.  The ratio column
+is the convert time divided by the native time; check it on your own
+machine before relying on the native path being faster.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_load
+'''
+
+import timeit
+
+from ts_emergency.cache import BUNDLED_DATA_DIR
+from ts_emergency.datasets import (_ed_data_to_long, _ed_data_to_wide,
+                                   _read_long, _read_wide)
+
+LONG_FILE = BUNDLED_DATA_DIR / 'syn_ts_ed_long.csv'
+WIDE_FILE = BUNDLED_DATA_DIR / 'syn_ts_ed_wide.csv'
+
+REPEATS = 50
+
+
+def time_ms(func, file_path, repeats=REPEATS):
+    '''
+    Return the best of `repeats` timings of func(file_path) in milliseconds
+    '''
+    timings = timeit.repeat(lambda: func(file_path), number=1, repeat=repeats)
+    return min(timings) * 1000
+
+
+def main():
+    cases = [('wide', 'convert from long', _ed_data_to_wide, LONG_FILE),
+             ('wide', 'read native', _read_wide, WIDE_FILE),
+             ('long', 'convert from wide', _ed_data_to_long, WIDE_FILE),
+             ('long', 'read native', _read_long, LONG_FILE)]
+
+    print(f'{"format":<8}{"method":<20}{"best (ms)":>10}{"ratio":>8}')
+    for data_format, method, func, file_path in cases:
+        timing = time_ms(func, file_path)
+        if method.startswith('convert'):
+            convert = timing
+        print(f'{data_format:<8}{method:<20}{timing:>10.2f}'
+              + f'{convert / timing:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
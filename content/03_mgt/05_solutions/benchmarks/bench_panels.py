@@ -0,0 +1,66 @@
+'''
+Benchmark plot_eds and EDPanels updates as the number of hospitals grows.
+
+For 4, 100 and 1,000 synthetic hospitals the time to create and render
+`plot_eds` is reported (100 and 1,000 hospitals are drawn as a single
+LineCollection).  Then a year long window of each is moved forward one day
+at a time with `EDPanels.update`, comparing a full redraw with blitting.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_panels
+'''
+
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from benchmarks.bench_hospitals import synthetic_long
+from ts_emergency.datasets import long_to_wide
+from ts_emergency.plotting.panels import EDPanels
+from ts_emergency.plotting.view import plot_eds
+
+HOSPITAL_COUNTS = [4, 100, 1_000]
+WINDOW = 365
+N_UPDATES = 10
+
+
+def render_ms(wide_df):
+    start = time.perf_counter()
+    fig = plot_eds(wide_df)
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+    return (time.perf_counter() - start) * 1000
+
+
+def update_ms(wide_df, blit):
+    '''
+    Mean time to move the window forward one day
+    '''
+    panels = EDPanels(wide_df.iloc[:WINDOW], blit=blit)
+    panels.figure.canvas.draw()
+
+    start = time.perf_counter()
+    for i in range(1, N_UPDATES + 1):
+        panels.update(wide_df.iloc[i:i + WINDOW])
+        if not blit:
+            panels.figure.canvas.draw()
+
+    plt.close(panels.figure)
+    return (time.perf_counter() - start) * 1000 / N_UPDATES
+
+
+def main():
+    print(f'{"hosps":>6} {"plot_eds":>10} {"redraw":>10} {"blit":>10}')
+    for n_hosps in HOSPITAL_COUNTS:
+        wide_df = long_to_wide(synthetic_long(n_hosps))
+        print(f'{n_hosps:>6} {render_ms(wide_df):>8.0f}ms '
+              + f'{update_ms(wide_df, blit=False):>8.0f}ms '
+              + f'{update_ms(wide_df, blit=True):>8.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
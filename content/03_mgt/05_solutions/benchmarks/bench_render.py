@@ -0,0 +1,64 @@
+'''
+Benchmark batch rendering of the per-hospital diagnostic plots.
+
+Synthetic data for N_HOSPS hospitals are rendered to PNG by looping over
+`diagnostic_plot` (a new pyplot figure per hospital) and by
+`render_diagnostics` (one reused Agg figure, optionally per process).
+Throughput is reported in figures per second.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_render
+'''
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from benchmarks.bench_hospitals import synthetic_long
+from ts_emergency.analysis import acf_pacf
+from ts_emergency.datasets import long_to_wide
+from ts_emergency.plotting.batch import render_diagnostics
+from ts_emergency.plotting.tsa import diagnostic_plot
+
+N_HOSPS = 40
+WORKERS = os.cpu_count()
+
+
+def loop_diagnostic_plot(wide_df, out_dir):
+    '''
+    Save each hospital's plot with diagnostic_plot. Returns figures/sec
+    '''
+    start = time.perf_counter()
+    correlograms = acf_pacf(wide_df)
+    for hosp_id in wide_df.columns:
+        fig, _ = diagnostic_plot(wide_df, hosp_id, correlograms=correlograms)
+        fig.savefig(Path(out_dir) / f'{hosp_id}.png')
+        plt.close(fig)
+
+    return len(wide_df.columns) / (time.perf_counter() - start)
+
+
+def main():
+    wide_df = long_to_wide(synthetic_long(N_HOSPS))
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        print(f'{N_HOSPS} hospitals (figures per second)')
+        print(f'diagnostic_plot loop: {loop_diagnostic_plot(wide_df, out_dir):.1f}')
+
+        report = render_diagnostics(wide_df, out_dir)
+        print(f'render_diagnostics: {report.figures_per_second:.1f}')
+
+        if WORKERS > 1:
+            report = render_diagnostics(wide_df, out_dir, workers=WORKERS)
+            print(f'render_diagnostics ({WORKERS} workers): '
+                  + f'{report.figures_per_second:.1f}')
+
+
+if __name__ == '__main__':
+    main()
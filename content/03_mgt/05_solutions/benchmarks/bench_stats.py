@@ -0,0 +1,62 @@
+'''
+Benchmark ts_emergency.stats against pandas rolling windows.
+
+Rolling mean, std, z-score and the 10th, 50th and 90th percentiles are
+computed for 7, 28 and 365 day windows of synthetic int16 data for 4, 100
+and 1,000 hospitals over 10 years.  pandas computes each statistic and
+window with its own `.rolling` call on the whole frame.
+
+Run from the 05_solutions directory:
+
+    python -m benchmarks.bench_stats
+'''
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from ts_emergency.stats import (DEFAULT_QUANTILES, DEFAULT_WINDOWS,
+                                rolling_stats)
+
+HOSPITAL_COUNTS = [4, 100, 1_000]
+N_DAYS = 10 * 365
+SEED = 42
+
+
+def synthetic_wide(n_hosps, n_days=N_DAYS, random_seed=SEED):
+    rng = np.random.default_rng(random_seed)
+    index = pd.date_range('2014-04-01', periods=n_days, freq='D')
+    values = rng.poisson(250, size=(n_days, n_hosps)).astype(np.int16)
+    return pd.DataFrame(values, index=index,
+                        columns=[f'hosp_{i}' for i in range(1, n_hosps + 1)])
+
+
+def pandas_stats(wide_df):
+    for window in DEFAULT_WINDOWS:
+        rolling = wide_df.rolling(window)
+        mean = rolling.mean()
+        std = rolling.std()
+        _ = (wide_df - mean) / std
+        for q in DEFAULT_QUANTILES:
+            _ = rolling.quantile(q)
+
+
+def seconds(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f'{"hosps":>6} {"pandas":>9} {"stats":>9} {"speedup":>8}')
+    for n_hosps in HOSPITAL_COUNTS:
+        wide_df = synthetic_wide(n_hosps)
+        t_pandas = seconds(pandas_stats, wide_df)
+        t_stats = seconds(rolling_stats, wide_df)
+        print(f'{n_hosps:>6} {t_pandas:>8.2f}s {t_stats:>8.2f}s '
+              + f'{t_pandas / t_stats:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
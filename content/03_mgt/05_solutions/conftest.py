@@ -0,0 +1,45 @@
+'''
+pytest configuration for the ts_emergency tests.
+
+Run from the 05_solutions directory:
+
+    python -m pytest tests
+'''
+
+import os
+import urllib.error
+
+import pytest
+
+from ts_emergency import cache
+from ts_emergency.datasets import load_ed_ts
+from ts_emergency.transforms import derived_series
+
+# plotting tests run headless
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    '''
+    Every test uses its own empty cache directory and memos.
+    '''
+    path = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_ENV_VAR, str(path))
+    cache.set_cache_dir(None)
+    load_ed_ts.cache_clear()
+    derived_series.cache_clear()
+    yield path
+    load_ed_ts.cache_clear()
+    derived_series.cache_clear()
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    '''
+    Make every download fail as it would without a network connection.
+    '''
+    def no_network(url):
+        raise urllib.error.URLError('network unavailable')
+
+    monkeypatch.setattr(cache, '_download', no_network)
@@ -0,0 +1,61 @@
+'''
+Vectorised ACF and PACF against statsmodels.
+'''
+
+import numpy as np
+import pytest
+from statsmodels.tsa import stattools
+
+from ts_emergency.analysis import acf, acf_pacf, pacf
+from ts_emergency.datasets import load_ed_ts
+
+MAXLAGS = 30
+
+
+@pytest.fixture(scope='module')
+def wide_df():
+    return load_ed_ts(source='bundled')
+
+
+def by_column(func, wide_df, **kwargs):
+    '''
+    statsmodels result for each column stacked as (lags, n_series)
+    '''
+    return np.column_stack([func(wide_df[col].to_numpy(dtype=float),
+                                 nlags=MAXLAGS, **kwargs)
+                            for col in wide_df.columns])
+
+
+def test_acf_matches_statsmodels(wide_df):
+    expected = by_column(stattools.acf, wide_df, adjusted=False, fft=False)
+    np.testing.assert_allclose(acf(wide_df, MAXLAGS), expected, atol=1e-10)
+
+
+def test_pacf_matches_statsmodels(wide_df):
+    expected = by_column(stattools.pacf, wide_df, method='ywm')
+    np.testing.assert_allclose(pacf(wide_df, MAXLAGS), expected, atol=1e-10)
+
+
+def test_single_series_and_array_input(wide_df):
+    series = wide_df[wide_df.columns[0]]
+    expected = stattools.acf(series.to_numpy(dtype=float), nlags=MAXLAGS)
+    np.testing.assert_allclose(acf(series, MAXLAGS)[:, 0], expected,
+                               atol=1e-10)
+    np.testing.assert_allclose(acf(wide_df.to_numpy(), MAXLAGS),
+                               acf(wide_df, MAXLAGS))
+
+
+def test_confidence_intervals_match_statsmodels(wide_df):
+    result = acf_pacf(wide_df, MAXLAGS, alpha=0.05)
+    assert result.columns == list(wide_df.columns)
+
+    for i, col in enumerate(wide_df.columns):
+        x = wide_df[col].to_numpy(dtype=float)
+        values, confint = stattools.acf(x, nlags=MAXLAGS, alpha=0.05)
+        np.testing.assert_allclose(result.acf_confint[:, i],
+                                   confint[:, 1] - values, atol=1e-10)
+
+        values, confint = stattools.pacf(x, nlags=MAXLAGS, alpha=0.05,
+                                         method='ywm')
+        np.testing.assert_allclose(result.pacf_confint[:, i],
+                                   confint[:, 1] - values, atol=1e-10)
@@ -0,0 +1,96 @@
+'''
+Rolling-origin splits and the backtest error measures.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.backtest import backtest, rolling_origin_splits
+from ts_emergency.forecast import forecast
+
+HORIZON = 5
+PERIOD = 7
+
+
+def frame(values):
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    index = pd.date_range('2024-01-01', periods=len(values), name='date')
+    return pd.DataFrame(values, index=index,
+                        columns=[f'hosp_{i + 1}'
+                                 for i in range(values.shape[1])])
+
+
+def test_expanding_splits():
+    index = pd.date_range('2024-01-01', periods=30)
+    splits = list(rolling_origin_splits(index, horizon=5, initial=10,
+                                        step=4))
+
+    assert [split.train for split in splits] == [slice(0, c)
+                                                 for c in (10, 14, 18, 22)]
+    assert [split.test for split in splits] == [slice(c, c + 5)
+                                                for c in (10, 14, 18, 22)]
+    assert splits[0].cutoff == index[9]
+
+
+def test_sliding_splits():
+    splits = list(rolling_origin_splits(30, horizon=5, initial=10, step=4,
+                                        window=8))
+    assert all(split.train.stop - split.train.start == 8 for split in splits)
+    assert splits[-1].cutoff == 21
+
+
+@pytest.mark.parametrize('kwargs', [{'horizon': 0}, {'step': 0},
+                                    {'initial': 5, 'window': 6}])
+def test_invalid_splits(kwargs):
+    with pytest.raises(ValueError):
+        list(rolling_origin_splits(30, **kwargs))
+
+
+def test_naive_on_constant_series_has_no_error():
+    result = backtest(frame(np.full(60, 100)), methods=['naive'],
+                      horizon=HORIZON, initial=20, step=5)
+
+    assert (result['mae'] == 0).all()
+    assert (result['coverage'] == 1).all()
+    assert (result['n_origins'] == 8).all()
+
+
+def test_mase_scale_on_a_trend():
+    # y = t: every seasonal difference is PERIOD so the MASE scale is PERIOD
+    result = backtest(frame(np.arange(100)), methods=['naive', 'snaive'],
+                      horizon=HORIZON * 2, initial=30, step=10)
+    h = np.arange(1, HORIZON * 2 + 1)
+
+    naive = result[result['method'] == 'naive']
+    np.testing.assert_allclose(naive['mae'], h)
+    np.testing.assert_allclose(naive['mase'], h / PERIOD)
+
+    snaive = result[result['method'] == 'snaive']
+    expected = PERIOD * (1 + (h - 1) // PERIOD)
+    np.testing.assert_allclose(snaive['mae'], expected)
+    np.testing.assert_allclose(snaive['mase'], expected / PERIOD)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_matches_a_forecast_per_origin(workers):
+    rng = np.random.default_rng(4)
+    wide_df = frame(rng.poisson(100, size=(120, 3)))
+    result = backtest(wide_df, horizon=HORIZON, initial=60, step=9,
+                      workers=workers)
+
+    splits = list(rolling_origin_splits(wide_df.index, HORIZON, 60, 9))
+    for method, rows in result.groupby('method', sort=False):
+        errors = [np.abs(wide_df.iloc[split.test].to_numpy()
+                         - forecast(wide_df.iloc[split.train], method,
+                                    horizon=HORIZON).mean)
+                  for split in splits]
+        expected = np.mean(errors, axis=0)
+        np.testing.assert_allclose(
+            rows.pivot(index='horizon', columns='hosp', values='mae'),
+            expected)
+
+
+def test_too_short_for_an_origin():
+    with pytest.raises(ValueError):
+        backtest(frame(np.arange(20)), horizon=HORIZON, initial=20)
@@ -0,0 +1,36 @@
+'''
+Headless batch rendering of the diagnostic plots.
+'''
+
+import pytest
+
+from ts_emergency.datasets import load_ed_ts
+from ts_emergency.plotting.batch import render_diagnostics
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture
+def wide_df():
+    return load_ed_ts(source='bundled')
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_render_diagnostics(wide_df, tmp_path, workers):
+    out_dir = tmp_path / 'figures'
+    report = render_diagnostics(wide_df, out_dir, maxlags=14, dpi=30,
+                                workers=workers)
+
+    expected = [out_dir / f'{hosp_id}.png' for hosp_id in wide_df.columns]
+    assert report.paths == expected
+    assert report.n_figures == len(wide_df.columns)
+    assert report.figures_per_second > 0
+    for path in expected:
+        assert path.read_bytes().startswith(PNG_SIGNATURE)
+
+
+def test_render_selected_hospitals(wide_df, tmp_path):
+    report = render_diagnostics(wide_df, tmp_path, hosp_ids=['hosp_2'],
+                                maxlags=7, dpi=30, fmt='svg', workers=2)
+    assert report.paths == [tmp_path / 'hosp_2.svg']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['hosp_2.svg']
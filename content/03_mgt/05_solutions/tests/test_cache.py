@@ -0,0 +1,62 @@
+'''
+Offline and unwritable cache fallbacks of the dataset cache.
+'''
+
+import pandas as pd
+import pytest
+
+from ts_emergency import cache
+from ts_emergency.datasets import LONG_URL, WIDE_URL, load_ed_ts
+
+
+@pytest.fixture
+def unwritable_cache(tmp_path, monkeypatch):
+    '''
+    A cache directory that cannot be created: its parent is a file.
+    '''
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text('')
+    path = blocker / 'cache'
+    monkeypatch.setenv(cache.CACHE_ENV_VAR, str(path))
+    return path
+
+
+def bundled_wide():
+    return load_ed_ts(source='bundled')
+
+
+def test_offline_seeds_cache_from_bundled(offline, cache_dir):
+    wide_df = load_ed_ts()
+    pd.testing.assert_frame_equal(wide_df, bundled_wide())
+
+    cached = cache.lookup(WIDE_URL)
+    assert cached is not None and cached.parent == cache_dir
+
+
+def test_offline_prefers_last_cached_copy(offline):
+    cache.store(LONG_URL, b'date,hosp,attends\n2014-04-01,1,10\n')
+    path = cache.cached_path(LONG_URL, 'syn_ts_ed_long.csv', refresh=True)
+    assert path.read_bytes().endswith(b'2014-04-01,1,10\n')
+
+
+def test_offline_without_bundled_copy_raises(offline):
+    with pytest.raises(OSError):
+        cache.cached_path('https://example.org/missing.csv')
+
+
+def test_offline_unwritable_cache_uses_bundled_file(offline,
+                                                     unwritable_cache):
+    path = cache.cached_path(WIDE_URL, 'syn_ts_ed_wide.csv')
+    assert path == cache.BUNDLED_DATA_DIR / 'syn_ts_ed_wide.csv'
+
+    pd.testing.assert_frame_equal(load_ed_ts(), bundled_wide())
+    assert not unwritable_cache.exists()
+
+
+@pytest.mark.parametrize('data_format', ['wide', 'long'])
+def test_binary_engine_unwritable_cache_uses_csv(unwritable_cache,
+                                                  data_format):
+    binary = load_ed_ts(data_format, source='bundled', engine='binary')
+    load_ed_ts.cache_clear()
+    csv = load_ed_ts(data_format, source='bundled', engine='csv')
+    pd.testing.assert_frame_equal(binary, csv)
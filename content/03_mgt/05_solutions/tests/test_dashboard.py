@@ -0,0 +1,82 @@
+'''
+The ring buffer and streaming dashboard for live ED attendances.
+'''
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.plotting.dashboard import RingBuffer, StreamingDashboard
+
+COLUMNS = ['hosp_1', 'hosp_2']
+
+
+def day(i):
+    return np.datetime64('2024-01-01') + np.timedelta64(i, 'D')
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close('all')
+
+
+@pytest.mark.parametrize('n_days', [0, 3, 5, 6, 13])
+def test_ring_buffer_wraps(n_days):
+    capacity = 5
+    buffer = RingBuffer(COLUMNS, capacity)
+    for i in range(n_days):
+        buffer.append(day(i), [i, 10 * i])
+
+    frame = buffer.frame()
+    kept = list(range(max(0, n_days - capacity), n_days))
+    assert len(buffer) == len(frame) == len(kept)
+    assert frame['hosp_1'].tolist() == kept
+    assert frame['hosp_2'].tolist() == [10 * i for i in kept]
+    assert frame.index.tolist() == [pd.Timestamp(day(i)) for i in kept]
+    if n_days:
+        assert buffer.end_date == day(n_days - 1)
+
+
+def test_ring_buffer_frame_is_a_read_only_view():
+    buffer = RingBuffer(COLUMNS, 4)
+    for i in range(7):
+        buffer.append(day(i), [i, i])
+
+    frame = buffer.frame()
+    values = frame.to_numpy()
+    assert np.shares_memory(values, buffer._values)
+    assert not values.flags.writeable
+
+
+def test_dashboard_streams_records():
+    history = pd.DataFrame({'hosp_1': [1, 2, 3], 'hosp_2': [4, 5, 6]},
+                           index=pd.date_range('2024-01-01', periods=3))
+    dashboard = StreamingDashboard(history, window=4, blit=False)
+
+    # day 5 has no records and hosp_2 misses day 6
+    records = [('2024-01-04', 1, 7), ('2024-01-04', 'hosp_2', 8),
+               ('2024-01-06', 1, 9)]
+    dashboard.run(records)
+
+    frame = dashboard.buffer.frame()
+    assert frame.index[-1] == pd.Timestamp('2024-01-06')
+    np.testing.assert_array_equal(frame['hosp_1'], [3, 7, np.nan, 9])
+    np.testing.assert_array_equal(frame['hosp_2'], [6, 8, np.nan, np.nan])
+    assert dashboard.n_refreshes >= 1
+
+
+def test_dashboard_rejects_out_of_order_records():
+    history = pd.DataFrame({'hosp_1': [1, 2]},
+                           index=pd.date_range('2024-01-01', periods=2))
+    dashboard = StreamingDashboard(history, window=4, blit=False)
+
+    with pytest.raises(ValueError):
+        dashboard.push('2024-01-02', 1, 5)
+
+    dashboard.push('2024-01-04', 1, 5)
+    with pytest.raises(ValueError):
+        dashboard.push('2024-01-03', 1, 5)
+    with pytest.raises(ValueError):
+        dashboard.push('2024-01-04', 3, 5)
@@ -0,0 +1,76 @@
+'''
+Visual downsampling of long series for plotting.
+'''
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.plotting.downsample import (downsample_series,
+                                              lttb_indices, minmax_indices,
+                                              pixel_width)
+from ts_emergency.plotting.view import plot_single_ed
+
+N_POINTS = 10_000
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2000-01-01', periods=N_POINTS, name='date')
+    return pd.Series(rng.normal(100, 20, N_POINTS).cumsum(), index=index,
+                     name='hosp_1')
+
+
+@pytest.mark.parametrize('n_out', [3, 10, 500, 1234])
+def test_lttb_keeps_endpoints_and_count(series, n_out):
+    y = series.to_numpy()
+    idx = lttb_indices(np.arange(N_POINTS), y, n_out)
+
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == N_POINTS - 1
+    assert (np.diff(idx) > 0).all()
+
+
+@pytest.mark.parametrize('n_buckets', [1, 10, 800])
+def test_minmax_keeps_endpoints_and_extremes(series, n_buckets):
+    y = series.to_numpy()
+    idx = minmax_indices(y, n_buckets)
+
+    assert len(idx) <= 2 * n_buckets + 2
+    assert idx[0] == 0 and idx[-1] == N_POINTS - 1
+    assert (np.diff(idx) > 0).all()
+    assert y.argmin() in idx and y.argmax() in idx
+
+
+def test_short_series_kept_whole():
+    y = np.arange(5.0)
+    np.testing.assert_array_equal(lttb_indices(y, y, 10), np.arange(5))
+    np.testing.assert_array_equal(minmax_indices(y, 10), np.arange(5))
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_series(series, method):
+    with_gap = series.copy()
+    with_gap.iloc[100] = np.nan
+    result = downsample_series(with_gap, 300, method)
+
+    assert len(result) <= 2 * 300 + 2
+    assert not result.isna().any()
+    assert result.index[0] == series.index[0]
+    assert result.index[-1] == series.index[-1]
+    pd.testing.assert_series_equal(result, series[result.index])
+
+
+def test_invalid_method(series):
+    with pytest.raises(ValueError):
+        downsample_series(series, 100, 'mean')
+
+
+def test_plot_single_ed_downsampled(series):
+    fig, ax = plot_single_ed(series.to_frame(), 'hosp_1', downsample='lttb')
+    try:
+        assert len(ax.lines[0].get_xdata()) == pixel_width(ax)
+    finally:
+        plt.close(fig)
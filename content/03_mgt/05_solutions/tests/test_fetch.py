@@ -0,0 +1,147 @@
+'''
+Conditional and redirected downloads of the fetch layer against a local
+http.server.
+'''
+
+import asyncio
+import http.server
+import threading
+import urllib.error
+
+import pytest
+
+from ts_emergency import cache
+from ts_emergency.fetch import MAX_REDIRECTS, refresh_cache_async
+
+CONTENT = b'date,hosp,attends\n2014-04-01,1,10\n'
+ETAG = '"v1"'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    '''
+    Serves CONTENT at /data.csv with an ETag and answers matching
+    conditional requests with 304.  /moved redirects to /data.csv and
+    /loop redirects to itself.
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path,
+                                     self.headers.get('If-None-Match')))
+        if self.path == '/data.csv':
+            if self.headers.get('If-None-Match') == ETAG:
+                self._send(304)
+            else:
+                self._send(200, CONTENT, {'ETag': ETAG})
+        elif self.path == '/moved':
+            self._send(302, b'<a href="/data.csv">moved</a>',
+                       {'Location': '/data.csv'})
+        elif self.path == '/loop':
+            self._send(302, b'', {'Location': '/loop'})
+        else:
+            self._send(404, b'not found')
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path):
+    host, port = server.server_address
+    return f'http://{host}:{port}{path}'
+
+
+def refresh(*urls):
+    return asyncio.run(refresh_cache_async(list(urls)))
+
+
+def test_conditional_request_returns_304(server):
+    data_url = url(server, '/data.csv')
+
+    path = refresh(data_url)[data_url]
+    assert path.read_bytes() == CONTENT
+    assert cache.cached_validators(data_url) == (ETAG, None)
+
+    assert refresh(data_url)[data_url] == path
+    assert server.requests == [('/data.csv', None), ('/data.csv', ETAG)]
+    assert path.read_bytes() == CONTENT
+
+
+def test_redirect_is_followed(server):
+    moved_url = url(server, '/moved')
+
+    path = refresh(moved_url)[moved_url]
+    assert path.read_bytes() == CONTENT
+    assert cache.lookup(moved_url) == path
+
+
+def test_error_status_is_not_cached(server):
+    missing_url = url(server, '/missing')
+
+    with pytest.raises(urllib.error.HTTPError) as info:
+        refresh(missing_url)
+    assert info.value.code == 404
+    assert cache.lookup(missing_url) is None
+
+
+def test_redirect_loop_is_not_cached(server):
+    loop_url = url(server, '/loop')
+
+    with pytest.raises(urllib.error.HTTPError):
+        refresh(loop_url)
+    assert len(server.requests) == MAX_REDIRECTS + 1
+    assert cache.lookup(loop_url) is None
+
+
+def test_cold_download_uses_fetch(server):
+    data_url = url(server, '/data.csv')
+
+    path = cache.cached_path(data_url)
+    assert path.read_bytes() == CONTENT
+    assert cache.cached_validators(data_url) == (ETAG, None)
+    assert server.requests == [('/data.csv', None)]
+
+
+def test_refresh_revalidates_cached_file(server):
+    data_url = url(server, '/data.csv')
+    path = cache.cached_path(data_url)
+
+    assert cache.cached_path(data_url, refresh=True) == path
+    assert server.requests == [('/data.csv', None), ('/data.csv', ETAG)]
+
+
+def test_download_inside_running_event_loop(server):
+    data_url = url(server, '/data.csv')
+
+    async def main():
+        return cache.cached_path(data_url)
+
+    assert asyncio.run(main()).read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize('umask, mode', [(0o022, 0o644), (0o077, 0o600)])
+def test_cached_file_mode_follows_umask(server, monkeypatch, umask, mode):
+    monkeypatch.setattr(cache, '_UMASK', umask)
+
+    path = cache.cached_path(url(server, '/data.csv'))
+    assert path.stat().st_mode & 0o777 == mode
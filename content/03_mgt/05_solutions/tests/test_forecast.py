@@ -0,0 +1,134 @@
+'''
+Closed form checks of the naive, seasonal naive and SES forecasts.
+'''
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.forecast import (VALID_METHODS, _ses_filter, fit,
+                                   forecast, forecast_all, to_frame)
+
+HORIZON = 10
+PERIOD = 7
+
+
+@pytest.fixture
+def wide_df():
+    rng = np.random.default_rng(2)
+    index = pd.date_range('2024-01-01', periods=100, name='date')
+    weekly = np.tile([10, 12, 14, 13, 11, 6, 5], 15)[:100]
+    return pd.DataFrame({'hosp_1': weekly + rng.normal(0, 1, 100),
+                         'hosp_2': rng.normal(0, 1, 100).cumsum() + 50},
+                        index=index)
+
+
+@pytest.mark.parametrize('method', VALID_METHODS)
+def test_constant_series_is_forecast_exactly(method):
+    y = pd.DataFrame({'hosp_1': np.full(30, 42.0)})
+    result = forecast(y, method, horizon=HORIZON)
+
+    np.testing.assert_allclose(result.mean, 42.0)
+    np.testing.assert_allclose(result.upper - result.lower, 0, atol=1e-12)
+
+
+def test_naive(wide_df):
+    y = wide_df.to_numpy()
+    result = forecast(wide_df, 'naive', horizon=HORIZON)
+
+    np.testing.assert_array_equal(result.mean, np.repeat(y[-1:], HORIZON, 0))
+    sigma = np.sqrt(np.mean(np.diff(y, axis=0) ** 2, axis=0))
+    np.testing.assert_allclose(result.params['sigma'], sigma)
+
+    z = NormalDist().inv_cdf(0.975)
+    steps = np.arange(1, HORIZON + 1)[:, None]
+    np.testing.assert_allclose(result.upper - result.mean,
+                               z * sigma * np.sqrt(steps))
+
+
+def test_snaive_repeats_the_last_season(wide_df):
+    y = wide_df.to_numpy()
+    result = forecast(wide_df, 'snaive', horizon=HORIZON, period=PERIOD)
+
+    # each forecast equals the value one season before it (the forecast
+    # itself beyond the first season)
+    extended = np.concatenate([y, result.mean])
+    n_obs = len(y)
+    for h in range(HORIZON):
+        np.testing.assert_array_equal(extended[n_obs + h],
+                                      extended[n_obs + h - PERIOD])
+
+    # the interval widens each whole season
+    width = result.upper - result.lower
+    n_seasons = np.arange(HORIZON) // PERIOD + 1
+    np.testing.assert_allclose(width, width[:1] * np.sqrt(n_seasons)[:, None])
+
+
+def test_ses_with_fixed_alpha(wide_df):
+    y = wide_df.to_numpy()
+    alpha = 0.3
+    result = forecast(wide_df, 'ses', horizon=HORIZON, alpha=alpha)
+
+    level = y[0].copy()
+    for t in range(1, len(y)):
+        level = level + alpha * (y[t] - level)
+    np.testing.assert_allclose(result.mean, np.repeat(level[None], HORIZON,
+                                                      axis=0))
+
+    # alpha=1 is the naive forecast
+    np.testing.assert_allclose(forecast(wide_df, 'ses', alpha=1).mean,
+                               forecast(wide_df, 'naive').mean)
+
+
+def test_ses_grid_fit_minimises_squared_error(wide_df):
+    y = wide_df.to_numpy()
+    result = forecast(wide_df, 'ses')
+    fitted = result.params['alpha']
+
+    candidates = np.linspace(0.001, 1, 1000)
+    _, sse = _ses_filter(y, np.repeat(candidates[:, None], y.shape[1], 1))
+    _, fitted_sse = _ses_filter(y, fitted[None, :])
+
+    assert ((fitted > 0) & (fitted <= 1)).all()
+    assert (fitted_sse[0] <= sse.min(axis=0) * (1 + 1e-6)).all()
+    # noise around a seasonal pattern vs a random walk
+    assert fitted[0] < fitted[1]
+
+
+def test_fit_matches_forecast(wide_df):
+    y = wide_df.to_numpy(dtype=np.float64)
+    for method in VALID_METHODS:
+        mean, _, _ = fit(y, method, HORIZON)
+        np.testing.assert_array_equal(mean, forecast(wide_df, method,
+                                                     HORIZON).mean)
+
+
+def test_future_index_and_frame(wide_df):
+    results = forecast_all(wide_df, horizon=HORIZON)
+    assert list(results) == VALID_METHODS
+
+    result = results['snaive']
+    expected = pd.date_range('2024-04-10', periods=HORIZON)
+    pd.testing.assert_index_equal(pd.DatetimeIndex(result.index), expected,
+                                  check_names=False)
+
+    df = to_frame(result)
+    assert len(df) == HORIZON * 2
+    assert df.columns.tolist() == ['date', 'hosp', 'method', 'mean',
+                                   'lower', 'upper']
+    assert (df['lower'] <= df['mean']).all()
+
+
+@pytest.mark.parametrize('kwargs', [{'method': 'arima'}, {'horizon': 0},
+                                    {'level': 1.5}])
+def test_invalid_arguments(wide_df, kwargs):
+    with pytest.raises(ValueError):
+        forecast(wide_df, **kwargs)
+
+
+def test_missing_values_rejected(wide_df):
+    wide_df.iloc[5, 0] = np.nan
+    with pytest.raises(ValueError):
+        forecast(wide_df)
@@ -0,0 +1,48 @@
+'''
+Importing ts_emergency must not load or replace the heavy dependencies,
+and the packages it uses must work from several threads at once in a fresh
+interpreter.
+'''
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from ts_emergency.cache import BUNDLED_DATA_DIR
+
+SOLUTIONS_DIR = Path(__file__).resolve().parents[1]
+
+
+def run_fresh(code, **kwargs):
+    return subprocess.run([sys.executable, '-c', code], cwd=SOLUTIONS_DIR,
+                          capture_output=True, text=True, **kwargs)
+
+
+def test_import_leaves_sys_modules_alone():
+    code = ('import sys, ts_emergency.datasets, ts_emergency.stats, '
+            + 'ts_emergency.store, ts_emergency.transforms, '
+            + 'ts_emergency.analysis, ts_emergency.backtest, '
+            + 'ts_emergency.plotting.panels\n'
+            + "assert 'pandas' not in sys.modules, 'pandas imported'\n"
+            + "assert 'numpy' not in sys.modules, 'numpy imported'\n")
+    result = run_fresh(code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_threaded_load_ed_ts_many_in_fresh_process(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f'trust_{i}.csv'
+        shutil.copy(BUNDLED_DATA_DIR / 'syn_ts_ed_long.csv', path)
+        paths.append(str(path))
+
+    code = ('from ts_emergency.datasets import load_ed_ts_many\n'
+            + f"df = load_ed_ts_many({paths!r}, 'long', workers=8)\n"
+            + 'print(len(df))\n')
+    result = run_fresh(code, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+    with open(BUNDLED_DATA_DIR / 'syn_ts_ed_long.csv') as f:
+        n_rows = sum(1 for _ in f) - 1
+    assert int(result.stdout) == 8 * n_rows
@@ -0,0 +1,122 @@
+'''
+Streaming the long format data by hospital or date window.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency import datasets
+from ts_emergency.datasets import iter_ed_ts, load_ed_ts
+
+
+@pytest.fixture
+def long_df():
+    return load_ed_ts('long', source='bundled')
+
+
+def check_groups(groups, long_df, key_of_rows):
+    keys = [key for key, _ in groups]
+    assert len(keys) == len(set(keys))
+    assert sum(len(df) for _, df in groups) == len(long_df)
+
+    for key, df in groups:
+        assert (key_of_rows(df) == key).all()
+        expected = long_df[key_of_rows(long_df) == key]
+        assert df['attends'].tolist() == expected['attends'].tolist()
+
+
+@pytest.mark.parametrize('chunksize', [100, 100_000])
+def test_by_hosp(long_df, chunksize):
+    groups = list(iter_ed_ts(source='bundled', chunksize=chunksize))
+    assert [key for key, _ in groups] == sorted(long_df['hosp'].unique())
+    check_groups(groups, long_df, lambda df: df['hosp'])
+
+
+@pytest.mark.parametrize('chunksize', [100, 100_000])
+def test_by_date_on_hosp_sorted_file(long_df, chunksize):
+    groups = list(iter_ed_ts(by='date', freq='M', source='bundled',
+                             chunksize=chunksize))
+    periods = long_df['date'].dt.to_period('M')
+    assert [key for key, _ in groups] == sorted(periods.unique())
+    check_groups(groups, long_df, lambda df: df['date'].dt.to_period('M'))
+
+
+def test_unsorted_file(long_df, tmp_path):
+    path = tmp_path / 'shuffled.csv'
+    shuffled = long_df.sample(frac=1, random_state=1)
+    shuffled.to_csv(path, index=False)
+
+    # rows of each group keep their order in the file
+    groups = list(iter_ed_ts(path, by='hosp', chunksize=250))
+    check_groups(groups, shuffled, lambda df: df['hosp'])
+
+
+@pytest.fixture
+def read_count(monkeypatch):
+    '''
+    Count the passes made over the file
+    '''
+    calls = []
+    read_csv = pd.read_csv
+
+    def counted(*args, **kwargs):
+        calls.append(kwargs.get('usecols'))
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_csv', counted)
+    return calls
+
+
+def test_by_date_within_max_rows(long_df, read_count):
+    max_rows = len(long_df) // 4
+    groups = list(iter_ed_ts(by='date', freq='M', source='bundled',
+                             chunksize=500, max_rows=max_rows))
+
+    # one key scan and then several passes over the file
+    assert read_count[0] == ['date'] and len(read_count) > 4
+    periods = long_df['date'].dt.to_period('M')
+    assert [key for key, _ in groups] == sorted(periods.unique())
+    check_groups(groups, long_df, lambda df: df['date'].dt.to_period('M'))
+
+
+def test_sorted_file_needs_one_pass(long_df, read_count):
+    groups = list(iter_ed_ts(by='hosp', source='bundled', chunksize=500,
+                             max_rows=1000))
+    assert len(read_count) == 2
+    check_groups(groups, long_df, lambda df: df['hosp'])
+
+
+def test_batches_stay_within_max_rows():
+    rng = np.random.default_rng(0)
+    groups = {}
+    for key in range(50):
+        first = int(rng.integers(20))
+        groups[key] = [first, first + int(rng.integers(10)),
+                       int(rng.integers(1, 100))]
+    max_rows = 250
+
+    batches = datasets._plan_batches(groups, max_rows)
+    assert sorted(sum(batches, [])) == list(groups)
+    for batch in batches:
+        buffered = np.zeros(30, dtype=int)
+        for key in batch:
+            first, last, n_rows = groups[key]
+            buffered[first:last + 1] += n_rows
+        assert buffered.max() <= max_rows
+
+
+def test_group_larger_than_max_rows(long_df):
+    groups = list(iter_ed_ts(by='hosp', source='bundled', chunksize=100,
+                             max_rows=10))
+    check_groups(groups, long_df, lambda df: df['hosp'])
+
+
+def test_invalid_by():
+    with pytest.raises(ValueError):
+        next(iter_ed_ts(by='attends', source='bundled'))
+
+
+def test_invalid_max_rows():
+    with pytest.raises(ValueError):
+        next(iter_ed_ts(source='bundled', max_rows=0))
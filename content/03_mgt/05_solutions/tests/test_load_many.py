@@ -0,0 +1,63 @@
+'''
+Combining several long format files with load_ed_ts_many.
+'''
+
+import pandas as pd
+import pytest
+
+from ts_emergency.datasets import load_ed_ts, load_ed_ts_many
+
+N_TRUSTS = 3
+
+
+@pytest.fixture
+def trusts(tmp_path):
+    '''
+    One long format file per trust.  Each trust has its own hospital ids.
+    Returns the paths and the frame written to each.
+    '''
+    long_df = load_ed_ts('long', source='bundled')
+    paths, frames = [], []
+    for i in range(N_TRUSTS):
+        df = long_df.assign(hosp=long_df['hosp'] + 10 * i,
+                            attends=long_df['attends'] + i)
+        path = tmp_path / f'trust_{i}.csv'
+        df.to_csv(path, index=False)
+        paths.append(path)
+        frames.append(df)
+    return paths, frames
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_long_matches_concat(trusts, workers):
+    paths, frames = trusts
+    expected = pd.concat(frames, ignore_index=True)
+
+    result = load_ed_ts_many(paths, 'long', workers=workers)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_wide_matches_concat(trusts, workers):
+    paths, frames = trusts
+    wide = load_ed_ts('wide', source='bundled')
+    expected = pd.concat([(wide + i).rename(columns=lambda col: 'hosp_'
+                          + str(int(col.removeprefix('hosp_')) + 10 * i))
+                          for i in range(N_TRUSTS)], axis=1)
+
+    result = load_ed_ts_many(paths, 'wide', workers=workers)
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+
+
+def test_process_pool(trusts):
+    paths, frames = trusts
+    result = load_ed_ts_many(paths, 'long', workers=2, use_processes=True)
+    pd.testing.assert_frame_equal(result, pd.concat(frames,
+                                                    ignore_index=True))
+
+
+@pytest.mark.parametrize('paths, data_format', [([], 'wide'),
+                                                (['a.csv'], 'tall')])
+def test_invalid_arguments(paths, data_format):
+    with pytest.raises(ValueError):
+        load_ed_ts_many(paths, data_format)
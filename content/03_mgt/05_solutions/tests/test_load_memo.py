@@ -0,0 +1,52 @@
+'''
+Memoization of load_ed_ts.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.cache import SNAPSHOT_DIR
+from ts_emergency.datasets import load_ed_ts
+
+
+def test_engine_is_part_of_the_key(cache_dir):
+    csv = load_ed_ts(source='bundled', engine='csv')
+    binary = load_ed_ts(source='bundled', engine='binary')
+
+    assert load_ed_ts.cache_info().misses == 2
+    assert any((cache_dir / SNAPSHOT_DIR).iterdir())
+    pd.testing.assert_frame_equal(csv, binary)
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'data_format': 'long'},
+                                    {'data_format': 'long', 'compact': True},
+                                    {'engine': 'binary'}])
+def test_hits_share_data_and_are_read_only(kwargs):
+    first = load_ed_ts(source='bundled', **kwargs)
+    second = load_ed_ts(source='bundled', **kwargs)
+    assert load_ed_ts.cache_info().hits == 1
+
+    col = first.columns[-1]
+    assert np.shares_memory(first[col].to_numpy(), second[col].to_numpy())
+    assert first.attrs == second.attrs
+
+    with pytest.raises(ValueError):
+        first.iloc[0, -1] = -1
+    pd.testing.assert_frame_equal(load_ed_ts(source='bundled', **kwargs),
+                                  second)
+
+
+def test_copy_on_write_frames_can_be_edited():
+    with pd.option_context('mode.copy_on_write', True):
+        first = load_ed_ts(source='bundled')
+        expected = first.iloc[0, 0]
+        first.iloc[0, 0] = -1
+        assert load_ed_ts(source='bundled').iloc[0, 0] == expected
+
+
+def test_numpy_is_read_only_view():
+    first = load_ed_ts(source='bundled', as_pandas=False)
+    second = load_ed_ts(source='bundled', as_pandas=False)
+    assert np.shares_memory(first, second)
+    assert not first.flags.writeable
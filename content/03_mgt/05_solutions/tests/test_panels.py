@@ -0,0 +1,78 @@
+'''
+Paged small multiples of the ED data.
+'''
+
+import math
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.plotting.panels import (COLLECTION_THRESHOLD, EDPanels,
+                                          grid_shape, paginate)
+from ts_emergency.plotting.view import plot_eds
+
+N_DAYS = 60
+
+
+def synthetic_wide(n_hosps):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2020-01-01', periods=N_DAYS, name='date')
+    return pd.DataFrame(rng.poisson(200, size=(N_DAYS, n_hosps)),
+                        index=index,
+                        columns=[f'hosp_{i}' for i in range(1, n_hosps + 1)])
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close('all')
+
+
+def titles(fig):
+    return [ax.get_title() for ax in fig.axes if ax.get_visible()]
+
+
+@pytest.mark.parametrize('n_hosps, page_size', [(10, 4), (23, 5), (4, 4),
+                                                (7, None)])
+def test_plot_eds_pages(n_hosps, page_size):
+    wide_df = synthetic_wide(n_hosps)
+    n_pages = 1 if page_size is None else math.ceil(n_hosps / page_size)
+
+    figures = [plot_eds(wide_df, page_size=page_size, page=page)
+               for page in range(n_pages)]
+    assert len(set(map(id, figures))) == n_pages
+
+    # every hospital is on exactly one page, in order
+    shown = [title for fig in figures for title in titles(fig)]
+    assert shown == [f'Hospital {i}' for i in range(1, n_hosps + 1)]
+
+    with pytest.raises(ValueError):
+        plot_eds(wide_df, page_size=page_size, page=n_pages)
+
+
+def test_paginate_and_grid():
+    assert paginate(['a', 'b', 'c'], 2) == [['a', 'b'], ['c']]
+    assert paginate(['a', 'b'], None) == [['a', 'b']]
+    assert grid_shape(4) == (4, 1)
+    assert grid_shape(10) == (3, 4)
+    assert grid_shape(3, ncols=5) == (1, 3)
+
+
+def test_collection_above_threshold():
+    wide_df = synthetic_wide(COLLECTION_THRESHOLD + 1)
+    panels = EDPanels(wide_df)
+    assert panels.use_collection
+    assert len(panels.axes) == 1
+    assert len(panels.collection.get_segments()) == len(wide_df.columns)
+
+
+def test_update_redraws_lines():
+    wide_df = synthetic_wide(3)
+    panels = EDPanels(wide_df, blit=True)
+    panels.figure.canvas.draw()
+
+    panels.update(wide_df * 2)
+    np.testing.assert_array_equal(panels.lines[0].get_ydata(),
+                                  wide_df['hosp_1'].to_numpy() * 2)
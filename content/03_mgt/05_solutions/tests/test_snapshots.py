@@ -0,0 +1,52 @@
+'''
+Binary snapshots follow the content of the cached source file.
+'''
+
+import pandas as pd
+
+from ts_emergency import cache
+from ts_emergency.datasets import LONG_URL, WIDE_URL, load_ed_ts
+
+
+def snapshots(cache_dir):
+    return sorted(path.name for path in
+                  (cache_dir / cache.SNAPSHOT_DIR).iterdir())
+
+
+def upstream_change():
+    '''
+    The bundled wide file with the first attendance of hosp_1 changed
+    '''
+    wide_df = load_ed_ts(source='bundled').copy()
+    wide_df.iloc[0, 0] = 999
+    load_ed_ts.cache_clear()
+    return wide_df, wide_df.to_csv().encode()
+
+
+def test_stale_snapshot_rebuilt_and_cleared(offline, cache_dir):
+    original = load_ed_ts(engine='binary')
+    old_snapshots = snapshots(cache_dir)
+    assert len(old_snapshots) == 1
+
+    changed, content = upstream_change()
+    cache.store(WIDE_URL, content)
+
+    reloaded = load_ed_ts(engine='binary')
+    pd.testing.assert_frame_equal(reloaded, changed)
+    assert reloaded.iloc[0, 0] != original.iloc[0, 0]
+    assert len(snapshots(cache_dir)) == 2
+
+    # only the snapshot of the current content is kept
+    cache.clear_cache([LONG_URL])
+    current = snapshots(cache_dir)
+    assert len(current) == 1 and current != old_snapshots
+
+    cache.clear_cache()
+    assert snapshots(cache_dir) == []
+
+
+def test_snapshot_of_cached_file_is_keyed_on_digest(offline, cache_dir):
+    path = cache.cached_path(WIDE_URL, 'syn_ts_ed_wide.csv')
+    snapshot = cache.snapshot_path(path, '_read_wide')
+    assert snapshot.name == f'{path.stem[:cache.SNAPSHOT_KEY_LENGTH]}_' \
+        + '_read_wide'
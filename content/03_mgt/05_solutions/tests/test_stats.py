@@ -0,0 +1,88 @@
+'''
+Multi-window rolling statistics against pandas `rolling()`.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.stats import (PARTITION_MAX_SIZE, rolling_mean,
+                                rolling_quantile, rolling_stats, rolling_std,
+                                rolling_zscore, to_frame)
+
+WINDOWS = [1, 7, 28, 400]
+QUANTILES = [0.0, 0.1, 0.5, 0.9, 1.0]
+
+
+@pytest.fixture(scope='module')
+def wide_df():
+    rng = np.random.default_rng(42)
+    index = pd.date_range('2020-01-01', periods=365)
+    return pd.DataFrame(rng.poisson(200, size=(365, 5)), index=index,
+                        columns=[1, 2, 3, 4, 5])
+
+
+def assert_close(actual, expected):
+    # results are float32
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-5,
+                               atol=1e-3)
+
+
+@pytest.mark.parametrize('data', ['int', 'float'])
+def test_mean_and_std_match_pandas(wide_df, data):
+    df = wide_df if data == 'int' else wide_df * 1.5 + 1e4
+    means = rolling_mean(df, WINDOWS)
+    stds = rolling_std(df, WINDOWS)
+
+    for i, window in enumerate(WINDOWS):
+        rolling = df.rolling(window)
+        assert_close(means[i], rolling.mean())
+        assert_close(stds[i], rolling.std())
+
+
+def test_zscore_matches_pandas(wide_df):
+    zscores = rolling_zscore(wide_df, WINDOWS)
+    for i, window in enumerate(WINDOWS):
+        rolling = wide_df.rolling(window)
+        expected = (wide_df - rolling.mean()) / rolling.std()
+        # a window of 1 has no std: NaN rather than inf
+        assert_close(zscores[i], expected.replace([np.inf, -np.inf], np.nan))
+
+
+@pytest.mark.parametrize('n_cols', [5, PARTITION_MAX_SIZE])
+def test_quantile_matches_pandas(n_cols):
+    # few columns use the partition path and many the sorted window path
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.poisson(50, size=(60, n_cols)))
+    windows = [1, 7, 28]
+    result = rolling_quantile(df, QUANTILES, windows)
+
+    for i, window in enumerate(windows):
+        for j, q in enumerate(QUANTILES):
+            assert_close(result[i, j], df.rolling(window).quantile(q))
+
+
+def test_rolling_stats_agrees_with_single_functions(wide_df):
+    result = rolling_stats(wide_df, WINDOWS, QUANTILES)
+    np.testing.assert_array_equal(result.mean, rolling_mean(wide_df, WINDOWS))
+    np.testing.assert_array_equal(result.std, rolling_std(wide_df, WINDOWS))
+    np.testing.assert_array_equal(result.quantile,
+                                  rolling_quantile(wide_df, QUANTILES,
+                                                   WINDOWS))
+
+    frame = to_frame(result.quantile, result, 28, 0.5)
+    pd.testing.assert_index_equal(frame.index, wide_df.index)
+    assert_close(frame, wide_df.rolling(28).median())
+
+
+@pytest.mark.parametrize('windows, quantiles', [([0], [0.5]), ([7], [1.5])])
+def test_invalid_arguments(wide_df, windows, quantiles):
+    with pytest.raises(ValueError):
+        rolling_stats(wide_df, windows, quantiles)
+
+
+def test_missing_values_are_rejected(wide_df):
+    df = wide_df.astype(float)
+    df.iloc[3, 0] = np.nan
+    with pytest.raises(ValueError):
+        rolling_mean(df)
@@ -0,0 +1,113 @@
+'''
+Appending to the incremental EDStore.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.datasets import long_to_wide
+from ts_emergency.store import EDStore
+
+N_DAYS = 10
+HOSP_IDS = [1, 2, 3]
+
+
+@pytest.fixture
+def wide_df():
+    index = pd.date_range('2024-01-01', periods=N_DAYS, name='date')
+    values = np.arange(N_DAYS * len(HOSP_IDS), dtype=np.int8)
+    return pd.DataFrame(values.reshape(N_DAYS, -1), index=index,
+                        columns=[f'hosp_{i}' for i in HOSP_IDS])
+
+
+@pytest.fixture
+def store(wide_df):
+    return EDStore(wide_df, capacity=N_DAYS)
+
+
+def new_days(store, n_days, attends=1):
+    dates = store.end_date + pd.to_timedelta(np.arange(1, n_days + 1), 'D')
+    return [(date, hosp, attends) for date in dates for hosp in HOSP_IDS]
+
+
+def test_append_matches_rebuilt_frames(store, wide_df):
+    records = new_days(store, 3, attends=7)
+    assert store.append(records) == 3
+
+    expected = pd.concat([wide_df, long_to_wide(
+        pd.DataFrame(records, columns=['date', 'hosp', 'attends']))])
+    np.testing.assert_array_equal(store.wide.to_numpy(), expected.to_numpy())
+    pd.testing.assert_index_equal(store.wide.index, expected.index,
+                                  check_names=False)
+
+    long_df = store.long
+    assert len(long_df) == (N_DAYS + 3) * len(HOSP_IDS)
+    assert long_df['attends'].tolist()[-3:] == [7, 7, 7]
+    assert long_df['hosp'].tolist()[-3:] == HOSP_IDS
+
+
+def test_version_bumped_on_append(store):
+    assert store.wide.attrs['version'] == 0
+    store.append(new_days(store, 1))
+    assert store.version == 1
+    assert store.wide.attrs['version'] == store.long.attrs['version'] == 1
+
+    # nothing to append
+    assert store.append([]) == 0
+    assert store.version == 1
+
+
+def test_buffers_double_when_full(store):
+    assert store.capacity == N_DAYS
+    store.append(new_days(store, 1))
+    assert store.capacity == 2 * N_DAYS
+
+    store.append(new_days(store, N_DAYS - 1))
+    assert store.capacity == 2 * N_DAYS
+
+    store.append(new_days(store, 25))
+    assert store.capacity == 8 * N_DAYS
+    assert store.n_days == 4 * N_DAYS + 5
+
+
+def test_dtype_promoted_for_larger_values(store):
+    assert store.wide.dtypes.unique().tolist() == [np.int8]
+    store.append(new_days(store, 1, attends=1000))
+
+    assert store.wide.dtypes.unique().tolist() == [np.int16]
+    assert store.wide.iloc[-1].tolist() == [1000] * len(HOSP_IDS)
+    assert store.wide.iloc[0].tolist() == [0, 1, 2]
+
+
+def test_frames_are_read_only(store):
+    wide_df = store.wide
+    with pytest.raises(ValueError):
+        wide_df.iloc[0, 0] = 99
+
+
+@pytest.mark.parametrize('change', ['duplicate', 'missing', 'gap', 'past',
+                                    'unknown'])
+def test_invalid_records_rejected(store, change):
+    records = new_days(store, 2)
+    if change == 'duplicate':
+        records.append(records[0])
+    elif change == 'missing':
+        records.pop()
+    elif change == 'gap':
+        records = records[len(HOSP_IDS):]
+    elif change == 'past':
+        records[0] = (store.end_date, 1, 1)
+    else:
+        records[0] = (records[0][0], 99, 1)
+
+    with pytest.raises(ValueError):
+        store.append(records)
+
+    # a rejected append leaves the store unchanged
+    assert store.n_days == N_DAYS and store.version == 0
+
+
+def test_invalid_history(wide_df):
+    with pytest.raises(ValueError):
+        EDStore(wide_df.drop(wide_df.index[4]))
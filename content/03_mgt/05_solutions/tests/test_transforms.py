@@ -0,0 +1,92 @@
+'''
+Derived series must reflect the current data of the frame.  Results for
+EDStore frames are cached until the store is appended to.
+'''
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ts_emergency.datasets import load_ed_ts
+from ts_emergency.store import EDStore
+from ts_emergency.transforms import derived_series
+
+
+@pytest.fixture
+def wide_df():
+    return load_ed_ts(source='bundled').copy()
+
+
+def test_matches_whole_frame_transform(wide_df):
+    expected = wide_df.diff(periods=7)['hosp_2']
+    pd.testing.assert_series_equal(
+        derived_series(wide_df, 'hosp_2', 'diff', periods=7),
+        expected)
+
+
+def test_reflects_in_place_edit(wide_df):
+    idx = wide_df.index[10]
+    before = derived_series(wide_df, 'hosp_1')
+
+    wide_df.loc[idx, 'hosp_1'] = 0
+    after = derived_series(wide_df, 'hosp_1')
+
+    assert after[idx] == -wide_df['hosp_1'].iloc[9]
+    assert after[idx] != before[idx]
+
+
+def test_new_frame_never_sees_old_results():
+    for value in [1, 2, 3]:
+        df = pd.DataFrame({'hosp_1': np.arange(5) * value})
+        assert derived_series(df, 'hosp_1').iloc[-1] == value
+
+
+def test_unknown_transform(wide_df):
+    with pytest.raises(ValueError):
+        derived_series(wide_df, 'hosp_1', 'cube')
+
+
+
+@pytest.fixture
+def store(wide_df):
+    return EDStore(wide_df)
+
+
+def next_day(store, attends):
+    date = store.end_date + pd.Timedelta(days=1)
+    return [(date, hosp, attends) for hosp in store.hosp_ids]
+
+
+def test_store_frame_is_cached(store):
+    first = derived_series(store.wide, 'hosp_1', periods=7)
+    second = derived_series(store.wide, 'hosp_1', periods=7)
+
+    assert second is first
+    assert derived_series.cache_info().hits == 1
+    pd.testing.assert_series_equal(first, store.wide.diff(7)['hosp_1'])
+    assert derived_series(store.wide, 'hosp_1', periods=1) is not first
+
+    with pytest.raises(ValueError):
+        first.iloc[-1] = 0
+
+
+def test_append_invalidates_cache(store):
+    before = derived_series(store.wide, 'hosp_1')
+    last = store.wide['hosp_1'].iloc[-1]
+
+    # fits in the buffer so the data stay in the same array
+    capacity = store.capacity
+    store.append(next_day(store, last + 5))
+    assert store.capacity == capacity
+
+    after = derived_series(store.wide, 'hosp_1')
+    assert after is not before
+    assert len(after) == len(before) + 1
+    assert after.iloc[-1] == 5
+    assert derived_series(store.wide, 'hosp_1') is after
+
+
+def test_unversioned_frame_is_not_cached(wide_df):
+    derived_series(wide_df, 'hosp_1')
+    derived_series(wide_df, 'hosp_1')
+    assert derived_series.cache_info().currsize == 0
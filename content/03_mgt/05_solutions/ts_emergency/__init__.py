@@ -1,2 +1,15 @@
 __version__ = '0.1.0'
-__author__ = 'Tom Monks'
\ No newline at end of file
+__author__ = 'Tom Monks'
+
+import importlib
+
+# submodules are imported on first access e.g. ts_emergency.datasets
+_SUBMODULES = ['analysis', 'arrays', 'backtest', 'cache', 'datasets', 'fetch',
+               'forecast', 'plotting', 'snapshot', 'stats', 'store',
+               'transforms']
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
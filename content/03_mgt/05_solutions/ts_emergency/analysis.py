@@ -0,0 +1,147 @@
+'''
+analysis - vectorised time series analysis of the ED data
+
+Autocorrelation (ACF) and partial autocorrelation (PACF) are computed for
+every hospital column of a wide frame at once.  The ACF uses an FFT over the
+time axis of the 2D array and the PACF a Durbin-Levinson recursion that is
+vectorised across the columns.  Results match statsmodels `acf`
+(adjusted=False) and `pacf` (method='ywm') as used by `plot_acf` and
+`plot_pacf`.
+'''
+
+from collections import namedtuple
+
+from ts_emergency.arrays import as_2d_float
+
+DEFAULT_MAXLAGS = 56
+
+Correlograms = namedtuple('Correlograms', ['columns', 'acf', 'pacf',
+                                           'acf_confint', 'pacf_confint'])
+
+
+def acf(wide_df, maxlags=DEFAULT_MAXLAGS):
+    '''
+    Autocorrelation of every column in one FFT pass.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    maxlags: int, optional (default=DEFAULT_MAXLAGS)
+        The number of lags to compute
+
+    Returns:
+    -------
+    numpy.ndarray
+        shape (maxlags + 1, n_series).  Row 0 is lag 0 (=1.0)
+    '''
+    import numpy as np
+
+    x = as_2d_float(wide_df)
+    n_obs = x.shape[0]
+    x = x - x.mean(axis=0)
+
+    # zero pad to at least 2n - 1 to avoid circular correlation
+    n_fft = 1 << (2 * n_obs - 1).bit_length()
+    spectrum = np.fft.rfft(x, n=n_fft, axis=0)
+    acov = np.fft.irfft(spectrum * spectrum.conj(), n=n_fft, axis=0)
+    acov = acov[:maxlags + 1] / n_obs
+
+    return acov / acov[0]
+
+
+def pacf(wide_df, maxlags=DEFAULT_MAXLAGS, acf_values=None):
+    '''
+    Partial autocorrelation of every column using the Durbin-Levinson
+    recursion on the (biased) autocorrelations.  The recursion loops over
+    lags but each step is vectorised over all columns.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    maxlags: int, optional (default=DEFAULT_MAXLAGS)
+        The number of lags to compute
+
+    acf_values: numpy.ndarray, optional (default=None)
+        Precomputed output of `acf`.  Computed if None.
+
+    Returns:
+    -------
+    numpy.ndarray
+        shape (maxlags + 1, n_series).  Row 0 is lag 0 (=1.0)
+    '''
+    import numpy as np
+
+    if acf_values is None:
+        acf_values = acf(wide_df, maxlags)
+
+    rho = acf_values[:maxlags + 1]
+    n_series = rho.shape[1]
+
+    pacf_values = np.ones((maxlags + 1, n_series))
+    # phi[j] holds the AR(k) coefficient for lag j+1 of each series
+    phi = np.zeros((maxlags, n_series))
+    variance = np.ones(n_series)
+
+    for k in range(1, maxlags + 1):
+        # reflection coefficient (partial autocorrelation) for lag k
+        prev = phi[:k - 1]
+        reflect = (rho[k] - (prev * rho[k - 1:0:-1]).sum(axis=0)) / variance
+        phi[:k - 1] = prev - reflect * prev[::-1]
+        phi[k - 1] = reflect
+        variance = variance * (1 - reflect ** 2)
+        pacf_values[k] = reflect
+
+    return pacf_values
+
+
+def acf_pacf(wide_df, maxlags=DEFAULT_MAXLAGS, alpha=0.05):
+    '''
+    ACF and PACF with confidence intervals for every column of a wide frame.
+    The results can be passed to `ts_emergency.plotting.tsa.diagnostic_plot`
+    to avoid recomputing them per hospital.
+
+    Confidence intervals are half-widths around zero.  The ACF uses
+    Bartlett's formula and the PACF 1/sqrt(n), as in statsmodels.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame
+        ED data in wide format
+
+    maxlags: int, optional (default=DEFAULT_MAXLAGS)
+        The number of lags to compute
+
+    alpha: float, optional (default=0.05)
+        Confidence intervals are (1 - alpha)
+
+    Returns:
+    -------
+    Correlograms
+        namedtuple of columns, acf, pacf, acf_confint and pacf_confint.
+        Arrays have shape (maxlags + 1, n_series)
+    '''
+    import numpy as np
+
+    # standard library normal quantile avoids a scipy dependency
+    from statistics import NormalDist
+
+    n_obs = len(wide_df)
+    acf_values = acf(wide_df, maxlags)
+    pacf_values = pacf(wide_df, maxlags, acf_values)
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+
+    # Bartlett's formula for the variance of the acf at each lag
+    acf_var = np.ones_like(acf_values) / n_obs
+    acf_var[0] = 0
+    acf_var[2:] *= 1 + 2 * np.cumsum(acf_values[1:-1] ** 2, axis=0)
+
+    pacf_var = np.full_like(pacf_values, 1 / n_obs)
+    pacf_var[0] = 0
+
+    columns = list(getattr(wide_df, 'columns', range(acf_values.shape[1])))
+    return Correlograms(columns, acf_values, pacf_values,
+                        z * np.sqrt(acf_var), z * np.sqrt(pacf_var))
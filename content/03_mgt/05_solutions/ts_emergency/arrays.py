@@ -0,0 +1,23 @@
+'''
+arrays - numpy helpers shared by the vectorised analysis modules
+'''
+
+
+def as_2d_float(wide_df):
+    '''
+    Return the data as a 2D float64 array (n_obs, n_series).  A 1D series
+    becomes a single column.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame, pandas.Series or numpy.ndarray
+        ED data in wide format
+
+    Returns:
+    -------
+    numpy.ndarray
+    '''
+    import numpy as np
+
+    x = np.asarray(wide_df, dtype=np.float64)
+    return x.reshape(len(x), -1)
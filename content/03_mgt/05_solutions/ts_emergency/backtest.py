@@ -0,0 +1,217 @@
+'''
+backtest - rolling-origin evaluation of the baseline forecasts
+
+`rolling_origin_splits` generates train/test splits over a time index as
+slices of positions, so selecting a split from a frame or array returns a
+view and no data are copied.
+
+`backtest` refits the `ts_emergency.forecast` methods at each origin for
+every hospital and horizon at once and returns a tidy table of MAE, MASE
+and prediction interval coverage.  Origins (or hospitals when there are
+more hospitals than workers) can be split across a process pool.
+'''
+
+from collections import namedtuple
+
+from ts_emergency.arrays import as_2d_float
+from ts_emergency.forecast import (DEFAULT_HORIZON, DEFAULT_LEVEL,
+                                   DEFAULT_PERIOD, VALID_METHODS, fit)
+
+DEFAULT_INITIAL = 365
+DEFAULT_STEP = 7
+
+Split = namedtuple('Split', ['cutoff', 'train', 'test'])
+
+
+def rolling_origin_splits(index, horizon=DEFAULT_HORIZON,
+                          initial=DEFAULT_INITIAL, step=DEFAULT_STEP,
+                          window=None):
+    '''
+    Rolling-origin (time series cross validation) splits.
+
+    The first origin has `initial` training days.  Each later origin moves
+    forward `step` days.  The training set expands unless `window` is given,
+    in which case it slides with a fixed length.  Every test set has
+    `horizon` days.
+
+    Params:
+    ------
+    index: pandas.Index or int
+        Time index of the data (e.g. wide_df.index) or its length
+
+    horizon: int, optional (default=DEFAULT_HORIZON)
+        Number of days in each test set
+
+    initial: int, optional (default=DEFAULT_INITIAL)
+        Number of training days at the first origin
+
+    step: int, optional (default=DEFAULT_STEP)
+        Days between origins
+
+    window: int, optional (default=None)
+        Fixed training length.  If None the training set expands.
+
+    Returns:
+    -------
+    generator of Split
+        namedtuples of cutoff (the last training date), train and test
+        (slices of positions)
+    '''
+    n_obs = index if isinstance(index, int) else len(index)
+    if horizon < 1 or initial < 1 or step < 1:
+        raise ValueError('horizon, initial and step must be at least 1.')
+
+    if window is not None and window > initial:
+        raise ValueError('window must not be longer than initial.')
+
+    for cutoff in range(initial, n_obs - horizon + 1, step):
+        start = 0 if window is None else cutoff - window
+        last = cutoff - 1 if isinstance(index, int) else index[cutoff - 1]
+        yield Split(last, slice(start, cutoff),
+                    slice(cutoff, cutoff + horizon))
+
+
+def backtest(wide_df, methods=VALID_METHODS, horizon=DEFAULT_HORIZON,
+             initial=DEFAULT_INITIAL, step=DEFAULT_STEP, window=None,
+             level=DEFAULT_LEVEL, period=DEFAULT_PERIOD, workers=None):
+    '''
+    Evaluate baseline forecasts at every rolling origin.
+
+    MASE is scaled by the in-sample MAE of the seasonal naive method on each
+    training set.  Coverage is the proportion of actual values inside the
+    prediction interval.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame
+        ED data in wide format
+
+    methods: list, optional (default=VALID_METHODS)
+        methods from `ts_emergency.forecast`
+
+    horizon, initial, step, window:
+        See `rolling_origin_splits`
+
+    level: float, optional (default=DEFAULT_LEVEL)
+        Coverage of the prediction intervals
+
+    period: int, optional (default=DEFAULT_PERIOD)
+        Seasonal period of 'snaive' and the MASE scaling
+
+    workers: int, optional (default=None)
+        Number of processes.  If None or 1 the backtest runs in the calling
+        process.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per method, hospital and horizon (days ahead) with columns
+        method, hosp, horizon, mae, mase, coverage and n_origins
+    '''
+    import numpy as np
+    import pandas as pd
+    from statistics import NormalDist
+
+    methods = list(methods)
+    if any(method not in VALID_METHODS for method in methods):
+        raise ValueError(f'methods should be from {VALID_METHODS}')
+
+    splits = list(rolling_origin_splits(len(wide_df), horizon, initial, step,
+                                        window))
+    if not splits:
+        raise ValueError('wide_df is too short for a single origin.')
+
+    min_train = min(split.train.stop - split.train.start for split in splits)
+    if min_train <= period + 1:
+        raise ValueError(f'training sets must be longer than {period + 1} '
+                         + 'days.')
+
+    y = as_2d_float(wide_df)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    bounds = np.array([(split.train.start, split.train.stop)
+                       for split in splits])
+    args = (methods, horizon, period, z)
+
+    if workers is None or workers <= 1:
+        sums = _evaluate(y, bounds, *args)
+    else:
+        sums = _evaluate_parallel(y, bounds, args, workers)
+
+    abs_error, scaled_error, covered = sums / len(splits)
+    columns = list(wide_df.columns)
+    n_methods, n_series = len(methods), len(columns)
+
+    # (method, horizon, hosp) arrays to a tidy table
+    return pd.DataFrame(
+        {'method': np.repeat(methods, horizon * n_series),
+         'hosp': np.tile(columns, n_methods * horizon),
+         'horizon': np.tile(np.repeat(np.arange(1, horizon + 1), n_series),
+                            n_methods),
+         'mae': abs_error.ravel(),
+         'mase': scaled_error.ravel(),
+         'coverage': covered.ravel(),
+         'n_origins': len(splits)})
+
+
+def _evaluate_parallel(y, bounds, args, workers):
+    '''
+    Split the work across processes.  With at least as many hospitals as
+    workers each process evaluates a block of hospitals at every origin.
+    Otherwise each process evaluates every hospital at a block of origins.
+    '''
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    by_hosp = y.shape[1] >= workers
+    if by_hosp:
+        blocks = np.array_split(np.arange(y.shape[1]), workers)
+        tasks = [(y[:, cols], bounds) for cols in blocks]
+    else:
+        blocks = np.array_split(np.arange(len(bounds)), workers)
+        tasks = [(y, bounds[rows]) for rows in blocks if len(rows)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_evaluate, *task, *args) for task in tasks]
+        results = [future.result() for future in futures]
+
+    if by_hosp:
+        return np.concatenate(results, axis=-1)
+    return np.sum(results, axis=0)
+
+
+def _evaluate(y, bounds, methods, horizon, period, z):
+    '''
+    Sum the errors over the origins given by `bounds` (rows of train start
+    and stop positions).  Training and test sets are views of `y`.
+
+    Returns:
+    -------
+    numpy.ndarray
+        shape (3, n_methods, horizon, n_series): sums of the absolute
+        errors, scaled absolute errors and interval hits
+    '''
+    import numpy as np
+
+    n_series = y.shape[1]
+    sums = np.zeros((3, len(methods), horizon, n_series))
+
+    # cumulative absolute seasonal differences give the MASE scale of any
+    # training set in O(1)
+    seasonal = np.zeros((len(y) - period + 1, n_series))
+    np.cumsum(np.abs(y[period:] - y[:-period]), axis=0, out=seasonal[1:])
+
+    for start, stop in bounds:
+        train = y[start:stop]
+        actual = y[stop:stop + horizon]
+        scale = (seasonal[stop - period] - seasonal[start]) \
+            / (stop - start - period)
+
+        for i, method in enumerate(methods):
+            mean, sigma_h, _ = fit(train, method, horizon, period)
+            error = np.abs(actual - mean)
+            sums[0, i] += error
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sums[1, i] += error / scale
+            sums[2, i] += error <= z * sigma_h
+
+    return sums
@@ -0,0 +1,417 @@
+'''
+Local on-disk cache for the ts_emergency datasets.
+
+Remote files are stored in the cache directory under the sha256 hash of
+their content (content-addressed).  A small json index maps each url to the
+hash of its most recent download and the ETag/Last-Modified headers needed
+to make conditional requests when the cache is refreshed.  Downloads use
+the pooled connections of `ts_emergency.fetch`.  Once a url is in the index
+it is loaded from disk and the network is not touched again until the cache
+is refreshed.
+
+If a url has never been downloaded and the network is unavailable, the copy
+of the data bundled with the package is used to seed the cache instead. This
+means an offline machine only attempts the download once.
+
+The cache directory is resolved in the following order:
+
+1. A directory set with `set_cache_dir()`
+2. The TS_EMERGENCY_CACHE environment variable
+3. ~/.cache/ts_emergency
+
+LRUCache is a small in-memory cache used to avoid reloading the same data
+repeatedly within a process.
+'''
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import urllib.error
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+CACHE_ENV_VAR = 'TS_EMERGENCY_CACHE'
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'ts_emergency'
+BUNDLED_DATA_DIR = Path(__file__).parent / 'data'
+INDEX_FILE = 'index.json'
+DOWNLOAD_TIMEOUT = 10
+
+# sub directory of the cache directory used to store binary snapshots.
+# Snapshot names start with a SNAPSHOT_KEY_LENGTH character key of the
+# source file.
+SNAPSHOT_DIR = 'snapshots'
+SNAPSHOT_KEY_LENGTH = 16
+
+# directory set by the user at runtime.  None means not set.
+_cache_dir = None
+
+# files written to the cache get the usual permissions (0o666 less the
+# umask).  The umask can only be read by setting it, so it is read once.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    '''
+    Thread safe least recently used cache.  Reports statistics in the same
+    way as `functools.lru_cache`.
+    '''
+    def __init__(self, maxsize=16):
+        '''
+        Params:
+        -------
+        maxsize: int
+            The maximum number of items to store.
+        '''
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self):
+        return f'LRUCache(maxsize={self.maxsize})'
+
+    def get(self, key):
+        '''
+        Return the item stored against `key` or None if not cached.
+        '''
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        '''
+        Store `value` against `key`.  Evicts the least recently used item
+        if the cache is full.
+        '''
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def cache_info(self):
+        '''
+        Return hits, misses, maxsize and currsize as a namedtuple
+        '''
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize,
+                             len(self._items))
+
+    def cache_clear(self):
+        '''
+        Remove all items and reset the statistics
+        '''
+        with self._lock:
+            self._items.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+def get_cache_dir():
+    '''
+    Return the directory used to cache downloaded datasets.
+
+    Returns:
+    -------
+    pathlib.Path
+    '''
+    if _cache_dir is not None:
+        return _cache_dir
+
+    return Path(os.environ.get(CACHE_ENV_VAR, DEFAULT_CACHE_DIR))
+
+
+def set_cache_dir(path):
+    '''
+    Set the directory used to cache downloaded datasets.
+
+    Params:
+    ------
+    path: str or pathlib.Path or None
+        Cache directory. If None then revert to the TS_EMERGENCY_CACHE
+        environment variable or the default location.
+    '''
+    global _cache_dir
+    _cache_dir = None if path is None else Path(path)
+
+
+def cached_path(url, bundled_name=None, refresh=False):
+    '''
+    Return a local path to the file at `url`.
+
+    1. If the url is in the cache (and refresh=False) return the cached file.
+    2. Otherwise download the file and store it in the cache.
+    3. If the download fails fall back to the last cached copy, and then to
+    the bundled copy of the file (if `bundled_name` is provided).  The bundled
+    copy is added to the cache so the download is not retried until the 
+    cache is refreshed.  If the cache cannot be written the bundled file is
+    returned directly.
+
+    Params:
+    ------
+    url: str
+        Location of the remote file
+
+    bundled_name: str, optional (default=None)
+        Name of a file in the package data directory to use when the url
+        cannot be downloaded.
+
+    refresh: bool, optional (default=False)
+        Revalidate the cached file with a conditional request and download
+        it again if it has changed.
+
+    Returns:
+    -------
+    pathlib.Path
+    '''
+    cached = lookup(url)
+
+    if cached is not None and not refresh:
+        return cached
+
+    try:
+        return _download(url)
+    except (urllib.error.URLError, OSError):
+        if cached is not None:
+            return cached
+        if bundled_name is None:
+            raise
+
+    bundled = BUNDLED_DATA_DIR / bundled_name
+    try:
+        return store(url, bundled.read_bytes())
+    except OSError:
+        # the cache directory cannot be written e.g. a read-only home
+        # directory.  Use the bundled file in place.
+        return bundled
+
+
+def clear_cache(urls=None):
+    '''
+    Remove files from the cache.
+
+    Binary snapshots built from content that is no longer referenced are
+    removed as well.  Snapshots of files outside the cache (e.g. the bundled
+    data) are always removed and are rebuilt on next use.
+
+    Params:
+    ------
+    urls: list, optional (default=None)
+        Urls to remove from the cache. If None the whole cache is cleared.
+    '''
+    index = _read_index()
+
+    if urls is None:
+        urls = list(index)
+
+    for url in urls:
+        index.pop(url, None)
+
+    _write_index(index)
+
+    # remove any content no longer referenced by the index.
+    referenced = {entry['digest'] for entry in index.values()}
+    for path in get_cache_dir().glob('*.csv'):
+        if path.stem not in referenced:
+            path.unlink(missing_ok=True)
+
+    # and any snapshot not built from referenced content
+    keys = {digest[:SNAPSHOT_KEY_LENGTH] for digest in referenced}
+    snapshot_dir = get_cache_dir() / SNAPSHOT_DIR
+    if snapshot_dir.is_dir():
+        for path in snapshot_dir.iterdir():
+            if path.name[:SNAPSHOT_KEY_LENGTH] not in keys:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def snapshot_path(file_path, name):
+    '''
+    Return the path of a binary snapshot built from `file_path`.
+
+    Snapshots of cached files are keyed on the content digest of the file
+    so `clear_cache` can remove them once the content is no longer
+    referenced.  Other files (e.g. the bundled data) are keyed on their
+    path, size and modification time.
+
+    Params:
+    ------
+    file_path: pathlib.Path
+        Local source file
+
+    name: str
+        Name of the snapshot e.g. the transform used to build it
+
+    Returns:
+    -------
+    pathlib.Path
+    '''
+    file_path = Path(file_path)
+    if file_path.parent.resolve() == get_cache_dir().resolve():
+        key = file_path.stem
+    else:
+        stat = file_path.stat()
+        source = f'{file_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+        key = hashlib.sha256(source.encode()).hexdigest()
+
+    return get_cache_dir() / SNAPSHOT_DIR \
+        / f'{key[:SNAPSHOT_KEY_LENGTH]}_{name}'
+
+
+def cached_validators(url):
+    '''
+    Return the ETag and Last-Modified headers recorded when `url` was
+    downloaded.  Either may be None.
+
+    Params:
+    ------
+    url: str
+        Location of the remote file
+
+    Returns:
+    -------
+    (str, str)
+    '''
+    entry = _read_index().get(url, {})
+    return entry.get('etag'), entry.get('last_modified')
+
+
+def lookup(url):
+    '''
+    Return the path to the cached copy of `url` or None if not cached.
+
+    Params:
+    ------
+    url: str
+        Location of the remote file
+
+    Returns:
+    -------
+    pathlib.Path or None
+    '''
+    entry = _read_index().get(url)
+    if entry is None:
+        return None
+
+    path = get_cache_dir() / f'{entry["digest"]}.csv'
+    return path if path.exists() else None
+
+
+def store(url, content, etag=None, last_modified=None):
+    '''
+    Store `content` under its sha256 hash and record it against `url`.
+
+    Params:
+    ------
+    url: str
+        Location of the remote file
+
+    content: bytes
+        Content of the file
+
+    etag: str, optional (default=None)
+        ETag header returned with the content
+
+    last_modified: str, optional (default=None)
+        Last-Modified header returned with the content
+
+    Returns:
+    -------
+    pathlib.Path
+        Path to the cached file
+    '''
+    digest = hashlib.sha256(content).hexdigest()
+    cache_dir = get_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    path = cache_dir / f'{digest}.csv'
+    if not path.exists():
+        _atomic_write(path, content)
+
+    index = _read_index()
+    index[url] = {'digest': digest, 'etag': etag, 
+                  'last_modified': last_modified}
+    _write_index(index)
+
+    return path
+
+
+def _download(url):
+    '''
+    Download `url` into the cache and return the path to the cached file.
+
+    The download goes through `ts_emergency.fetch.refresh_cache_async`, so
+    a url that is already cached is revalidated with a conditional request
+    and only downloaded again if it has changed.  When called from a
+    running event loop (e.g. Jupyter) the download runs in a worker thread.
+    '''
+    # imported here as they are only needed when a file is not cached
+    import asyncio
+    import http.client
+
+    from ts_emergency.fetch import refresh_cache_async
+
+    def run():
+        return asyncio.run(refresh_cache_async([url]))[url]
+
+    try:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run()
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(run).result()
+    except http.client.HTTPException as e:
+        # e.g. a malformed response.  Treated like any failed download.
+        raise urllib.error.URLError(e) from e
+
+
+def _read_index():
+    '''
+    Read the url index.  Returns an empty dict if no index.
+    '''
+    try:
+        with open(get_cache_dir() / INDEX_FILE) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_index(index):
+    '''
+    Write the url index.
+    '''
+    cache_dir = get_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    _atomic_write(cache_dir / INDEX_FILE, json.dumps(index, indent=2).encode())
+
+
+def _atomic_write(path, content):
+    '''
+    Write bytes to a temporary file and then move it into place so that
+    concurrent readers never see a partially written file.
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,12 +1,14 @@
 '''
 Functions to load built in datasets for ts_emergency.
-Datasets are downloaded from an external github repo.
+Datasets are downloaded from an external github repo and cached locally.
+If the network is unavailable the copies bundled with the package are used.
 
 The key loading function is load_ed_ts
 '''
 
-import pandas as pd
-import numpy as np
+from ts_emergency.cache import (BUNDLED_DATA_DIR, LRUCache, cached_path,
+                                clear_cache, snapshot_path)
+from ts_emergency.snapshot import load_snapshot, save_snapshot, snapshot_exists
 
 LONG_URL = 'https://raw.githubusercontent.com/health-data-science-OR/' \
             + 'hpdm139-datasets/main/syn_ts_ed_long.csv'
@@ -14,7 +16,35 @@ LONG_URL = 'https://raw.githubusercontent.com/health-data-science-OR/' \
 WIDE_URL = 'https://raw.githubusercontent.com/health-data-science-OR/' \
             + 'hpdm139-datasets/main/syn_ts_ed_wide.csv'
 
-def load_ed_ts(data_format='wide', as_pandas=True):
+# names of the copies of the remote files bundled in the package data dir.
+BUNDLED_FILES = {LONG_URL: 'syn_ts_ed_long.csv',
+                 WIDE_URL: 'syn_ts_ed_wide.csv'}
+
+VALID_SOURCES = ['remote', 'bundled']
+VALID_ENGINES = ['csv', 'binary']
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# dtypes of the long format columns when streamed.
+LONG_DTYPES = {'hosp': 'int8', 'attends': 'int16'}
+
+# integer columns are parsed as PARSE_DTYPE and then converted to the
+# narrowest of INT_DTYPES that holds the data
+PARSE_DTYPE = 'int32'
+INT_DTYPES = ['int8', 'int16', 'int32', 'int64']
+
+VALID_STREAM_BY = ['hosp', 'date']
+
+# default maximum number of rows buffered by iter_ed_ts while it collects
+# groups
+STREAM_MAX_ROWS = 1_000_000
+
+# frames already loaded in this process keyed on 
+# (format, as_pandas, source, compact, engine)
+_loaded = LRUCache(maxsize=16)
+
+def load_ed_ts(data_format='wide', as_pandas=True, source='remote', 
+               refresh=False, engine='csv', compact=False):
     '''
     Load the built-in ED dataset
     
@@ -27,6 +57,34 @@ def load_ed_ts(data_format='wide', as_pandas=True):
         
     as_pandas: bool, optional (default = True)
         Return as `pandas.Dataframe`.  If False then `numpy.ndarray`
+
+    source: str, optional (default='remote')
+        'remote' loads the data from github via the local cache (falling back
+        to the bundled data when offline). 'bundled' uses the copy of the data
+        shipped with the package and never touches the network.
+
+    refresh: bool, optional (default=False)
+        Download a fresh copy of the remote data even if it is cached.
+
+    engine: str, optional (default='csv')
+        'csv' parses and transforms the csv file on every call. 'binary' 
+        saves the transformed frame as a binary snapshot on first use and 
+        memory-maps it on later calls.  Snapshots are keyed on the source
+        file so they are rebuilt automatically when the data are refreshed.
+
+    compact: bool, optional (default=False)
+        Long format only. Return the compact long format produced by 
+        `compact_long` (categorical hosp and integer day offsets). Requires
+        `as_pandas=True`.
+
+    Notes:
+    ------
+    Loaded data are memoized for the lifetime of the process.  Calls return
+    a frame or array that shares the memoized data without copying it.
+    With pandas copy-on-write enabled the frame can be modified as normal.
+    Otherwise its values are read-only: call `.copy()` before modifying it
+    in place.  Use `load_ed_ts.cache_info()` and `load_ed_ts.cache_clear()`
+    to inspect and clear the memoized data.
         
     Returns:
     -------
@@ -34,98 +92,837 @@ def load_ed_ts(data_format='wide', as_pandas=True):
     
     '''
     valid_formats = ['wide', 'w', 'long', 'l']
+    data_format = data_format.lower()
     
-    if data_format.lower() not in valid_formats:
-        raise ArgumentError(f'data format should be one of {valid_formats}')
+    if data_format not in valid_formats:
+        raise ValueError(f'data format should be one of {valid_formats}')
+
+    if source not in VALID_SOURCES:
+        raise ValueError(f'source should be one of {VALID_SOURCES}')
+
+    if engine not in VALID_ENGINES:
+        raise ValueError(f'engine should be one of {VALID_ENGINES}')
+
+    if compact and (data_format[0] != 'l' or not as_pandas):
+        raise ValueError('compact is only available for the long format '
+                         + 'with as_pandas=True')
+
+    key = (data_format[0], as_pandas, source, compact, engine)
+    data = None if refresh else _loaded.get(key)
+
+    if data is None:
+        data = _load_ed_ts(data_format, as_pandas, source, refresh, engine,
+                           compact)
+        _loaded.put(key, data)
+
+    if as_pandas:
+        return _shared_frame(data)
+
+    view = data.view()
+    view.flags.writeable = False
+    return view
+
+
+load_ed_ts.cache_info = _loaded.cache_info
+load_ed_ts.cache_clear = _loaded.cache_clear
+
+
+def _shared_frame(df):
+    '''
+    Return a frame that shares the data of `df` but cannot change it.
+
+    Under pandas copy-on-write a shallow copy is enough.  Otherwise the
+    frame is rebuilt from read-only views of the numpy columns, so an in
+    place edit raises instead of changing `df`.  Columns with a pandas
+    extension dtype (e.g. the categorical hosp of the compact format) are
+    small and copied.
+
+    Params:
+    ------
+    df: pandas.DataFrame
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    import numpy as np
+    import pandas as pd
+
+    if pd.options.mode.copy_on_write is True:
+        return df.copy(deep=False)
+
+    def read_only(values):
+        values = values.view()
+        values.flags.writeable = False
+        return values
+
+    if df.dtypes.nunique() == 1 and isinstance(df.dtypes.iloc[0], np.dtype):
+        # a single 2D block e.g. the wide format
+        shared = pd.DataFrame(read_only(df.to_numpy()), index=df.index,
+                              columns=df.columns, copy=False)
+    else:
+        columns = {col: read_only(series.to_numpy())
+                   if isinstance(series.dtype, np.dtype)
+                   else series.array.copy()
+                   for col, series in df.items()}
+        shared = pd.DataFrame(columns, index=df.index, copy=False)
+
+    shared.attrs = dict(df.attrs)
+    return shared
+
 
+def _load_ed_ts(data_format, as_pandas, source, refresh, engine, compact):
+    '''
+    Load the ED dataset without memoization. See `load_ed_ts`
+    '''
     if data_format == 'wide' or data_format == 'w':
-        df = _ed_data_to_wide(LONG_URL)
+        file_path, transform = _native_or_converted(WIDE_URL, _read_wide,
+                                                    LONG_URL, _ed_data_to_wide,
+                                                    source, refresh)
+    else:
+        file_path, transform = _native_or_converted(LONG_URL, _read_long,
+                                                    WIDE_URL, _ed_data_to_long,
+                                                    source, refresh)
+
+    if engine == 'binary':
+        df = _load_via_snapshot(file_path, transform)
     else:
-        df = _ed_data_to_long(WIDE_URL)
+        df = transform(file_path)
+
+    if compact:
+        df = compact_long(df)
     
     if as_pandas:
         return df
     else:
         return df.to_numpy()
-        
-        
- 
-def _ed_data_to_wide(file_path):
+
+
+def refresh_ed_cache():
     '''
-    Return the ED data in wide format.
-    
-    1. Pivot table
-    2. Transpose and drop the ('attends', hosp_i) multi-index
-    3. Rename columns [0, 1, 2, 4] tp ['hosp_1', 'hosp_2', 'hosp_3', 'hosp_4']
-    4. Index to DateTimeIndex
-    5. Drop the additional uneeded series 'date' (as stored in index as well)
-    6. Convert attendence numbers from int64 to int16
+    Download fresh copies of the ED datasets into the local cache.  Files 
+    are downloaded concurrently and only if they have changed.
+
+    Returns:
+    -------
+    dict
+        Mapping of url to the path of the cached file.
+    '''
+    from ts_emergency.fetch import prefetch
+
+    load_ed_ts.cache_clear()
+    return prefetch(list(BUNDLED_FILES)).result()
+
+
+def prefetch_ed_data():
+    '''
+    Start refreshing the ED datasets in the local cache in the background
+    and return immediately.  Call `.result()` on the returned future, or 
+    `load_ed_ts()`, once other startup work is complete.
+
+    Returns:
+    -------
+    concurrent.futures.Future
+        Resolves to a dict mapping url to the path of the cached file.
+    '''
+    from ts_emergency.fetch import prefetch
+
+    future = prefetch(list(BUNDLED_FILES))
+    future.add_done_callback(lambda _: load_ed_ts.cache_clear())
+    return future
+
+
+def clear_ed_cache():
+    '''
+    Remove the ED datasets from the local cache and memory.
+    '''
+    load_ed_ts.cache_clear()
+    clear_cache(list(BUNDLED_FILES))
+
+
+def iter_ed_ts(file_path=None, by='hosp', freq='M', chunksize=100_000,
+               dtype=None, source='remote', max_rows=STREAM_MAX_ROWS):
+    '''
+    Stream ED data in long format (date, hosp, attends) one group at a time.
+
+    by='hosp' yields the data for each hospital.  by='date' yields the data
+    for each date window of `freq`.  The file does not need to be sorted.
+
+    The file is read in chunks.  A first pass reads only the key column to
+    find the size of each group and the chunks holding its first and last
+    rows.  Later passes collect the rows of each group and yield the group
+    as soon as its last row has been read.
+
+    Memory is bounded by `max_rows` (plus one chunk).  If the file is
+    sorted by the key (e.g. syn_ts_ed_long.csv by hosp) groups complete one
+    after another and a single pass is enough.  Otherwise groups are held
+    until they are complete, so the groups are split into batches whose
+    buffered rows fit in `max_rows` and the file is read once per batch
+    (e.g. by='date' on syn_ts_ed_long.csv, where no window is complete
+    until the final hospital's rows).  A single group larger than
+    `max_rows` is read in a pass of its own.  Groups are yielded in order
+    of completion and then order of first appearance.
+
+    Params:
+    ------
+    file_path: str, optional (default=None)
+        Path to a long format file.  If None the built-in dataset is used.
+
+    by: str, optional (default='hosp')
+        'hosp' or 'date'
+
+    freq: str, optional (default='M')
+        A pandas period frequency e.g. 'D', 'W', 'M', 'Y' used to create the
+        date windows when by='date'.
+
+    chunksize: int, optional (default=100_000)
+        Number of rows read from the file at a time.
+
+    dtype: dict, optional (default=None)
+        dtypes of the hosp and attends columns.  Defaults to int8 and int16.
+        Use a larger type for 'hosp' if there are more than 127 hospitals.
+
+    source: str, optional (default='remote')
+        Source of the built-in dataset if `file_path` is None.  See 
+        `load_ed_ts`.
+
+    max_rows: int, optional (default=STREAM_MAX_ROWS)
+        Maximum number of rows buffered while groups are collected.  More
+        passes over the file are made if needed to stay within it.
+
+    Returns:
+    -------
+    generator of (key, pandas.DataFrame)
+        key is the hospital id or a pandas.Period
+    '''
+    import pandas as pd
+
+    if by not in VALID_STREAM_BY:
+        raise ValueError(f'by should be one of {VALID_STREAM_BY}')
+
+    if file_path is None:
+        file_path = _local_path(LONG_URL, source, refresh=False)
+
+    if dtype is None:
+        dtype = LONG_DTYPES
+
+    def read(usecols=None, dtype=None):
+        parse_dates = ['date'] if usecols is None or 'date' in usecols else []
+        return pd.read_csv(file_path, usecols=usecols, dtype=dtype,
+                           parse_dates=parse_dates, date_format=DATE_FORMAT,
+                           chunksize=chunksize)
+
+    if by == 'hosp':
+        key_func = lambda df: df['hosp'].to_numpy()
+        to_key = int
+    else:
+        # integer period ordinals are much faster to compare than Periods
+        key_func = lambda df: df['date'].dt.to_period(freq).array.asi8
+        to_key = lambda ordinal: pd.Period(ordinal=ordinal, freq=freq)
+
+    import numpy as np
+
+    if max_rows < 1:
+        raise ValueError('max_rows must be at least 1.')
+
+    groups = _scan_groups(read(usecols=[by]), key_func)
+    last_chunks = {key: group[1] for key, group in groups.items()}
+    batches = _plan_batches(groups, max_rows)
+
+    for batch in batches:
+        reader = read(dtype=dtype)
+        if len(batches) > 1:
+            batch_keys = np.array(batch)
+            reader = (chunk[np.isin(key_func(chunk), batch_keys)]
+                      for chunk in reader)
+
+        for key, df in _stream_groups(reader, key_func, last_chunks):
+            yield to_key(key), df
+
+
+def load_ed_ts_many(paths, data_format='wide', workers=None,
+                    use_processes=False):
+    '''
+    Load and combine several ED files in long format (date, hosp, attends),
+    for example one extract per trust.
+
+    Files are parsed concurrently.  Each file is read into numpy arrays
+    and the arrays for each column are then concatenated once, directly into
+    the narrowest integer type that holds the combined data.  No intermediate
+    DataFrames are concatenated.
+
+    Params:
+    ------
+    paths: list
+        Paths to long format csv files
+
+    data_format: str, optional (default='wide')
+        'wide' or 'long' format of the combined data.  See `load_ed_ts`.
+
+    workers: int, optional (default=None)
+        Maximum number of files parsed at once. None uses the executor
+        default.
+
+    use_processes: bool, optional (default=False)
+        Parse in a process pool rather than a thread pool.  The pandas csv
+        parser releases the GIL for much of its work so threads are normally
+        sufficient and avoid copying the parsed arrays between processes.
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    import numpy as np
+    import pandas as pd
+
+    valid_formats = ['wide', 'w', 'long', 'l']
+    data_format = data_format.lower()
+
+    if data_format not in valid_formats:
+        raise ValueError(f'data format should be one of {valid_formats}')
+
+    paths = list(paths)
+    if not paths:
+        raise ValueError('paths is empty.')
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        parsed = list(pool.map(_parse_long_file, paths))
+
+    columns = {}
+    for col in ['date', 'hosp', 'attends']:
+        arrays = [file_data[col] for file_data in parsed]
+        dtype = arrays[0].dtype
+        if col != 'date':
+            low = min(arr.min(initial=0) for arr in arrays)
+            high = max(arr.max(initial=0) for arr in arrays)
+            dtype = narrowest_int_dtype([low, high])
+        columns[col] = np.concatenate(arrays, dtype=dtype, casting='same_kind')
+
+    long_df = pd.DataFrame(columns, copy=False)
+
+    if data_format == 'wide' or data_format == 'w':
+        return long_to_wide(long_df)
+
+    return long_df
+
+
+def _parse_long_file(file_path):
+    '''
+    Parse a long format file into a dict of numpy arrays.  Module level so
+    that it can be used by a process pool.
+    '''
+    import pandas as pd
+
+    df = pd.read_csv(file_path, parse_dates=['date'], date_format=DATE_FORMAT,
+                     dtype={'hosp': PARSE_DTYPE, 'attends': PARSE_DTYPE})
+    return {col: df[col].to_numpy() for col in ['date', 'hosp', 'attends']}
+
+
+def _scan_groups(reader, key_func):
+    '''
+    Find the chunks of a reader that hold the first and last row of each
+    key and the number of rows of each key.
+
+    Params:
+    ------
+    reader: iterable
+        Iterable of pandas.DataFrame chunks
+
+    key_func: callable
+        Function returning an array of the group key for each row of a chunk
+
+    Returns:
+    -------
+    dict
+        key -> [first chunk, last chunk, n_rows].  Insertion order is
+        first appearance.
+    '''
+    import numpy as np
+
+    groups = {}
+    for i, chunk in enumerate(reader):
+        keys, counts = np.unique(key_func(chunk), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            group = groups.setdefault(key, [i, i, 0])
+            group[1] = i
+            group[2] += count
+    return groups
+
+
+def _plan_batches(groups, max_rows):
+    '''
+    Split the keys into batches that can each be collected in one pass over
+    the file without buffering more than `max_rows` rows.
+
+    A key is buffered from its first to its last chunk.  Keys are taken in
+    order of completion and added to the first batch where the buffered
+    rows at every chunk stay within `max_rows`.
+
+    Params:
+    ------
+    groups: dict
+        key -> [first chunk, last chunk, n_rows].  See `_scan_groups`.
+
+    max_rows: int
+        Maximum number of rows buffered
+
+    Returns:
+    -------
+    list of lists
+        keys in each batch
+    '''
+    import numpy as np
+
+    n_chunks = max((group[1] for group in groups.values()), default=-1) + 1
+    batches = []
+    buffered = []
+
+    # stable sort: order of completion then first appearance
+    for key in sorted(groups, key=lambda key: groups[key][1]):
+        first, last, n_rows = groups[key]
+        for batch, rows in zip(batches, buffered):
+            if (rows[first:last + 1] + n_rows <= max_rows).all():
+                break
+        else:
+            batch, rows = [], np.zeros(n_chunks, dtype=np.int64)
+            batches.append(batch)
+            buffered.append(rows)
+
+        batch.append(key)
+        rows[first:last + 1] += n_rows
+
+    return batches
+
+
+def _stream_groups(reader, key_func, last_chunks):
+    '''
+    Group the rows with the same key across the chunks of a reader.  Rows
+    of a key are collected until the chunk holding its last row.
+
+    Params:
+    ------
+    reader: iterable
+        Iterable of pandas.DataFrame chunks.  Must give the same chunks as
+        the reader passed to `_scan_groups`, although rows may be
+        filtered out.
+
+    key_func: callable
+        Function returning an array of the group key for each row of a chunk
+
+    last_chunks: dict
+        key -> number of the chunk holding the last row of the key.  See
+        `_scan_groups`.
+
+    Returns:
+    -------
+    generator of (key, pandas.DataFrame)
+    '''
+    import numpy as np
+    import pandas as pd
+
+    # key -> list of pieces of chunks.  Insertion order is first appearance.
+    pending = {}
+
+    for i, chunk in enumerate(reader):
+        keys = key_func(chunk)
+        if len(keys) == 0:
+            continue
+
+        # a stable sort groups the rows of each key and keeps the file order
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(
+            [[True], sorted_keys[1:] != sorted_keys[:-1]]))
+        ends = np.append(starts[1:], len(keys))
+
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            if rows[-1] - rows[0] == end - start - 1:
+                # the rows are contiguous in the chunk
+                piece = chunk.iloc[rows[0]:rows[-1] + 1]
+            else:
+                piece = chunk.take(rows)
+            pending.setdefault(sorted_keys[start].item(), []).append(piece)
+
+        for key in [key for key in pending if last_chunks[key] == i]:
+            yield key, pd.concat(pending.pop(key), ignore_index=True)
+
+
+def _local_path(url, source, refresh):
+    '''
+    Return a local path to the data at `url`.
     
+    Params:
+    ------
+    url: str
+        LONG_URL or WIDE_URL
+
+    source: str
+        'remote' or 'bundled'
+
+    refresh: bool
+        Force a fresh download of a remote file.
+
+    Returns:
+    -------
+    pathlib.Path
+    '''
+    if source == 'bundled':
+        return BUNDLED_DATA_DIR / BUNDLED_FILES[url]
+
+    return cached_path(url, bundled_name=BUNDLED_FILES[url], refresh=refresh)
+
+
+def _native_or_converted(native_url, native_reader, other_url, converter,
+                         source, refresh):
+    '''
+    Return the local file and function used to load a data format.
+
+    The file in the requested format is used when it is available.  The 
+    other format is only read and converted if the native file cannot be 
+    obtained.
+
+    Params:
+    ------
+    native_url: str
+        url of the file in the requested format
+
+    native_reader: callable
+        function that reads the native file
+
+    other_url: str
+        url of the file in the other format
+
+    converter: callable
+        function that reads and converts the file in the other format
+
+    source: str
+        'remote' or 'bundled'
+
+    refresh: bool
+        Force a fresh download of a remote file.
+
+    Returns:
+    -------
+    (pathlib.Path, callable)
+    '''
+    try:
+        return _local_path(native_url, source, refresh), native_reader
+    except OSError:
+        return _local_path(other_url, source, refresh), converter
+
+
+def _load_via_snapshot(file_path, transform):
+    '''
+    Load the transformed data from a binary snapshot.  The snapshot is
+    created from `file_path` if it does not already exist.  If the snapshot
+    cannot be written the transformed csv data are returned.
+
+    Params:
+    ------
+    file_path: pathlib.Path
+        Local csv file
+
+    transform: callable
+        Function that reads and transforms `file_path`
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    path = snapshot_path(file_path, transform.__name__)
+
+    if not snapshot_exists(path):
+        df = transform(file_path)
+        try:
+            save_snapshot(df, path)
+        except OSError:
+            # the cache directory cannot be written so use the csv engine
+            return df
+
+    return load_snapshot(path)
+
+
+def long_to_wide(long_df):
+    '''
+    Convert ED data from long format (date, hosp, attends) to wide format.
+
+    Works for any number of hospitals.  Rather than a pivot table the
+    dates and hospitals are factorized and the attendances written directly
+    into a 2D array in a single vectorised assignment.
+
+    Params:
+    ------
+    long_df: pandas.DataFrame
+        ED data in long format with one row per date and hospital.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        DatetimeIndex 'date' and one column per hospital named hosp_{id}. 
+        Attendances use the narrowest integer type that holds the data.
+    '''
+    import numpy as np
+    import pandas as pd
+
+    date_codes, dates = pd.factorize(long_df['date'], sort=True)
+    hosp_codes, hosp_ids = pd.factorize(long_df['hosp'], sort=True)
+    attends = long_df['attends'].to_numpy()
+
+    shape = (len(dates), len(hosp_ids))
+    if len(attends) != shape[0] * shape[1]:
+        raise ValueError('long format data must have exactly one row for '
+                         + 'each date and hospital.')
+
+    values = np.empty(shape, dtype=narrowest_int_dtype(attends))
+    values[date_codes, hosp_codes] = attends
+
+    # catch duplicated (date, hosp) rows that leave other cells unwritten
+    counts = np.bincount(date_codes * shape[1] + hosp_codes, 
+                         minlength=values.size)
+    if (counts != 1).any():
+        raise ValueError('long format data must have exactly one row for '
+                         + 'each date and hospital.')
+
+    index = pd.DatetimeIndex(dates, name='date')
+    columns = [f'hosp_{hosp_id}' for hosp_id in hosp_ids]
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def wide_to_long(wide_df):
+    '''
+    Convert ED data from wide format to long format (date, hosp, attends).
+
+    Works for any number of hospitals.  The columns of the long format are
+    built with np.tile, np.repeat and a ravel of the transposed wide values.
+    Rows are ordered by hospital and then date.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame
+        ED data in wide format. Columns named hosp_{id}.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        Columns date, hosp and attends. hosp and attends use the narrowest 
+        integer type that holds the data.
+    '''
+    import numpy as np
+    import pandas as pd
+
+    n_dates, n_hosps = wide_df.shape
+    hosp_ids = wide_df.columns.str.removeprefix('hosp_').astype(np.int64)
+
+    hosp = np.repeat(hosp_ids.to_numpy(), n_dates)
+    attends = wide_df.to_numpy().T.ravel()
+    attends = attends.astype(narrowest_int_dtype(attends), copy=False)
+
+    return pd.DataFrame({'date': np.tile(wide_df.index.to_numpy(), n_hosps),
+                         'hosp': hosp.astype(narrowest_int_dtype(hosp)),
+                         'attends': attends})
+
+
+def compact_long(long_df, drop_zeros=False):
+    '''
+    Return a compact copy of ED data in long format.
+
+    1. hosp is stored as a pandas Categorical (int8 codes for < 128 
+    hospitals)
+    2. date is replaced by 'day': the number of days since the first date
+    stored using the narrowest integer type.  The first date is stored in
+    `df.attrs['base_date']`
+    3. Optionally rows with zero attendances are dropped (a sparse format).
+
+    Use `expand_long` to convert back to the standard long format.
+
+    Params:
+    ------
+    long_df: pandas.DataFrame
+        ED data in long format (date, hosp, attends)
+
+    drop_zeros: bool, optional (default=False)
+        Drop rows where attends is zero.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        Columns day, hosp and attends.
+    '''
+    import pandas as pd
+
+    dates = long_df['date']
+    base_date = dates.min()
+    days = ((dates - base_date) // pd.Timedelta(days=1)).to_numpy()
+
+    compact_df = pd.DataFrame({'day': days.astype(narrowest_int_dtype(days)),
+                               'hosp': pd.Categorical(long_df['hosp']),
+                               'attends': long_df['attends'].to_numpy()})
+
+    if drop_zeros:
+        compact_df = compact_df[compact_df['attends'] != 0]
+        compact_df = compact_df.reset_index(drop=True)
+
+    # needed to rebuild the full (date, hosp) grid from the sparse format
+    compact_df.attrs['base_date'] = base_date
+    compact_df.attrs['n_days'] = int(days.max()) + 1 if len(days) else 0
+    return compact_df
+
+
+def expand_long(compact_df):
+    '''
+    Convert compact or sparse long format data (see `compact_long`) back to 
+    the standard long format.  Any (date, hosp) dropped because attends was
+    zero are restored with zero attendances.
+
+    Params:
+    ------
+    compact_df: pandas.DataFrame
+        Data returned by `compact_long`
+
+    Returns:
+    -------
+    pandas.DataFrame
+        Columns date, hosp and attends ordered by hospital and date.
+    '''
+    import numpy as np
+    import pandas as pd
+
+    n_days = compact_df.attrs['n_days']
+    hosp = compact_df['hosp'].array
+    attends = compact_df['attends'].to_numpy()
+
+    # zero filled (hosp, day) grid with the recorded attendances
+    values = np.zeros((len(hosp.categories), n_days), dtype=attends.dtype)
+    values[hosp.codes, compact_df['day'].to_numpy()] = attends
+
+    dates = pd.date_range(compact_df.attrs['base_date'], periods=n_days, 
+                          freq='D', name='date')
+    columns = [f'hosp_{hosp_id}' for hosp_id in hosp.categories]
+    return wide_to_long(pd.DataFrame(values.T, index=dates, columns=columns))
+
+
+def narrowest_int_dtype(values):
+    '''
+    Return the smallest signed integer dtype that can hold `values`
+
+    Params:
+    ------
+    values: array-like
+        Integer values
+
+    Returns:
+    -------
+    numpy.dtype
+    '''
+    import numpy as np
+
+    values = np.asarray(values)
+    if values.size == 0:
+        return np.dtype(np.int8)
+
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+
+    raise ValueError('values are too large for a 64 bit integer.')
+
+
+def _read_wide(file_path):
+    '''
+    Read the ED data from a wide format file.
+
+    Dates are parsed into a DatetimeIndex and attendances read as int32 
+    while the file is parsed. Attendances are then converted to the 
+    narrowest integer type that holds the data. Any number of hospital 
+    columns is supported.
+
     Params:
     ------
     file_path: str
         Path to wide format file
-        
+
     Returns:
     -------
     pandas.DataFrame
     '''
-    # column name transfers
-    translated_names = {0:'hosp_1', 
-                        1:'hosp_2',
-                        2:'hosp_3',
-                        3:'hosp_4'}
+    import pandas as pd
 
-    data_types = {'hosp_1':np.int16, 
-                  'hosp_2':np.int16,
-                  'hosp_3':np.int16,
-                  'hosp_4':np.int16}
+    hosp_cols = pd.read_csv(file_path, nrows=0).columns.drop('date')
+    data_types = {col: PARSE_DTYPE for col in hosp_cols}
 
-    df = (pd.read_csv(file_path)
-            .pivot_table(values=['attends'], index=['date'], columns=['hosp'])
-            .T.reset_index(drop=True)
-            .T.rename(columns=translated_names)
-            .assign(date=lambda x: pd.to_datetime(x.index))
-            .set_index('date')
-            .astype(data_types)
-         )
+    df = pd.read_csv(file_path, index_col='date', parse_dates=['date'],
+                     date_format=DATE_FORMAT, dtype=data_types)
 
-    return df
+    return df.astype(narrowest_int_dtype(df.to_numpy()))
 
 
+def _read_long(file_path):
+    '''
+    Read the ED data from a long format file.
 
-def _ed_data_to_long(file_path):
+    Dates are parsed and hosp/attends read as int32 while the file is
+    parsed. hosp and attends are then converted to the narrowest integer
+    type that holds the data. No transformation is needed.
+
+    Params:
+    ------
+    file_path: str
+        Path to long format file
+
+    Returns:
+    -------
+    pandas.DataFrame
     '''
-    Return the ED data in long format. Uses pd.wide_to_long()
-    Assume wide format file is used.
+    import pandas as pd
+
+    df = pd.read_csv(file_path, parse_dates=['date'], date_format=DATE_FORMAT,
+                     dtype={'hosp': PARSE_DTYPE, 'attends': PARSE_DTYPE})
+
+    return df.astype({col: narrowest_int_dtype(df[col]) 
+                      for col in ['hosp', 'attends']})
+
+
+def _ed_data_to_wide(file_path):
+    '''
+    Return the ED data in wide format.  Used when the wide format file is
+    not available.
     
-    1. pd.wide_to_long()
-    2. reset_index() to remove multi-index
-    3. rename col 'hosp_'  to 'attends'
-    4. date to datetime
-    5. Convert attendence numbers from int64 to int16 amd hosp_id to int8.
-    (could also be a categorical field.)
+    1. Read the long format file
+    2. Convert to wide format using `long_to_wide`
     
     Params:
     ------
     file_path: str
-        Path to wide format file
+        Path to long format file
         
     Returns:
     -------
     pandas.DataFrame
     '''
+    return long_to_wide(_read_long(file_path))
 
-    translated_names = {'hosp_':'attends'}
-    data_types = {'hosp': np.int8, 'attends':np.int16}
 
-    long_df = ( 
-                pd.wide_to_long(pd.read_csv(file_path), stubnames='hosp_', 
-                                i=['date'], j='hosp')
-                .reset_index()
-                .rename(columns=translated_names)
-                .assign(date=lambda x: pd.to_datetime(x['date']))
-                .astype(data_types)
-                )
-
-    return long_df
+def _ed_data_to_long(file_path):
+    '''
+    Return the ED data in long format. Used when the long format file is not
+    available.
+    
+    1. Read the wide format file
+    2. Convert to long format using `wide_to_long`
+    
+    Params:
+    ------
+    file_path: str
+        Path to wide format file
+        
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    return wide_to_long(_read_wide(file_path))
@@ -0,0 +1,337 @@
+'''
+Asynchronous download of the ts_emergency datasets.
+
+Files are downloaded concurrently with asyncio.  HTTP connections are kept
+alive and reused through a small connection pool and conditional requests
+(If-None-Match / If-Modified-Since) are made for files that are already in
+the local cache, so unchanged files are not downloaded again.
+
+`prefetch` starts the downloads in a background thread and returns
+immediately so that loading can overlap with other startup work.
+
+Only the standard library is used.  Blocking `http.client` requests are run
+in a thread pool and awaited from the event loop.
+'''
+
+import asyncio
+import http.client
+import threading
+import urllib.error
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ts_emergency.cache import (DOWNLOAD_TIMEOUT, cached_validators, lookup,
+                                store)
+
+DEFAULT_MAX_CONNECTIONS = 4
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+FetchResult = namedtuple('FetchResult', ['url', 'status', 'content', 'etag',
+                                         'last_modified'])
+
+
+class ConnectionPool:
+    '''
+    Pool of persistent HTTP(S) connections.  At most `maxsize` idle
+    connections are kept for each host.
+    '''
+    def __init__(self, maxsize=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DOWNLOAD_TIMEOUT):
+        '''
+        Params:
+        -------
+        maxsize: int, optional (default=DEFAULT_MAX_CONNECTIONS)
+            Maximum number of idle connections kept per host
+
+        timeout: float, optional (default=DOWNLOAD_TIMEOUT)
+            Socket timeout in seconds
+        '''
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'ConnectionPool(maxsize={self.maxsize}, ' \
+                + f'timeout={self.timeout})'
+
+    def request(self, url, headers=None):
+        '''
+        Make a blocking GET request reusing an idle connection if possible.
+
+        Params:
+        ------
+        url: str
+            http or https url
+
+        headers: dict, optional (default=None)
+            Request headers
+
+        Returns:
+        -------
+        (int, http.client.HTTPMessage, bytes)
+            status, response headers and body
+        '''
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += f'?{parts.query}'
+
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                response = self._get(conn, path, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                # the server closed an idle connection. retry once.
+                if not reused:
+                    raise
+                conn.close()
+                conn = self._connect(key)
+                response = self._get(conn, path, headers)
+            body = response.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        return response.status, response.headers, body
+
+    def close(self):
+        '''
+        Close all idle connections
+        '''
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _get(self, conn, path, headers):
+        conn.request('GET', path, headers=headers or {})
+        return conn.getresponse()
+
+    def _acquire(self, key):
+        '''
+        Return an idle connection for `key` (and True) or a new connection
+        (and False).
+        '''
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+
+        return self._connect(key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.maxsize:
+                conns.append(conn)
+                return
+
+        conn.close()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port,
+                                               timeout=self.timeout)
+        elif scheme == 'http':
+            return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        raise ValueError(f'unsupported url scheme {scheme}')
+
+
+class AsyncFetcher:
+    '''
+    Download files concurrently from an asyncio event loop using a
+    `ConnectionPool`.
+
+    Use as an async context manager so that connections are closed:
+
+        async with AsyncFetcher() as fetcher:
+            results = await fetcher.fetch_all(urls)
+    '''
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DOWNLOAD_TIMEOUT):
+        '''
+        Params:
+        -------
+        max_connections: int, optional (default=DEFAULT_MAX_CONNECTIONS)
+            Maximum number of concurrent requests and idle connections per
+            host
+
+        timeout: float, optional (default=DOWNLOAD_TIMEOUT)
+            Socket timeout in seconds
+        '''
+        self.max_connections = max_connections
+        self.pool = ConnectionPool(max_connections, timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections)
+
+    def __repr__(self):
+        return f'AsyncFetcher(max_connections={self.max_connections})'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''
+        Close the connection pool and worker threads
+        '''
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    async def fetch(self, url, etag=None, last_modified=None):
+        '''
+        Download `url`.  If `etag` or `last_modified` are given a
+        conditional request is made and an unchanged file returns status
+        304 with no content.
+
+        Redirects are followed (up to MAX_REDIRECTS).  Any final status
+        other than 200 or 304 raises `urllib.error.HTTPError` so that only
+        the content of the file is ever stored in the cache.
+
+        Params:
+        ------
+        url: str
+            http or https url
+
+        etag: str, optional (default=None)
+            ETag of the cached copy
+
+        last_modified: str, optional (default=None)
+            Last-Modified header of the cached copy
+
+        Returns:
+        -------
+        FetchResult
+        '''
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+
+        loop = asyncio.get_running_loop()
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = await loop.run_in_executor(
+                self._executor, self.pool.request, location, headers)
+            if status not in REDIRECT_STATUSES \
+                    or 'Location' not in response_headers:
+                break
+            location = urllib.parse.urljoin(location,
+                                            response_headers['Location'])
+        else:
+            raise urllib.error.HTTPError(url, status, 'too many redirects',
+                                         response_headers, None)
+
+        if status == 304:
+            return FetchResult(url, status, None, etag, last_modified)
+
+        if status != 200:
+            raise urllib.error.HTTPError(url, status, 'download failed',
+                                         response_headers, None)
+
+        return FetchResult(url, status, body, response_headers.get('ETag'),
+                           response_headers.get('Last-Modified'))
+
+    async def fetch_all(self, urls, conditional=True):
+        '''
+        Download `urls` concurrently.
+
+        Params:
+        ------
+        urls: list
+            urls to download
+
+        conditional: bool, optional (default=True)
+            Make conditional requests using the validators stored in the
+            local cache.
+
+        Returns:
+        -------
+        list of FetchResult
+        '''
+        tasks = []
+        for url in urls:
+            validators = cached_validators(url) if conditional else ()
+            tasks.append(self.fetch(url, *validators))
+
+        return await asyncio.gather(*tasks)
+
+
+async def refresh_cache_async(urls, fetcher=None):
+    '''
+    Download `urls` concurrently and update the local cache.  Only files
+    that have changed since they were cached are downloaded.
+
+    Params:
+    ------
+    urls: list
+        urls to download
+
+    fetcher: AsyncFetcher, optional (default=None)
+        Fetcher to use.  If None a new fetcher is created and closed.
+
+    Returns:
+    -------
+    dict
+        Mapping of url to the path of the cached file.
+    '''
+    if fetcher is None:
+        async with AsyncFetcher() as fetcher:
+            return await refresh_cache_async(urls, fetcher)
+
+    paths = {}
+    for result in await fetcher.fetch_all(urls):
+        path = lookup(result.url) if result.status == 304 else None
+        if path is None:
+            if result.content is None:
+                # cached file is missing. make an unconditional request.
+                result = await fetcher.fetch(result.url)
+            path = store(result.url, result.content, result.etag,
+                         result.last_modified)
+        paths[result.url] = path
+
+    return paths
+
+
+def prefetch(urls):
+    '''
+    Start refreshing the local cache for `urls` in a background thread.
+    Returns immediately.  Safe to call from code that is already running an
+    event loop (e.g. Jupyter).
+
+    Params:
+    ------
+    urls: list
+        urls to download
+
+    Returns:
+    -------
+    concurrent.futures.Future
+        Resolves to a dict mapping url to the path of the cached file.
+    '''
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(asyncio.run(refresh_cache_async(urls)))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
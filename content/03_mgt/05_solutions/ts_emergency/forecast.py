@@ -0,0 +1,278 @@
+'''
+forecast - baseline forecasts for every hospital at once
+
+Naive, seasonal naive (weekly) and simple exponential smoothing (SES)
+forecasts are fitted to all columns of a wide frame together.  Each method
+works on the 2D (n_obs, n_series) array.  Recursions loop over time but each
+step is vectorised across the hospitals (and for SES across candidate
+smoothing parameters as well), so fitting 1,000 hospitals costs about the
+same as fitting one series at a time with a per-series library.
+
+Prediction intervals assume normal one-step errors with the usual multi-step
+variance of each method (Hyndman & Athanasopoulos, Forecasting: Principles
+and Practice, 3rd ed. sections 5.5 and 8.7).
+'''
+
+from collections import namedtuple
+
+from ts_emergency.arrays import as_2d_float
+
+VALID_METHODS = ['naive', 'snaive', 'ses']
+DEFAULT_HORIZON = 28
+DEFAULT_LEVEL = 0.95
+DEFAULT_PERIOD = 7
+
+# SES alpha is chosen from a coarse grid and then refined with finer grids
+# (of the given half-widths) around the best value of each hospital.
+SES_COARSE_GRID = (0.05, 0.95, 19)
+SES_REFINE_WIDTHS = (0.05, 0.005)
+SES_REFINE_SIZE = 11
+
+Forecast = namedtuple('Forecast', ['method', 'columns', 'index', 'mean',
+                                   'lower', 'upper', 'params'])
+
+
+def forecast(wide_df, method='snaive', horizon=DEFAULT_HORIZON,
+             level=DEFAULT_LEVEL, period=DEFAULT_PERIOD, alpha=None):
+    '''
+    Fit a baseline method to every hospital and forecast `horizon` days
+    ahead with prediction intervals.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    method: str, optional (default='snaive')
+        'naive' (last value), 'snaive' (value from the same day last
+        period) or 'ses' (simple exponential smoothing)
+
+    horizon: int, optional (default=DEFAULT_HORIZON)
+        Number of days to forecast
+
+    level: float, optional (default=DEFAULT_LEVEL)
+        Coverage of the prediction intervals e.g. 0.95
+
+    period: int, optional (default=DEFAULT_PERIOD)
+        Seasonal period of 'snaive' in days
+
+    alpha: float, optional (default=None)
+        SES smoothing parameter.  If None it is fitted for each hospital by
+        minimising the one-step squared error.
+
+    Returns:
+    -------
+    Forecast
+        namedtuple of method, columns, index (forecast dates) and arrays
+        mean, lower and upper of shape (horizon, n_series), and the fitted
+        params (dict of arrays)
+    '''
+    y = as_2d_float(wide_df)
+    _validate(y, method, horizon, level, period)
+    mean, sigma_h, params = fit(y, method, horizon, period, alpha)
+
+    # standard library normal quantile avoids a scipy dependency
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+
+    columns = list(getattr(wide_df, 'columns', range(y.shape[1])))
+    return Forecast(method, columns, _future_index(wide_df, horizon), mean,
+                    mean - z * sigma_h, mean + z * sigma_h, params)
+
+
+def forecast_all(wide_df, methods=VALID_METHODS, **kwargs):
+    '''
+    Forecast every hospital with several methods.  Keyword arguments are
+    passed to `forecast`.
+
+    Returns:
+    -------
+    dict
+        method -> Forecast
+    '''
+    return {method: forecast(wide_df, method, **kwargs) for method in methods}
+
+
+def to_frame(result):
+    '''
+    Return a forecast as a tidy (long format) DataFrame with columns date,
+    hosp, method, mean, lower and upper.
+
+    Params:
+    ------
+    result: Forecast
+        Result of `forecast`
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    import numpy as np
+    import pandas as pd
+
+    horizon, n_series = result.mean.shape
+    return pd.DataFrame({'date': np.tile(result.index, n_series),
+                         'hosp': np.repeat(result.columns, horizon),
+                         'method': result.method,
+                         'mean': result.mean.T.ravel(),
+                         'lower': result.lower.T.ravel(),
+                         'upper': result.upper.T.ravel()})
+
+
+def fit(y, method, horizon, period=DEFAULT_PERIOD, alpha=None):
+    '''
+    Fit `method` to a 2D float array and return the raw forecast arrays.
+
+    This is the array level core of `forecast` for callers that refit many
+    times (e.g. `ts_emergency.backtest`).  Inputs are not validated and no
+    index or intervals are built.
+
+    Params:
+    ------
+    y: numpy.ndarray
+        float64 data of shape (n_obs, n_series) e.g. from `as_2d_float`
+
+    method: str
+        One of VALID_METHODS
+
+    horizon: int
+        Number of steps to forecast
+
+    period: int, optional (default=DEFAULT_PERIOD)
+        Seasonal period of 'snaive'
+
+    alpha: float, optional (default=None)
+        SES smoothing parameter.  If None it is fitted for each series.
+
+    Returns:
+    -------
+    (numpy.ndarray, numpy.ndarray, dict)
+        point forecasts and forecast standard deviations, both
+        (horizon, n_series), and the fitted params
+    '''
+    import numpy as np
+
+    steps = np.arange(1, horizon + 1)[:, None]
+
+    if method == 'naive':
+        sigma = _rms(y[1:] - y[:-1])
+        mean = np.repeat(y[-1:], horizon, axis=0)
+        return mean, sigma * np.sqrt(steps), {'sigma': sigma}
+
+    if method == 'snaive':
+        sigma = _rms(y[period:] - y[:-period])
+        # the last full period repeated
+        mean = y[-period:][np.arange(horizon) % period]
+        n_periods = (steps - 1) // period + 1
+        return mean, sigma * np.sqrt(n_periods), {'sigma': sigma}
+
+    if alpha is None:
+        alpha = _fit_ses_alpha(y)
+    else:
+        alpha = np.full(y.shape[1], float(alpha))
+
+    level, sse = _ses_filter(y, alpha[None, :])
+    sigma = np.sqrt(sse[0] / (len(y) - 1))
+    mean = np.repeat(level, horizon, axis=0)
+    sigma_h = sigma * np.sqrt(1 + alpha ** 2 * (steps - 1))
+    return mean, sigma_h, {'alpha': alpha, 'sigma': sigma}
+
+
+def _ses_filter(y, alphas):
+    '''
+    Run simple exponential smoothing for several smoothing parameters at
+    once.  The initial level is the first observation.
+
+    Params:
+    ------
+    y: numpy.ndarray
+        data, shape (n_obs, n_series)
+
+    alphas: numpy.ndarray
+        smoothing parameters, shape (n_alphas, n_series)
+
+    Returns:
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        final level and sum of squared one-step errors, both
+        (n_alphas, n_series)
+    '''
+    import numpy as np
+
+    level = np.repeat(y[:1], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(1, len(y)):
+        error = y[t] - level
+        sse += error * error
+        level += alphas * error
+
+    return level, sse
+
+
+def _fit_ses_alpha(y):
+    '''
+    Smoothing parameter of each series minimising the one-step squared
+    error.  A coarse grid is refined around the best value of each series.
+    All series and candidate values are filtered together.
+    '''
+    import numpy as np
+
+    n_series = y.shape[1]
+    cols = np.arange(n_series)
+
+    grid = np.repeat(np.linspace(*SES_COARSE_GRID)[:, None], n_series, axis=1)
+    for width in SES_REFINE_WIDTHS + (None,):
+        _, sse = _ses_filter(y, grid)
+        best = grid[sse.argmin(axis=0), cols]
+        if width is None:
+            return best
+
+        offsets = np.linspace(-width, width, SES_REFINE_SIZE)
+        grid = np.clip(best + offsets[:, None], 1e-3, 1)
+
+
+def _rms(residuals):
+    '''
+    Root mean squared residual of each column
+    '''
+    import numpy as np
+
+    return np.sqrt(np.mean(residuals ** 2, axis=0))
+
+
+def _validate(y, method, horizon, level, period):
+    import numpy as np
+
+    if method not in VALID_METHODS:
+        raise ValueError(f'method should be one of {VALID_METHODS}')
+
+    if horizon < 1:
+        raise ValueError('horizon must be at least 1 day.')
+
+    if not 0 < level < 1:
+        raise ValueError('level must be between 0 and 1.')
+
+    min_obs = period + 1 if method == 'snaive' else 2
+    if len(y) < min_obs:
+        raise ValueError(f'{method} needs at least {min_obs} observations.')
+
+    if np.isnan(y).any():
+        raise ValueError('wide_df must not contain missing values.')
+
+
+def _future_index(wide_df, horizon):
+    '''
+    Dates following the last date of `wide_df`.  A RangeIndex continuing
+    the positions if `wide_df` has no DatetimeIndex.
+    '''
+    import pandas as pd
+
+    index = getattr(wide_df, 'index', None)
+    if not isinstance(index, pd.DatetimeIndex) or len(index) == 0:
+        n_obs = len(wide_df)
+        return pd.RangeIndex(n_obs, n_obs + horizon)
+
+    freq = index.freq
+    if freq is None and len(index) > 2:
+        freq = pd.infer_freq(index)
+    return pd.date_range(index[-1], periods=horizon + 1, freq=freq or 'D')[1:]
@@ -0,0 +1,10 @@
+import importlib
+
+# submodules are imported on first access e.g. ts_emergency.plotting.tsa
+_SUBMODULES = ['batch', 'dashboard', 'downsample', 'panels', 'tsa', 'view']
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,278 @@
+'''
+batch - headless rendering of diagnostic plots for many hospitals
+
+`render_diagnostics` saves the `diagnostic_plot` layout (detrended series,
+ACF and PACF) for every hospital to image files.  Rendering is built for
+nightly batch jobs rather than notebooks:
+
+* figures are created with the Agg canvas directly and are never registered
+  with pyplot, so they do not depend on the interactive backend and are
+  freed as soon as they are closed.
+* one `DiagnosticFigure` is created per worker and reused for every
+  hospital.  Line data, correlogram stems and confidence bands are updated
+  in place instead of building a new figure, gridspec and axes.
+* the ACF and PACF of all hospitals are computed in one vectorised pass
+  with `ts_emergency.analysis.acf_pacf`.
+* hospitals can optionally be split across a process pool.
+'''
+
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from ts_emergency.analysis import DEFAULT_MAXLAGS, acf_pacf
+from ts_emergency.plotting.tsa import plot_correlogram
+from ts_emergency.plotting.view import plot_single_ed
+
+DEFAULT_DIAGNOSTIC_FIGSIZE = (9, 6)
+DEFAULT_DPI = 100
+
+RenderReport = namedtuple('RenderReport', ['paths', 'n_figures', 'seconds',
+                                           'figures_per_second'])
+
+
+class DiagnosticFigure:
+    '''
+    A reusable headless figure with the layout of `diagnostic_plot`.
+
+    The artists are created once.  `update` replaces their data for a new
+    hospital and `save` renders the figure to file.  Use as a context
+    manager (or call `close`) so the figure is released deterministically:
+
+        with DiagnosticFigure(wide_df.index) as fig:
+            fig.update('hosp_1', detrended, acf, acf_ci, pacf, pacf_ci)
+            fig.save('hosp_1.png')
+    '''
+    def __init__(self, dates, maxlags=DEFAULT_MAXLAGS,
+                 figsize=DEFAULT_DIAGNOSTIC_FIGSIZE, dpi=DEFAULT_DPI,
+                 include_zero=False):
+        '''
+        Params:
+        -------
+        dates: pandas.DatetimeIndex
+            Dates of the ED time series.  Shared by all hospitals.
+
+        maxlags: int, optional (default=DEFAULT_MAXLAGS)
+            The number of lags in the ACF and PACF
+
+        figsize: (int, int), optional (default=DEFAULT_DIAGNOSTIC_FIGSIZE)
+            size of figure
+
+        dpi: int, optional (default=DEFAULT_DPI)
+            Resolution of the saved figure
+
+        include_zero: bool, optional (default=False)
+            Include ACF and PACF of observation with itself in plot (=1.0)
+        '''
+        import numpy as np
+        import pandas as pd
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.maxlags = maxlags
+        self.include_zero = include_zero
+        self._start = 0 if include_zero else 1
+        self._laid_out = False
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+
+        gs = self.figure.add_gridspec(3, 2)
+        ax1 = self.figure.add_subplot(gs[0, :])
+        ax2 = self.figure.add_subplot(gs[1:, 0])
+        ax3 = self.figure.add_subplot(gs[1:, 1])
+        self.axes = np.array([ax1, ax2, ax3])
+
+        # draw placeholder data once with the standard plotting functions
+        # and keep handles to the artists that change between hospitals.
+        placeholder = pd.DataFrame({'': np.zeros(len(dates))}, index=dates)
+        _ = plot_single_ed(placeholder, '', ax=ax1)
+        ax1.set_title('Detrended')
+        self._detrended = ax1.lines[0]
+
+        zeros = np.zeros(maxlags + 1)
+        self._acf = self._correlogram(ax2, zeros, 'Autocorrelation')
+        self._pacf = self._correlogram(ax3, zeros, 'Partial Autocorrelation')
+
+    def __repr__(self):
+        return f'DiagnosticFigure(maxlags={self.maxlags}, ' \
+                + f'include_zero={self.include_zero})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, hosp_id, detrended, acf, acf_confint, pacf,
+               pacf_confint):
+        '''
+        Replace the data shown in the figure.
+
+        Params:
+        ------
+        hosp_id: str
+            column name for hospital.  Used as the figure title.
+
+        detrended: array-like
+            Differenced series.  Same length as `dates`.
+
+        acf, acf_confint, pacf, pacf_confint: array-like
+            ACF and PACF values and confidence interval half-widths for lags
+            0 to maxlags.  See `ts_emergency.analysis.acf_pacf`.
+        '''
+        self._detrended.set_ydata(detrended)
+        ax1 = self.axes[0]
+        ax1.relim()
+        ax1.autoscale_view()
+
+        self._update_correlogram(self._acf, acf, acf_confint)
+        self._update_correlogram(self._pacf, pacf, pacf_confint)
+        self.figure.suptitle(hosp_id)
+
+    def save(self, path, **kwargs):
+        '''
+        Render the figure to `path`.  Keyword arguments are passed to
+        `Figure.savefig`.
+        '''
+        if not self._laid_out:
+            # layout is computed once and reused for every hospital
+            self.figure.tight_layout()
+            self._laid_out = True
+
+        self.figure.savefig(path, **kwargs)
+
+    def close(self):
+        '''
+        Remove all artists from the figure and release it
+        '''
+        self.figure.clear()
+        self.axes = None
+
+    def _correlogram(self, ax, values, title):
+        '''
+        Draw a correlogram and return handles to its stems, markers,
+        confidence band and the lags plotted.
+        '''
+        import numpy as np
+
+        _ = plot_correlogram(values, values, ax, self.include_zero, title)
+        # plot_correlogram draws the stems and then the band as collections
+        # and the markers as the last line
+        lags = np.arange(self._start, self.maxlags + 1)
+        return ax.collections[0], ax.lines[-1], ax.collections[-1], lags
+
+    def _update_correlogram(self, handles, values, confint):
+        import numpy as np
+
+        stems, markers, band, lags = handles
+        values = np.asarray(values)[self._start:]
+        confint = np.asarray(confint)[self._start:]
+
+        segments = np.zeros((len(lags), 2, 2))
+        segments[:, :, 0] = lags[:, None]
+        segments[:, 1, 1] = values
+        stems.set_segments(segments)
+        markers.set_ydata(values)
+
+        band.set_verts([np.column_stack([np.concatenate([lags, lags[::-1]]),
+                                         np.concatenate([-confint,
+                                                         confint[::-1]])])])
+
+
+def render_diagnostics(wide_df, out_dir, hosp_ids=None,
+                       maxlags=DEFAULT_MAXLAGS,
+                       figsize=DEFAULT_DIAGNOSTIC_FIGSIZE, dpi=DEFAULT_DPI,
+                       include_zero=False, fmt='png', workers=None):
+    '''
+    Save a diagnostic plot (detrended series, ACF and PACF) for each
+    hospital to `out_dir/{hosp_id}.{fmt}`.
+
+    Params:
+    ------
+    wide_df: pandas.Dataframe
+        ED data in wide format
+
+    out_dir: str or pathlib.Path
+        Directory to save the figures in.  Created if it does not exist.
+
+    hosp_ids: list, optional (default=None)
+        Hospital columns to plot.  All columns if None.
+
+    maxlags: int, optional (default=DEFAULT_MAXLAGS)
+        The number of lags to include in the ACF and PACF
+
+    figsize: (int, int), optional (default=DEFAULT_DIAGNOSTIC_FIGSIZE)
+        size of each figure
+
+    dpi: int, optional (default=DEFAULT_DPI)
+        Resolution of the saved figures
+
+    include_zero: bool, optional (default=False)
+        Include ACF and PACF of observation with itself in plot (=1.0)
+
+    fmt: str, optional (default='png')
+        Image format passed to matplotlib
+
+    workers: int, optional (default=None)
+        Number of processes to render with.  If None or 1 figures are
+        rendered in the calling process.
+
+    Returns:
+    -------
+    RenderReport
+        namedtuple of the saved paths, the number of figures, the elapsed
+        seconds and the throughput in figures per second.
+    '''
+    import numpy as np
+
+    start = time.perf_counter()
+
+    hosp_ids = list(wide_df.columns) if hosp_ids is None else list(hosp_ids)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    selected = wide_df[hosp_ids]
+    correlograms = acf_pacf(selected, maxlags)
+    detrended = selected.diff().to_numpy(dtype=np.float64)
+    options = {'maxlags': maxlags, 'figsize': figsize, 'dpi': dpi,
+               'include_zero': include_zero}
+
+    def job(cols):
+        # arguments for rendering the hospitals at positions `cols`
+        return (wide_df.index, [hosp_ids[i] for i in cols], detrended[:, cols],
+                correlograms.acf[:, cols], correlograms.acf_confint[:, cols],
+                correlograms.pacf[:, cols], correlograms.pacf_confint[:, cols],
+                out_dir, fmt, options)
+
+    if workers is None or workers <= 1 or len(hosp_ids) <= 1:
+        paths = _render_chunk(*job(np.arange(len(hosp_ids))))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = np.array_split(np.arange(len(hosp_ids)), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_render_chunk, *job(cols))
+                       for cols in chunks if len(cols)]
+            paths = [path for future in futures for path in future.result()]
+
+    seconds = time.perf_counter() - start
+    return RenderReport(paths, len(paths), seconds, len(paths) / seconds)
+
+
+def _render_chunk(dates, hosp_ids, detrended, acf, acf_confint, pacf,
+                  pacf_confint, out_dir, fmt, options):
+    '''
+    Render a group of hospitals with a single reused figure.  Runs in the
+    calling process or a worker process.
+    '''
+    paths = []
+    with DiagnosticFigure(dates, **options) as fig:
+        for i, hosp_id in enumerate(hosp_ids):
+            fig.update(hosp_id, detrended[:, i], acf[:, i], acf_confint[:, i],
+                       pacf[:, i], pacf_confint[:, i])
+            path = Path(out_dir) / f'{hosp_id}.{fmt}'
+            fig.save(path, format=fmt)
+            paths.append(path)
+
+    return paths
@@ -0,0 +1,307 @@
+'''
+dashboard - live view of streaming ED attendances
+
+`StreamingDashboard` subscribes to an iterator or async generator of
+(date, hosp, attends) records and shows the most recent days of every
+hospital as `plot_eds` style panels.
+
+Records are collected into days.  When a day is complete (a record for a
+later date arrives) it is written to a `RingBuffer` holding a fixed number
+of days and the panels are updated in place with blitting.  Memory use and
+redraw cost depend only on the window size, not on how long the dashboard
+has been running.
+'''
+
+from ts_emergency.plotting.panels import HEADROOM, EDPanels
+
+DEFAULT_WINDOW = 365
+
+# the window moves forward every update so leave more room after the last
+# date than the default.  A full redraw happens about every 25% of a window.
+X_HEADROOM = 0.25
+
+
+class RingBuffer:
+    '''
+    The most recent `capacity` days of wide format ED data.
+
+    Each day is written twice, at position i and i + capacity of a buffer
+    of twice the capacity.  The window of the latest days is then always a
+    contiguous slice, so `frame` returns a view without copying.
+    '''
+    def __init__(self, columns, capacity=DEFAULT_WINDOW):
+        '''
+        Params:
+        -------
+        columns: list
+            hospital column names
+
+        capacity: int, optional (default=DEFAULT_WINDOW)
+            Number of days held
+        '''
+        import numpy as np
+
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1 day.')
+
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.n_written = 0
+        self._dates = np.empty(2 * capacity, dtype='datetime64[ns]')
+        self._values = np.full((2 * capacity, len(self.columns)), np.nan)
+
+    def __repr__(self):
+        return f'RingBuffer(capacity={self.capacity}, ' \
+                + f'n_written={self.n_written})'
+
+    def __len__(self):
+        return min(self.n_written, self.capacity)
+
+    @property
+    def end_date(self):
+        '''
+        Last date written or None if the buffer is empty
+        '''
+        if self.n_written == 0:
+            return None
+
+        return self._dates[(self.n_written - 1) % self.capacity]
+
+    def append(self, date, values):
+        '''
+        Write a day of data, overwriting the oldest day if the buffer is
+        full.
+
+        Params:
+        ------
+        date: numpy.datetime64
+            Date of the data
+
+        values: array-like
+            Attendances for each hospital.  NaN for missing.
+        '''
+        i = self.n_written % self.capacity
+        self._dates[i] = self._dates[i + self.capacity] = date
+        self._values[i] = self._values[i + self.capacity] = values
+        self.n_written += 1
+
+    def frame(self):
+        '''
+        Read-only wide format view of the days in the buffer, oldest first.
+
+        Returns:
+        -------
+        pandas.DataFrame
+        '''
+        import pandas as pd
+
+        if self.n_written < self.capacity:
+            rows = slice(0, self.n_written)
+        else:
+            start = self.n_written % self.capacity
+            rows = slice(start, start + self.capacity)
+
+        dates = self._dates[rows]
+        values = self._values[rows]
+        values.flags.writeable = False
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='date'),
+                            columns=self.columns, copy=False)
+
+
+class StreamingDashboard:
+    '''
+    Panels of the latest ED attendances that update as records arrive.
+
+        dashboard = StreamingDashboard(history_df, window=90)
+        dashboard.run(records)                # iterator
+        await dashboard.run_async(records)    # async generator
+
+    Records must arrive in date order.  Records for the same date may be in
+    any order.  Hospitals without a record for a day are shown as gaps.
+    '''
+    def __init__(self, wide_df, window=DEFAULT_WINDOW, refresh_every=1,
+                 blit=True, headroom=(X_HEADROOM, HEADROOM), **kwargs):
+        '''
+        Params:
+        -------
+        wide_df: pandas.DataFrame
+            ED data in wide format.  Sets the hospitals shown.  The last
+            `window` days are used as history (pass `wide_df.iloc[:0]` for
+            none).
+
+        window: int, optional (default=DEFAULT_WINDOW)
+            Number of days shown
+
+        refresh_every: int, optional (default=1)
+            Update the panels after this many new days
+
+        blit: bool, optional (default=True)
+            Blit updates.  See `EDPanels`.
+
+        headroom: float or (float, float), optional 
+        (default=(X_HEADROOM, HEADROOM))
+            Room left in the x and y limits for new data.  See `EDPanels`.
+
+        **kwargs:
+            Passed to `EDPanels` e.g. ncols, figsize, downsample
+        '''
+        import numpy as np
+
+        self.buffer = RingBuffer(wide_df.columns, window)
+        self.refresh_every = refresh_every
+
+        history = wide_df.iloc[-window:]
+        for date, values in zip(history.index.to_numpy(), history.to_numpy()):
+            self.buffer.append(date, values)
+
+        ids = wide_df.columns.str.removeprefix('hosp_')
+        self._hosp_pos = {}
+        for i, (column, hosp_id) in enumerate(zip(wide_df.columns, ids)):
+            self._hosp_pos[column] = i
+            if hosp_id.isdigit():
+                self._hosp_pos[int(hosp_id)] = i
+
+        self._pending_date = None
+        self._pending = np.full(len(self.buffer.columns), np.nan)
+        self._days_since_refresh = 0
+        self.n_refreshes = 0
+
+        self.panels = EDPanels(self.buffer.frame(), blit=blit,
+                               headroom=headroom, **kwargs)
+        self.figure = self.panels.figure
+
+    def __repr__(self):
+        return f'StreamingDashboard(window={self.buffer.capacity}, ' \
+                + f'n_hosps={len(self.buffer.columns)}, ' \
+                + f'refresh_every={self.refresh_every})'
+
+    def push(self, date, hosp, attends):
+        '''
+        Add a single record.  The panels are updated once a day is complete
+        (when a record for a later date arrives).
+
+        Params:
+        ------
+        date: str, datetime or numpy.datetime64
+            Date of the attendances
+
+        hosp: int or str
+            Hospital id (e.g. 1) or column name (e.g. 'hosp_1')
+
+        attends: int
+            Number of attendances
+        '''
+        import numpy as np
+        import pandas as pd
+
+        date = np.datetime64(pd.Timestamp(date), 'D')
+        pos = self._hosp_pos.get(hosp)
+        if pos is None:
+            raise ValueError(f'unknown hospital {hosp!r}.')
+
+        if self._pending_date is None:
+            end_date = self.buffer.end_date
+            if end_date is not None:
+                end_date = end_date.astype('datetime64[D]')
+                if date <= end_date:
+                    raise ValueError('records must be dated after '
+                                     + f'{pd.Timestamp(end_date).date()}.')
+                self._fill_gap(end_date, date)
+            self._pending_date = date
+        elif date < self._pending_date:
+            raise ValueError('records must be in date order.')
+        elif date > self._pending_date:
+            self._commit(date)
+
+        self._pending[pos] = attends
+
+    def extend(self, records):
+        '''
+        Add an iterable of (date, hosp, attends) records
+        '''
+        for record in records:
+            self.push(*record)
+
+    def flush(self):
+        '''
+        Write the current (possibly incomplete) day and update the panels.
+        Call at the end of a stream.
+        '''
+        if self._pending_date is not None:
+            self._write_pending()
+            self._pending_date = None
+        self.refresh()
+
+    def refresh(self):
+        '''
+        Update the panels with the days in the buffer
+        '''
+        self.panels.update(self.buffer.frame())
+        self.figure.canvas.flush_events()
+        self._days_since_refresh = 0
+        self.n_refreshes += 1
+
+    def run(self, records):
+        '''
+        Consume records until the source is exhausted and then `flush`.
+
+        An async generator is run to completion with `asyncio.run`.  From
+        code that is already running an event loop (e.g. Jupyter) use
+        `await run_async(records)`.
+
+        Params:
+        ------
+        records: iterable or async iterable
+            (date, hosp, attends) records
+        '''
+        if hasattr(records, '__aiter__'):
+            import asyncio
+            return asyncio.run(self.run_async(records))
+
+        self.extend(records)
+        self.flush()
+
+    async def run_async(self, records):
+        '''
+        Consume records from an async iterable until it is exhausted and
+        then `flush`.
+
+        Params:
+        ------
+        records: async iterable
+            (date, hosp, attends) records
+        '''
+        async for record in records:
+            self.push(*record)
+        self.flush()
+
+    def _commit(self, next_date):
+        '''
+        Write the pending day and any days with no records before
+        `next_date`, then start collecting `next_date`.
+        '''
+        self._write_pending()
+        self._fill_gap(self._pending_date, next_date)
+        self._pending_date = next_date
+        if self._days_since_refresh >= self.refresh_every:
+            self.refresh()
+
+    def _fill_gap(self, last_date, next_date):
+        '''
+        Write empty days between `last_date` and `next_date` (exclusive)
+        '''
+        import numpy as np
+
+        missing = np.full(len(self.buffer.columns), np.nan)
+        # only the last `capacity` empty days can still be in the window
+        n_gap = int((next_date - last_date).astype(int)) - 1
+        for day in range(max(1, n_gap - self.buffer.capacity + 1), n_gap + 1):
+            self.buffer.append(last_date + day, missing)
+            self._days_since_refresh += 1
+
+    def _write_pending(self):
+        import numpy as np
+
+        self.buffer.append(self._pending_date, self._pending)
+        self._pending[:] = np.nan
+        self._days_since_refresh += 1
@@ -0,0 +1,160 @@
+'''
+downsample - visual downsampling of long ED time series
+
+A line plot cannot show more detail than the pixels of the axes it is drawn
+on.  With years of daily or hourly data most points land in the same pixel
+columns and only slow down rendering.  These functions choose a subset of
+the points, sized to the width of the axes in pixels, that preserves the
+shape of the plotted line.
+
+Two methods are provided:
+
+* 'lttb' - largest-triangle-three-buckets.  One point per bucket chosen to
+  keep the most visually significant peaks and troughs.
+* 'minmax' - the minimum and maximum of each bucket.  Keeps the exact
+  vertical envelope of the line in each pixel column.
+'''
+
+VALID_METHODS = ['lttb', 'minmax']
+
+
+def lttb_indices(x, y, n_out):
+    '''
+    Select `n_out` points using largest-triangle-three-buckets.
+
+    The first and last points are always kept.  The points between are
+    split into n_out - 2 buckets and from each bucket the point that forms
+    the largest triangle with the previously selected point and the average
+    of the next bucket is kept.
+
+    Params:
+    ------
+    x: numpy.ndarray
+        x values (float) in increasing order
+
+    y: numpy.ndarray
+        y values (float)
+
+    n_out: int
+        Number of points to keep
+
+    Returns:
+    -------
+    numpy.ndarray
+        Sorted indices of the selected points
+    '''
+    import numpy as np
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets over the points between the first and last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # the average of each bucket is precomputed.  The last point stands in
+    # for the bucket after the last bucket.
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts,
+                      x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts,
+                      y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # twice the triangle area (a, candidate, next bucket average)
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    '''
+    Select the minimum and maximum point of each of `n_buckets` equal
+    sized buckets.  The first and last points are always kept.
+
+    Params:
+    ------
+    y: numpy.ndarray
+        y values
+
+    n_buckets: int
+        Number of buckets.  At most 2 * n_buckets + 2 points are kept.
+
+    Returns:
+    -------
+    numpy.ndarray
+        Sorted indices of the selected points
+    '''
+    import numpy as np
+
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    # pad with the last value so the points reshape to (n_buckets, size)
+    padded = np.pad(np.asarray(y), (0, n_buckets * size - n), mode='edge')
+    blocks = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+
+    selected = np.concatenate([[0, n - 1],
+                               offsets + blocks.argmin(axis=1),
+                               offsets + blocks.argmax(axis=1)])
+    return np.unique(np.minimum(selected, n - 1))
+
+
+def pixel_width(ax):
+    '''
+    Width of an axes in display pixels at the figure's current dpi.
+    '''
+    return max(int(ax.bbox.width), 1)
+
+
+def downsample_series(series, n_pixels, method='lttb'):
+    '''
+    Downsample a series for plotting on an axes `n_pixels` wide.
+
+    Missing values are dropped.
+
+    Params:
+    ------
+    series: pandas.Series
+        Series to plot.  The index (e.g. a DatetimeIndex) is used as x.
+
+    n_pixels: int
+        Width of the axes in pixels.  See `pixel_width`.
+
+    method: str, optional (default='lttb')
+        'lttb' keeps n_pixels points.  'minmax' keeps the minimum and
+        maximum in each pixel column.
+
+    Returns:
+    -------
+    pandas.Series
+        The selected points of `series`
+    '''
+    import numpy as np
+
+    if method not in VALID_METHODS:
+        raise ValueError(f'method should be one of {VALID_METHODS}')
+
+    series = series.dropna()
+    y = series.to_numpy(dtype=np.float64)
+
+    if method == 'minmax':
+        return series.iloc[minmax_indices(y, n_pixels)]
+
+    x = series.index.to_numpy()
+    if x.dtype.kind == 'M':
+        x = x.view(np.int64)
+
+    return series.iloc[lttb_indices(x, y, n_pixels)]
@@ -0,0 +1,424 @@
+'''
+panels - small multiples of the ED time series that update in place
+
+`EDPanels` draws one panel per hospital in a grid.  Up to
+COLLECTION_THRESHOLD hospitals each panel is a subplot with its own Line2D.
+Above that all hospitals are drawn on a single axes as one LineCollection,
+each series scaled into its own cell of the grid, so the cost of drawing
+does not grow with the number of axes and artists.
+
+`EDPanels.update` replaces the data shown (e.g. when new days arrive).  The
+axis limits include some headroom so most updates fit inside them.  With
+`blit=True` those updates restore a saved background and redraw only the
+lines.  A full redraw happens only when the data move outside the limits.
+
+Long hospital lists can be split into pages with `paginate`.
+'''
+
+import math
+
+from ts_emergency.plotting.view import (DEFAULT_AXIS_FS, DEFAULT_FIGSIZE,
+                                        DEFAULT_LABEL_FS)
+
+# number of hospitals above which a single LineCollection is used
+COLLECTION_THRESHOLD = 64
+
+# fraction of the data range added to the axis limits so that updates fit
+HEADROOM = 0.1
+
+# fraction of the y range added above and below the data (as matplotlib)
+MARGIN = 0.05
+
+# fraction of a grid cell filled by its series in collection mode
+CELL_FILL = 0.9
+
+
+def grid_shape(n_panels, ncols=None):
+    '''
+    Rows and columns of a grid of `n_panels`.
+
+    Params:
+    ------
+    n_panels: int
+        Number of panels
+
+    ncols: int, optional (default=None)
+        Number of columns.  If None one column is used for up to 4 panels
+        and a square grid above that.
+
+    Returns:
+    -------
+    (int, int)
+    '''
+    if ncols is None:
+        ncols = 1 if n_panels <= 4 else math.ceil(math.sqrt(n_panels))
+
+    ncols = max(1, min(ncols, n_panels))
+    return math.ceil(n_panels / ncols), ncols
+
+
+def paginate(columns, page_size=None):
+    '''
+    Split hospital columns into pages.
+
+    Params:
+    ------
+    columns: list
+        hospital column names
+
+    page_size: int, optional (default=None)
+        Number of hospitals per page.  If None all hospitals are on one
+        page.
+
+    Returns:
+    -------
+    list of lists
+    '''
+    columns = list(columns)
+    if page_size is None or page_size >= len(columns):
+        return [columns]
+
+    return [columns[i:i + page_size]
+            for i in range(0, len(columns), page_size)]
+
+
+class EDPanels:
+    '''
+    Small multiples of the ED time series that can be updated in place.
+
+    Pass the returned `figure` to a notebook or GUI or call `update` with
+    new data to refresh it:
+
+        panels = EDPanels(wide_df, blit=True)
+        ...
+        panels.update(new_wide_df)
+    '''
+    def __init__(self, wide_df, ncols=None, figsize=DEFAULT_FIGSIZE,
+                 sharey=False, use_collection=None, blit=False,
+                 downsample=None, headroom=HEADROOM,
+                 label_font_size=DEFAULT_LABEL_FS,
+                 axis_font_size=DEFAULT_AXIS_FS, figure=None):
+        '''
+        Params:
+        -------
+        wide_df: pandas.DataFrame
+            ED time series data in wide format.  One panel per column.
+
+        ncols: int, optional (default=None)
+            Number of columns in the grid.  See `grid_shape`.
+
+        figsize: tuple(int, int), optional (default=DEFAULT_FIGSIZE)
+            `matplotlib` figure size.  Ignored if `figure` is given.
+
+        sharey: bool, optional (default=False)
+            Use the same y limits for every hospital.
+
+        use_collection: bool, optional (default=None)
+            Draw all hospitals as a single LineCollection.  If None a
+            collection is used for more than COLLECTION_THRESHOLD
+            hospitals.
+
+        blit: bool, optional (default=False)
+            Redraw only the lines on `update`.  The lines are animated
+            artists so use blit=False for figures that are saved to file.
+
+        downsample: str, optional (default=None)
+            'lttb' or 'minmax' to visually downsample each series to the
+            pixel width of its panel.  See `plot_single_ed`.  If None
+            'minmax' is used in collection mode, where each panel is only a
+            few pixels wide.  False plots every point.
+
+        headroom: float or (float, float), optional (default=HEADROOM)
+            Fraction of the data range added to the x (after the last date)
+            and y limits so that updates can be blitted.  A tuple sets x and
+            y separately.  Use 0 for static plots.
+
+        label_font_size: int, optional (default=DEFAULT_LABEL_FS)
+            Size of the panel title font
+
+        axis_font_size: int, optional (default=DEFAULT_AXIS_FS)
+            Size of the axis label font
+
+        figure: matplotlib.figure.Figure, optional (default=None)
+            Figure to draw on.  If None a new pyplot figure is created.
+        '''
+        self.columns = list(wide_df.columns)
+        n_panels = len(self.columns)
+        if n_panels == 0:
+            raise ValueError('wide_df must contain at least one hospital.')
+
+        if use_collection is None:
+            use_collection = n_panels > COLLECTION_THRESHOLD
+
+        self.nrows, self.ncols = grid_shape(n_panels, ncols)
+        self.sharey = sharey
+        self.use_collection = use_collection
+        self.blit = blit
+        if downsample is None and use_collection:
+            downsample = 'minmax'
+        self.downsample = downsample
+        if isinstance(headroom, tuple):
+            self.x_headroom, self.y_headroom = headroom
+        else:
+            self.x_headroom = self.y_headroom = headroom
+        self._background = None
+
+        if figure is None:
+            import matplotlib.pyplot as plt
+            figure = plt.figure(figsize=figsize, tight_layout=True)
+        self.figure = figure
+
+        if use_collection:
+            self._create_collection(label_font_size)
+        else:
+            self._create_axes(label_font_size)
+
+        _ = figure.supylabel('ED Attendances', fontsize=axis_font_size)
+        _ = figure.supxlabel('Date', fontsize=axis_font_size)
+
+        if blit:
+            for artist in self._artists():
+                artist.set_animated(True)
+            figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+        self._set_limits(*self._xy(wide_df))
+        self._set_data(*self._xy(wide_df))
+
+    def __repr__(self):
+        return f'EDPanels(n_panels={len(self.columns)}, nrows={self.nrows}, ' \
+                + f'ncols={self.ncols}, use_collection={self.use_collection})'
+
+    def update(self, wide_df):
+        '''
+        Show new data.  The columns must match those the panels were
+        created with.
+
+        If the data fit inside the current axis limits only the lines are
+        redrawn (blitted if `blit=True`).  Otherwise the limits are
+        recalculated and the whole figure is redrawn.
+
+        Params:
+        ------
+        wide_df: pandas.DataFrame
+            ED time series data in wide format
+
+        Returns:
+        -------
+        bool
+            True if the whole figure was redrawn
+        '''
+        if list(wide_df.columns) != self.columns:
+            raise ValueError('wide_df must have the same columns as the '
+                             + 'panels.')
+
+        x, values = self._xy(wide_df)
+        full_redraw = not self._in_limits(x, values)
+        if full_redraw:
+            self._set_limits(x, values)
+
+        self._set_data(x, values)
+
+        canvas = self.figure.canvas
+        if full_redraw or not self.blit or self._background is None:
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_artists()
+            canvas.blit(self.figure.bbox)
+
+        return full_redraw
+
+    def _create_axes(self, label_font_size):
+        '''
+        One subplot and Line2D per hospital
+        '''
+        from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+
+        axs = self.figure.subplots(self.nrows, self.ncols, sharex=True,
+                                   sharey=self.sharey, squeeze=False)
+        self.axes = axs.ravel()
+        self.lines = []
+        for ax, hosp_id in zip(self.axes, self.columns):
+            line, = ax.plot([], [])
+            self.lines.append(line)
+            _ = ax.set_title(hosp_id.replace('hosp_', 'Hospital '),
+                             fontsize=label_font_size)
+            _ = ax.grid(ls='--')
+
+        # the x axis is shared so one date locator serves every panel.
+        # concise labels fit narrow panels.
+        locator = AutoDateLocator(maxticks=max(4, 12 // self.ncols))
+        self.axes[0].xaxis.set_major_locator(locator)
+        self.axes[0].xaxis.set_major_formatter(ConciseDateFormatter(locator))
+
+        # unused cells in the last row of the grid
+        for ax in self.axes[len(self.columns):]:
+            ax.set_visible(False)
+
+    def _create_collection(self, label_font_size):
+        '''
+        A single axes with one cell per hospital and one LineCollection
+        '''
+        import numpy as np
+        from matplotlib.collections import LineCollection
+
+        # a single axes with no ticks does not need tight layout, which is
+        # slow with one label per hospital
+        self.figure.set_layout_engine('none')
+        self.figure.subplots_adjust(left=0.05, right=0.99, bottom=0.05,
+                                    top=0.99)
+
+        ax = self.figure.add_subplot()
+        ax.set_xlim(0, self.ncols)
+        ax.set_ylim(0, self.nrows)
+        ax.set_axis_off()
+        self.axes = np.array([ax])
+
+        self.collection = LineCollection([], linewidths=0.75)
+        ax.add_collection(self.collection)
+
+        # cell labels are static so are drawn once in the background
+        font_size = max(4, label_font_size - int(math.log2(len(self.columns))))
+        for i, hosp_id in enumerate(self.columns):
+            col, row = self._cell(i)
+            ax.text(col, row + CELL_FILL, hosp_id.removeprefix('hosp_'),
+                    fontsize=font_size, va='top', alpha=0.6)
+
+    def _artists(self):
+        return [self.collection] if self.use_collection else self.lines
+
+    def _cell(self, i):
+        '''
+        Lower left corner of the cell of hospital `i` in collection mode
+        '''
+        row, col = divmod(i, self.ncols)
+        return col, self.nrows - 1 - row
+
+    def _xy(self, wide_df):
+        '''
+        Dates as matplotlib date numbers and the values as float
+        '''
+        import numpy as np
+        from matplotlib.dates import date2num
+
+        x = date2num(wide_df.index.to_numpy())
+        return x, wide_df.to_numpy(dtype=np.float64)
+
+    def _set_limits(self, x, values):
+        '''
+        Set the x and y limits to the range of the data plus headroom
+        '''
+        import numpy as np
+
+        x_span = max(x[-1] - x[0], 1.0) if len(x) else 1.0
+        x_start = x[0] if len(x) else 0.0
+        self._xlim = (x_start, x_start + x_span * (1 + self.x_headroom))
+
+        with np.errstate(all='ignore'):
+            low = np.nanmin(values, axis=0, initial=np.inf)
+            high = np.nanmax(values, axis=0, initial=-np.inf)
+
+        if self.sharey:
+            low = np.full_like(low, low.min())
+            high = np.full_like(high, high.max())
+
+        empty = ~np.isfinite(low) | ~np.isfinite(high)
+        low[empty], high[empty] = 0, 1
+        pad = np.maximum((high - low) * (self.y_headroom + MARGIN), 1)
+        self._ylim = np.column_stack([low - pad, high + pad])
+
+        if not self.use_collection:
+            self.axes[0].set_xlim(self._xlim)
+            for ax, ylim in zip(self.axes, self._ylim):
+                ax.set_ylim(ylim)
+
+    def _in_limits(self, x, values):
+        '''
+        True if the data fit inside the current axis limits
+        '''
+        import numpy as np
+
+        if len(x) == 0:
+            return True
+
+        if x[0] < self._xlim[0] or x[-1] > self._xlim[1]:
+            return False
+
+        with np.errstate(all='ignore'):
+            low = np.nanmin(values, axis=0, initial=np.inf)
+            high = np.nanmax(values, axis=0, initial=-np.inf)
+
+        return bool((low >= self._ylim[:, 0]).all()
+                    and (high <= self._ylim[:, 1]).all())
+
+    def _set_data(self, x, values):
+        '''
+        Update the lines (or collection) with new data
+        '''
+        n_pixels = self._panel_pixels()
+
+        if self.use_collection:
+            segments = [self._scale_to_cell(i, *self._select(x, values[:, i],
+                                                            n_pixels))
+                        for i in range(len(self.columns))]
+            self.collection.set_segments(segments)
+            return
+
+        for i, line in enumerate(self.lines):
+            line.set_data(*self._select(x, values[:, i], n_pixels))
+
+    def _scale_to_cell(self, i, x, y):
+        '''
+        Map a series into the cell of hospital `i`
+        '''
+        import numpy as np
+
+        col, row = self._cell(i)
+        x_low, x_high = self._xlim
+        y_low, y_high = self._ylim[i]
+        return np.column_stack(
+            [col + CELL_FILL * (x - x_low) / (x_high - x_low),
+             row + CELL_FILL * (y - y_low) / (y_high - y_low)])
+
+    def _select(self, x, y, n_pixels):
+        '''
+        Visually downsample a series if requested
+        '''
+        import numpy as np
+
+        if not self.downsample:
+            return x, y
+
+        from ts_emergency.plotting.downsample import (VALID_METHODS,
+                                                      lttb_indices,
+                                                      minmax_indices)
+
+        if self.downsample not in VALID_METHODS:
+            raise ValueError(f'downsample should be one of {VALID_METHODS}')
+
+        finite = np.isfinite(y)
+        x, y = x[finite], y[finite]
+        if self.downsample == 'minmax':
+            selected = minmax_indices(y, n_pixels)
+        else:
+            selected = lttb_indices(x, y, n_pixels)
+        return x[selected], y[selected]
+
+    def _panel_pixels(self):
+        '''
+        Approximate pixel width of one panel
+        '''
+        width = self.figure.get_figwidth() * self.figure.dpi
+        return max(int(width / self.ncols), 1)
+
+    def _on_draw(self, event):
+        '''
+        Save the background (everything except the lines) after a full draw
+        '''
+        canvas = self.figure.canvas
+        self._background = canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self._artists():
+            self.figure.draw_artist(artist)
@@ -2,32 +2,77 @@
 tsa - time series analysis module
 
 plotting functions for time series analysis
-'''
 
-# standard imports
-import matplotlib.pyplot as plt
-import numpy as np
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
+matplotlib and statsmodels are imported on first use to keep import time low.
+'''
 
 # cross package imports
 from ts_emergency.plotting.view import plot_single_ed
+from ts_emergency.transforms import derived_series
 
 def plot_detrended(wide_df, hosp_id, ax=None):
     '''
-    Plot the first difference of the ED time series
+    Plot the first difference of the ED time series.
+
+    Only the `hosp_id` column is differenced.  The result is cached for
+    `EDStore` frames (see `ts_emergency.transforms`).
     '''
     
-    # create differenced dataframe
-    diff_df = wide_df.diff(periods=1)
+    # differenced series for the hospital only
+    diff_df = derived_series(wide_df, hosp_id, 'diff', periods=1).to_frame()
     
     fig, ax = plot_single_ed(diff_df, hosp_id, ax)
     ax.set_title('Detrended')
     
     return fig, ax
+
+
+def plot_correlogram(values, confint, ax, include_zero=False, 
+                     title='Autocorrelation'):
+    '''
+    Plot a precomputed ACF or PACF in the same style as statsmodels
+    `plot_acf` and `plot_pacf`.
+    
+    Params:
+    ------
+    values: array-like
+        ACF or PACF values for lags 0 to maxlags
+
+    confint: array-like
+        Half-width of the confidence interval around zero at each lag
+
+    ax: matplotlib.axes.Axes
+        Axis to plot on
+
+    include_zero: bool, optional (default=False)
+        Include lag 0 (=1.0) in the plot
+
+    title: str, optional (default='Autocorrelation')
+        Title of the plot
+
+    Returns:
+    -------
+    matplotlib fig, ax
+    '''
+    import numpy as np
+
+    start = 0 if include_zero else 1
+    values = np.asarray(values)[start:]
+    confint = np.asarray(confint)[start:]
+    lags = np.arange(start, start + len(values))
+
+    ax.vlines(lags, 0, values)
+    ax.axhline(0)
+    ax.plot(lags, values, marker='o', markersize=5, linestyle='None')
+    ax.fill_between(lags, -confint, confint, alpha=0.25, linewidth=0)
+    ax.set_ylim(-1, 1)
+    ax.set_title(title)
+
+    return ax.figure, ax
     
 
 def diagnostic_plot(wide_df, hosp_id, figsize=(9, 6), maxlags=56, 
-                    include_zero=False):
+                    include_zero=False, correlograms=None):
     '''
     Basic plot of diagnostics for ED time series.
     
@@ -51,11 +96,20 @@ def diagnostic_plot(wide_df, hosp_id, figsize=(9, 6), maxlags=56,
         
     include_zero: bool, optional (default=False)
         Include ACF and PACF of observation with itself in plot (=1.0)
+
+    correlograms: Correlograms, optional (default=None)
+        ACF and PACF precomputed for all hospitals by 
+        `ts_emergency.analysis.acf_pacf`.  If None the ACF and PACF for 
+        `hosp_id` are computed with statsmodels.  `maxlags` is ignored if
+        provided.
     
     Returns:
     -------
     fig, np.ndarray
     ''' 
+    import matplotlib.pyplot as plt
+    import numpy as np
+
     fig = plt.figure(figsize=figsize, tight_layout=True)
 
     # add gridspec
@@ -71,10 +125,24 @@ def diagnostic_plot(wide_df, hosp_id, figsize=(9, 6), maxlags=56,
     # plot detrended on axis 1
     _ = plot_detrended(wide_df, hosp_id, ax=ax1)
 
-    # plot acf on axis 2
-    _ = plot_acf(wide_df[hosp_id], lags=maxlags, ax=ax2, zero=include_zero)
-    # plot pacf on axi
-    _ = plot_pacf(wide_df[hosp_id], lags=maxlags, ax=ax3, zero=include_zero)
+    if correlograms is None:
+        from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
+
+        # plot acf on axis 2
+        _ = plot_acf(wide_df[hosp_id], lags=maxlags, ax=ax2, 
+                     zero=include_zero)
+        # plot pacf on axi
+        _ = plot_pacf(wide_df[hosp_id], lags=maxlags, ax=ax3, 
+                      zero=include_zero)
+    else:
+        # precomputed acf and pacf for this hospital
+        i = correlograms.columns.index(hosp_id)
+        _ = plot_correlogram(correlograms.acf[:, i], 
+                             correlograms.acf_confint[:, i], ax2, 
+                             include_zero)
+        _ = plot_correlogram(correlograms.pacf[:, i], 
+                             correlograms.pacf_confint[:, i], ax3, 
+                             include_zero, title='Partial Autocorrelation')
     
     axs = np.array([ax1, ax2, ax3])
     return fig, axs
@@ -1,11 +1,15 @@
-import matplotlib.pyplot as plt
+'''
+view - plotting functions to visualise the ED time series
+
+matplotlib is imported on first use to keep import time low.
+'''
 
 DEFAULT_LABEL_FS = 12
 DEFAULT_AXIS_FS = 12
 DEFAULT_FIGSIZE = (12,8)
 
 def plot_single_ed(wide_df, hosp_id, ax=None, figsize=(12,3), 
-                   fontsize=DEFAULT_LABEL_FS, line_width=2):
+                   fontsize=DEFAULT_LABEL_FS, line_width=2, downsample=None):
     '''
     Plot a single ED's data
     Assumes data are passed in wide format.
@@ -26,12 +30,19 @@ def plot_single_ed(wide_df, hosp_id, ax=None, figsize=(12,3),
         
     line_width: int
         Width of the line plot
+
+    downsample: str, optional (default=None)
+        Visually downsample long series to the pixel width of the axes 
+        before plotting.  'lttb' (largest-triangle-three-buckets) or 
+        'minmax' (minimum and maximum per pixel column).  None plots every
+        point.
         
     Returns:
     -------
     matplotlib fig, ax
             
     '''
+    import matplotlib.pyplot as plt
     
     if ax is None:
         fig = plt.figure(figsize=figsize)
@@ -40,7 +51,7 @@ def plot_single_ed(wide_df, hosp_id, ax=None, figsize=(12,3),
     ax.set_xlabel("Date", fontsize=fontsize)
     ax.set_ylabel("Attendances", fontsize=fontsize)
 
-    _ = ax.plot(wide_df[hosp_id], lw=line_width)
+    _ = ax.plot(_plot_data(wide_df[hosp_id], ax, downsample), lw=line_width)
     # include x, y grid 
     _ = ax.grid(ls='--')
 
@@ -52,16 +63,23 @@ def plot_single_ed(wide_df, hosp_id, ax=None, figsize=(12,3),
 
 
 def plot_eds(wide_df, figsize=DEFAULT_FIGSIZE, label_font_size=DEFAULT_LABEL_FS, 
-             axis_font_size=DEFAULT_AXIS_FS):
+             axis_font_size=DEFAULT_AXIS_FS, downsample=None, ncols=None,
+             page_size=None, page=0, sharey=False, use_collection=None):
     '''
-    Plot all ED's attendances in a 1x4 grid layout.
+    Plot the ED's attendances as a grid of small multiples with one panel
+    per hospital.  Up to 4 hospitals are shown one per row.
+    
+    Large numbers of hospitals can be split into pages of `page_size`.  
+    Above `panels.COLLECTION_THRESHOLD` hospitals all series are drawn as a
+    single LineCollection.  For a figure that is updated with new data use
+    `ts_emergency.plotting.panels.EDPanels` directly.
     
     Params:
     ------
     wide_df: pandas.Dataframe
         ED time series data in wide format
 
-    figsize: tuple(int, int), optional (default=(12,3))
+    figsize: tuple(int, int), optional (default=DEFAULT_FIGSIZE)
         `matplotlib` figure size 
         
     label_font_size: int, optional (default=DEFAULT_LABEL_FS)
@@ -69,25 +87,55 @@ def plot_eds(wide_df, figsize=DEFAULT_FIGSIZE, label_font_size=DEFAULT_LABEL_FS,
         
     axis_font_size: int, optional (default=DEFAULT_AXIS_FS)
         Size of axis tick font
+
+    downsample: str, optional (default=None)
+        'lttb' or 'minmax' to visually downsample each series to the pixel
+        width of its axes.  See `plot_single_ed`.
+
+    ncols: int, optional (default=None)
+        Number of columns in the grid.  If None one column for up to 4
+        hospitals and a square grid above that.
+
+    page_size: int, optional (default=None)
+        Maximum number of hospitals in the figure.  If None all hospitals
+        are plotted.
+
+    page: int, optional (default=0)
+        Which page of `page_size` hospitals to plot
+
+    sharey: bool, optional (default=False)
+        Use the same y axis limits for all hospitals
+
+    use_collection: bool, optional (default=None)
+        Draw all hospitals as a single LineCollection.  If None decided by
+        the number of hospitals.
     
     Returns:
     --------
     matplotlib fig
     '''
-             
-    fig, axs = plt.subplots(nrows=4, ncols=1, tight_layout=True, figsize=(12,8),
-                            sharex=True)
-
-    # note that axs is a 2D array
-    for hosp_idx in range(0, 4):
-        _ = axs[hosp_idx].plot(wide_df[f'hosp_{hosp_idx+1}'])
-        _ = axs[hosp_idx].set_title(f'Hospital {hosp_idx+1}', 
-                                    fontsize=label_font_size)
-        _ = axs[hosp_idx].grid(ls='--')
-
-    # axis labels matplotlib >=3.4 
-    AXIS_LABEL_SIZE = 12
-    _ = fig.supylabel('ED Attendances', fontsize=axis_font_size)
-    _ = fig.supxlabel('Date', fontsize=axis_font_size)
-             
-    return fig
\ No newline at end of file
+    from ts_emergency.plotting.panels import EDPanels, paginate
+
+    pages = paginate(wide_df.columns, page_size)
+    if not 0 <= page < len(pages):
+        raise ValueError(f'page should be between 0 and {len(pages) - 1}')
+
+    panels = EDPanels(wide_df[pages[page]], ncols=ncols, figsize=figsize,
+                      sharey=sharey, use_collection=use_collection,
+                      downsample=downsample, headroom=0,
+                      label_font_size=label_font_size,
+                      axis_font_size=axis_font_size)
+    return panels.figure
+
+
+def _plot_data(series, ax, downsample=None):
+    '''
+    Return the series to plot on `ax`, downsampled if requested.
+    '''
+    if downsample is None:
+        return series
+
+    from ts_emergency.plotting.downsample import (downsample_series, 
+                                                  pixel_width)
+    
+    return downsample_series(series, pixel_width(ax), downsample)
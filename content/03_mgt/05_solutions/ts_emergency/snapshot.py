@@ -0,0 +1,123 @@
+'''
+Binary snapshots of transformed ED dataframes.
+
+A snapshot is a directory of .npy files plus a small json file of metadata.
+Frames with a single dtype (e.g. the int16 wide format) are stored as one 2D
+array. Frames with mixed dtypes (e.g. the long format) are stored one array
+per column.  Arrays keep their compact dtypes and are memory-mapped when a
+snapshot is loaded, so loading does not parse or convert any data.
+'''
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+META_FILE = 'meta.json'
+INDEX_FILE = 'index.npy'
+VALUES_FILE = 'values.npy'
+
+
+def save_snapshot(df, path):
+    '''
+    Save a dataframe as a binary snapshot.
+
+    The snapshot is written to a temporary directory and moved into place
+    so that concurrent readers never see a partial snapshot.
+
+    Params:
+    ------
+    df: pandas.DataFrame
+        Frame to save.  Index must be a RangeIndex or a single level index.
+
+    path: str or pathlib.Path
+        Directory to write the snapshot to.
+    '''
+    import numpy as np
+    import pandas as pd
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent))
+
+    try:
+        has_index = not isinstance(df.index, pd.RangeIndex)
+        if has_index:
+            np.save(tmp_dir / INDEX_FILE, df.index.to_numpy())
+
+        # a single 2D block when possible.  Otherwise one file per column.
+        as_block = df.dtypes.nunique() == 1
+        if as_block:
+            np.save(tmp_dir / VALUES_FILE, df.to_numpy())
+        else:
+            for i, col in enumerate(df.columns):
+                np.save(tmp_dir / f'col_{i}.npy', df[col].to_numpy())
+
+        meta = {'columns': list(df.columns),
+                'index_name': df.index.name,
+                'has_index': has_index,
+                'as_block': bool(as_block)}
+
+        with open(tmp_dir / META_FILE, 'w') as f:
+            json.dump(meta, f)
+
+        os.replace(tmp_dir, path)
+    except OSError:
+        # another process may have already written the snapshot.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not (path / META_FILE).exists():
+            raise
+
+
+def load_snapshot(path):
+    '''
+    Load a binary snapshot as a dataframe backed by memory-mapped arrays.
+
+    Arrays are opened copy-on-write: the returned frame can be modified
+    without changing the snapshot on disk.
+
+    Params:
+    ------
+    path: str or pathlib.Path
+        Snapshot directory
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    import pandas as pd
+
+    path = Path(path)
+    with open(path / META_FILE) as f:
+        meta = json.load(f)
+
+    index = None
+    if meta['has_index']:
+        index = pd.Index(_memmap(path / INDEX_FILE), name=meta['index_name'])
+
+    if meta['as_block']:
+        values = _memmap(path / VALUES_FILE)
+        return pd.DataFrame(values, index=index, columns=meta['columns'],
+                            copy=False)
+
+    data = {col: _memmap(path / f'col_{i}.npy')
+            for i, col in enumerate(meta['columns'])}
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def snapshot_exists(path):
+    '''
+    Return True if a complete snapshot exists at `path`
+    '''
+    return (Path(path) / META_FILE).exists()
+
+
+def _memmap(file_path):
+    '''
+    Memory-map a .npy file copy-on-write.  Returned as a plain ndarray view
+    so that pandas does not carry the np.memmap subclass into results.
+    '''
+    import numpy as np
+
+    return np.load(file_path, mmap_mode='c').view(np.ndarray)
@@ -0,0 +1,473 @@
+'''
+stats - rolling statistics of the ED time series
+
+Rolling means, standard deviations, z-scores and quantiles are computed for
+several window sizes and every hospital column of a wide frame at once.
+
+* means and standard deviations use cumulative sums.  For integer data
+  (e.g. the int16 `load_ed_ts` frame) the sums are exact int64 so there is
+  no loss of precision however long the series.
+* quantiles use a sorted window.  The windows of all hospitals are held in
+  one flat sorted array (each hospital's values are offset so they sort
+  into their own block).  Each day the oldest value of every hospital is
+  removed and the newest inserted with a single vectorised search, and any
+  number of quantiles are read directly from the sorted blocks.  For a
+  handful of hospitals, where the per-day loop dominates, all windows are
+  partitioned at once instead.
+
+Results are float32 arrays with a leading axis for the window.  The first
+window - 1 rows of each window are NaN, as for pandas `rolling(window)`
+(all rows if the window is longer than the data).
+Use `to_frame` to return a result as a DataFrame.
+'''
+
+from collections import namedtuple
+
+DEFAULT_WINDOWS = (7, 28, 365)
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+# window * n_series at or below which quantiles are found by partitioning
+# every window rather than with the sorted window
+PARTITION_MAX_SIZE = 4096
+
+# number of elements partitioned at a time
+PARTITION_CHUNK_SIZE = 2 ** 21
+
+RollingStats = namedtuple('RollingStats', ['windows', 'quantiles', 'columns',
+                                           'index', 'mean', 'std', 'zscore',
+                                           'quantile'])
+
+
+def rolling_mean(wide_df, windows=DEFAULT_WINDOWS):
+    '''
+    Rolling mean of every column for each window.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    windows: list, optional (default=DEFAULT_WINDOWS)
+        window sizes in days
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_windows, n_obs, n_series)
+    '''
+    x, windows = _validate(wide_df, windows)
+    sums, _, centre = _cumsums(x, squares=False)
+    out = _empty(len(windows), x.shape)
+
+    for i, window in _fitted(windows, len(x)):
+        out[i, window - 1:] = _window_sum(sums, window) / window + centre
+
+    return out
+
+
+def rolling_std(wide_df, windows=DEFAULT_WINDOWS, ddof=1):
+    '''
+    Rolling standard deviation of every column for each window.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    windows: list, optional (default=DEFAULT_WINDOWS)
+        window sizes in days
+
+    ddof: int, optional (default=1)
+        Delta degrees of freedom (1 matches pandas `rolling().std()`)
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_windows, n_obs, n_series)
+    '''
+    x, windows = _validate(wide_df, windows)
+    sums, squares, _ = _cumsums(x)
+    out = _empty(len(windows), x.shape)
+
+    for i, window in _fitted(windows, len(x)):
+        out[i, window - 1:] = _window_std(sums, squares, window, ddof)
+
+    return out
+
+
+def rolling_zscore(wide_df, windows=DEFAULT_WINDOWS, ddof=1):
+    '''
+    Z-score of each day relative to the window ending on that day:
+    (x - rolling mean) / rolling std.  NaN where the std is zero.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    windows: list, optional (default=DEFAULT_WINDOWS)
+        window sizes in days
+
+    ddof: int, optional (default=1)
+        Delta degrees of freedom of the std
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_windows, n_obs, n_series)
+    '''
+    return rolling_stats(wide_df, windows, quantiles=(), ddof=ddof).zscore
+
+
+def rolling_quantile(wide_df, quantiles=DEFAULT_QUANTILES,
+                     windows=DEFAULT_WINDOWS):
+    '''
+    Rolling quantiles of every column for each window.  Quantiles are
+    linearly interpolated (as pandas `rolling().quantile()` and
+    `numpy.quantile`).
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    quantiles: list, optional (default=DEFAULT_QUANTILES)
+        quantiles between 0 and 1
+
+    windows: list, optional (default=DEFAULT_WINDOWS)
+        window sizes in days
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_windows, n_quantiles, n_obs, n_series)
+    '''
+    import numpy as np
+
+    x, windows = _validate(wide_df, windows)
+    quantiles = _validate_quantiles(quantiles)
+    codes = values = None
+
+    out = np.full((len(windows), len(quantiles)) + x.shape, np.nan,
+                  dtype=np.float32)
+    for i, window in _fitted(windows, len(x)):
+        if window * x.shape[1] <= PARTITION_MAX_SIZE:
+            out[i, :, window - 1:] = _partition_quantiles(x, window, quantiles)
+            continue
+
+        if codes is None:
+            codes, values = _rank_codes(x)
+        out[i, :, window - 1:] = _sorted_window_quantiles(codes, values,
+                                                          window, quantiles)
+
+    return out
+
+
+def rolling_stats(wide_df, windows=DEFAULT_WINDOWS,
+                  quantiles=DEFAULT_QUANTILES, ddof=1):
+    '''
+    Rolling mean, std, z-score and quantiles for several windows in one
+    call.  The cumulative sums are shared by the mean, std and z-score.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame or numpy.ndarray
+        ED data in wide format, shape (n_obs, n_series)
+
+    windows: list, optional (default=DEFAULT_WINDOWS)
+        window sizes in days
+
+    quantiles: list, optional (default=DEFAULT_QUANTILES)
+        quantiles between 0 and 1.  Empty to skip the quantiles.
+
+    ddof: int, optional (default=1)
+        Delta degrees of freedom of the std
+
+    Returns:
+    -------
+    RollingStats
+        namedtuple of windows, quantiles, columns, index and the float32
+        arrays mean, std and zscore (n_windows, n_obs, n_series) and
+        quantile (n_windows, n_quantiles, n_obs, n_series)
+    '''
+    import numpy as np
+
+    x, windows = _validate(wide_df, windows)
+    quantiles = _validate_quantiles(quantiles)
+    sums, squares, centre = _cumsums(x)
+
+    mean = _empty(len(windows), x.shape)
+    std = _empty(len(windows), x.shape)
+    zscore = _empty(len(windows), x.shape)
+
+    for i, window in _fitted(windows, len(x)):
+        window_mean = _window_sum(sums, window) / window + centre
+        window_std = _window_std(sums, squares, window, ddof)
+        mean[i, window - 1:] = window_mean
+        std[i, window - 1:] = window_std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (x[window - 1:] - window_mean) / window_std
+        zscore[i, window - 1:] = np.where(window_std > 0, z, np.nan)
+
+    quantile = None
+    if len(quantiles):
+        quantile = rolling_quantile(x, quantiles, windows)
+
+    columns = list(getattr(wide_df, 'columns', range(x.shape[1])))
+    index = getattr(wide_df, 'index', None)
+    return RollingStats(windows, quantiles, columns, index, mean, std, zscore,
+                        quantile)
+
+
+def to_frame(values, rolling, window, quantile=None):
+    '''
+    Return one window (and quantile) of a rolling result as a DataFrame
+    with the columns and index of the original wide frame.
+
+    Params:
+    ------
+    values: numpy.ndarray
+        A field of `rolling` e.g. rolling.mean or rolling.quantile
+
+    rolling: RollingStats
+        Result of `rolling_stats`
+
+    window: int
+        window size to select
+
+    quantile: float, optional (default=None)
+        quantile to select if `values` is rolling.quantile
+
+    Returns:
+    -------
+    pandas.DataFrame
+    '''
+    import pandas as pd
+
+    values = values[rolling.windows.index(window)]
+    if quantile is not None:
+        values = values[rolling.quantiles.index(quantile)]
+
+    return pd.DataFrame(values, index=rolling.index, columns=rolling.columns,
+                        copy=False)
+
+
+def _validate(wide_df, windows):
+    '''
+    Return the data as a 2D array and the windows as a list
+    '''
+    import numpy as np
+
+    x = np.asarray(wide_df)
+    x = x.reshape(len(x), -1)
+    windows = list(windows)
+
+    if x.dtype.kind not in 'iuf':
+        raise ValueError('wide_df must contain numeric data.')
+
+    if x.dtype.kind == 'f' and np.isnan(x).any():
+        raise ValueError('wide_df must not contain missing values.')
+
+    if any(window < 1 for window in windows):
+        raise ValueError('windows must be at least 1 day.')
+
+    return x, windows
+
+
+def _fitted(windows, n_obs):
+    '''
+    (position, window) of the windows no longer than the data.  Longer
+    windows are left as NaN.
+    '''
+    return [(i, window) for i, window in enumerate(windows)
+            if window <= n_obs]
+
+
+def _validate_quantiles(quantiles):
+    quantiles = list(quantiles)
+    if any(q < 0 or q > 1 for q in quantiles):
+        raise ValueError('quantiles must be between 0 and 1.')
+    return quantiles
+
+
+def _empty(n_windows, shape):
+    import numpy as np
+
+    return np.full((n_windows,) + shape, np.nan, dtype=np.float32)
+
+
+def _cumsums(x, squares=True):
+    '''
+    Cumulative sums of x and x squared over time, each with a leading row of
+    zeros.
+
+    Integer data are summed exactly in int64.  Float data are centred on
+    the column means to limit cancellation in the window differences.  The
+    centre (0 for integers) must be added back to means.
+
+    Returns:
+    -------
+    (numpy.ndarray, numpy.ndarray or None, numpy.ndarray or int)
+        sums, sums of squares and centre
+    '''
+    import numpy as np
+
+    if x.dtype.kind in 'iu':
+        x, centre = x.astype(np.int64), 0
+    else:
+        centre = x.mean(axis=0)
+        x = x - centre
+
+    square_sums = _cumsum(x * x) if squares else None
+    return _cumsum(x), square_sums, centre
+
+
+def _cumsum(x):
+    import numpy as np
+
+    sums = np.zeros((len(x) + 1, x.shape[1]), dtype=x.dtype)
+    np.cumsum(x, axis=0, out=sums[1:])
+    return sums
+
+
+def _window_sum(sums, window):
+    return sums[window:] - sums[:-window]
+
+
+def _window_std(sums, squares, window, ddof):
+    '''
+    std from the window sums of x and x squared.  For integer data
+    window * sum(x^2) - sum(x)^2 is exact.
+    '''
+    import numpy as np
+
+    total = _window_sum(sums, window)
+    total_sq = _window_sum(squares, window)
+    if window - ddof <= 0:
+        return np.full(total.shape, np.nan)
+
+    # for float data the sums are of centred values.  The variance does not
+    # depend on the centre so the same formula applies.
+    ss = window * total_sq - total * total
+    return np.sqrt(np.maximum(ss, 0) / (window * (window - ddof)))
+
+
+def _rank_codes(x):
+    '''
+    Map the data to small non-negative integer codes with the same order.
+
+    Returns:
+    -------
+    (numpy.ndarray, numpy.ndarray or int)
+        codes and either the sorted unique values (code -> value) or for
+        integer data the minimum (value = code + minimum)
+    '''
+    import numpy as np
+
+    if x.dtype.kind in 'iu':
+        low = int(x.min())
+        return (x.astype(np.int64) - low), low
+
+    values, codes = np.unique(x, return_inverse=True)
+    return codes.reshape(x.shape), values
+
+
+def _order_statistics(quantiles, window):
+    '''
+    Lower and upper order statistics and the interpolation fraction of each
+    quantile of a window.
+    '''
+    import numpy as np
+
+    positions = np.array(quantiles) * (window - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, window - 1)
+    fraction = (positions - lower).astype(np.float32)
+    return lower, upper, fraction
+
+
+def _partition_quantiles(x, window, quantiles):
+    '''
+    Quantiles of every window found by partitioning a strided view of all
+    windows, a chunk of days at a time.
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_quantiles, n_obs - window + 1, n_series)
+    '''
+    import numpy as np
+
+    lower, upper, fraction = _order_statistics(quantiles, window)
+    # (n_windows, n_series, window) view without copying
+    windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+    out = np.empty((len(quantiles),) + windows.shape[:2], dtype=np.float32)
+    step = max(1, PARTITION_CHUNK_SIZE // (window * x.shape[1]))
+    kth = np.union1d(lower, upper)
+
+    for start in range(0, len(windows), step):
+        chunk = np.partition(windows[start:start + step], kth, axis=-1)
+        lo = chunk[..., lower].astype(np.float64)
+        hi = chunk[..., upper].astype(np.float64)
+        # (days, series, quantiles) -> (quantiles, days, series)
+        out[:, start:start + step] = np.moveaxis(lo + (hi - lo) * fraction,
+                                                 -1, 0)
+
+    return out
+
+
+def _sorted_window_quantiles(codes, values, window, quantiles):
+    '''
+    Quantiles of every window of `window` days for all columns.
+
+    The sorted windows of all columns are stored in one flat array.  Column
+    j's codes are offset by j << bits so its block sorts after column j - 1
+    and a single searchsorted finds the position of every column's value.
+
+    Returns:
+    -------
+    numpy.ndarray
+        float32, shape (n_quantiles, n_obs - window + 1, n_series)
+    '''
+    import numpy as np
+
+    n_obs, n_series = codes.shape
+    bits = max(int(codes.max()).bit_length(), 1)
+    dtype = np.int32 if (n_series << bits) < 2 ** 31 else np.int64
+    offsets = np.arange(n_series, dtype=dtype) << bits
+    keys = codes.astype(dtype) + offsets
+
+    lower, upper, fraction = _order_statistics(quantiles, window)
+    starts = np.arange(n_series) * window
+
+    out = np.empty((len(quantiles), n_obs - window + 1, n_series),
+                   dtype=np.float32)
+
+    def read(sorted_keys, row):
+        lo = _decode(sorted_keys[starts + lower[:, None]] - offsets, values)
+        hi = _decode(sorted_keys[starts + upper[:, None]] - offsets, values)
+        out[:, row] = lo + (hi - lo) * fraction[:, None]
+
+    # initial windows sorted per column then flattened column by column
+    sorted_keys = np.sort(keys[:window], axis=0).T.ravel()
+    read(sorted_keys, 0)
+
+    for t in range(window, n_obs):
+        removed = np.searchsorted(sorted_keys, keys[t - window])
+        sorted_keys = np.delete(sorted_keys, removed)
+        inserted = np.searchsorted(sorted_keys, keys[t])
+        sorted_keys = np.insert(sorted_keys, inserted, keys[t])
+        read(sorted_keys, t - window + 1)
+
+    return out
+
+
+def _decode(codes, values):
+    '''
+    Convert codes back to float values
+    '''
+    import numpy as np
+
+    if isinstance(values, int):
+        return (codes + values).astype(np.float64)
+    return values[codes]
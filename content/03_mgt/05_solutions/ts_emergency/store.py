@@ -0,0 +1,294 @@
+'''
+Incremental in-memory store of the ED data.
+
+EDStore holds the ED data in preallocated numpy buffers that grow by
+doubling.  New (date, hosp, attends) records are written into the end of
+the buffers, so a daily update costs O(new rows) rather than reloading and
+reshaping the whole history.  The wide and long frames returned by the store
+are read-only views of the buffers.
+'''
+
+from ts_emergency.datasets import (load_ed_ts, long_to_wide, 
+                                   narrowest_int_dtype)
+
+# number of days allocated when a store is created
+MIN_CAPACITY = 64
+
+
+class EDStore:
+    '''
+    ED attendance data that can be appended to one day at a time.
+
+    The wide buffer has one row per date and one column per hospital.
+    The long buffers hold the same data ordered by date and then hospital
+    (unlike `load_ed_ts('long')` which orders by hospital) so that new days
+    are appended to the end.
+
+    `version` increases by one on each append.  It is recorded in the
+    `attrs` of the frames returned by `wide` and `long`.
+    '''
+    def __init__(self, wide_df, capacity=None):
+        '''
+        Params:
+        -------
+        wide_df: pandas.DataFrame
+            ED data in wide format with a daily DatetimeIndex and columns
+            named hosp_{id}.
+
+        capacity: int, optional (default=None)
+            Number of days to allocate.  Defaults to double the days in
+            `wide_df`.
+        '''
+        import numpy as np
+        import pandas as pd
+
+        dates = wide_df.index.to_numpy().astype('datetime64[ns]')
+        if len(dates) == 0:
+            raise ValueError('wide_df must contain at least one day.')
+
+        if (np.diff(dates) != np.timedelta64(1, 'D')).any():
+            raise ValueError('wide_df must have one row for each day.')
+
+        values = wide_df.to_numpy()
+        self.columns = list(wide_df.columns)
+        self.hosp_ids = wide_df.columns.str.removeprefix('hosp_').astype(int)
+        self.n_days = len(dates)
+        self.version = 0
+
+        # position of each hospital id in the columns
+        self._hosp_pos = pd.Index(self.hosp_ids)
+
+        if capacity is None:
+            capacity = max(MIN_CAPACITY, 2 * self.n_days)
+
+        self._dates = np.empty(capacity, dtype=dates.dtype)
+        self._values = np.empty((capacity, len(self.columns)),
+                                dtype=values.dtype)
+        self._dates[:self.n_days] = dates
+        self._values[:self.n_days] = values
+
+        # date and hosp columns of the long format. attends is a reshaped
+        # view of the wide buffer.
+        n_hosps = len(self.columns)
+        self._hosp_dtype = narrowest_int_dtype(self.hosp_ids)
+        self._long_dates = np.empty(capacity * n_hosps, dtype=dates.dtype)
+        self._long_hosp = np.empty(capacity * n_hosps, dtype=self._hosp_dtype)
+        self._fill_long(0, self.n_days)
+
+    def __repr__(self):
+        return f'EDStore(n_days={self.n_days}, n_hosps={len(self.columns)},' \
+                + f' version={self.version})'
+
+    @classmethod
+    def from_long(cls, long_df, capacity=None):
+        '''
+        Create a store from ED data in long format.
+
+        Params:
+        ------
+        long_df: pandas.DataFrame
+            ED data in long format (date, hosp, attends)
+
+        capacity: int, optional (default=None)
+            Number of days to allocate.
+
+        Returns:
+        -------
+        EDStore
+        '''
+        return cls(long_to_wide(long_df), capacity)
+
+    @classmethod
+    def from_load_ed_ts(cls, capacity=None, **kwargs):
+        '''
+        Create a store from the built-in dataset.  Keyword arguments are
+        passed to `load_ed_ts`.
+
+        Returns:
+        -------
+        EDStore
+        '''
+        return cls(load_ed_ts('wide', **kwargs), capacity)
+
+    @property
+    def capacity(self):
+        '''
+        Number of days that can be stored before the buffers are resized.
+        '''
+        return len(self._dates)
+
+    @property
+    def end_date(self):
+        '''
+        Last date in the store
+        '''
+        import pandas as pd
+
+        return pd.Timestamp(self._dates[self.n_days - 1])
+
+    @property
+    def wide(self):
+        '''
+        Read-only wide format view of the store.
+
+        Returns:
+        -------
+        pandas.DataFrame
+        '''
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self._view(self._dates), name='date')
+        df = pd.DataFrame(self._view(self._values), index=index,
+                          columns=self.columns, copy=False)
+        df.attrs['version'] = self.version
+        return df
+
+    @property
+    def long(self):
+        '''
+        Read-only long format view of the store ordered by date then
+        hospital.
+
+        Returns:
+        -------
+        pandas.DataFrame
+        '''
+        import pandas as pd
+
+        n_rows = self.n_days * len(self.columns)
+        df = pd.DataFrame({'date': self._view(self._long_dates, n_rows),
+                           'hosp': self._view(self._long_hosp, n_rows),
+                           'attends': self._view(self._values).reshape(-1)},
+                          copy=False)
+        df.attrs['version'] = self.version
+        return df
+
+    def append(self, records):
+        '''
+        Append new days of data.
+
+        The new dates must continue on from the last date in the store
+        without gaps and each new date must have exactly one record for
+        every hospital.  Validation only looks at the new records.
+
+        Params:
+        ------
+        records: pandas.DataFrame or iterable
+            New data in long format.  Either a DataFrame with date, hosp and
+            attends columns or an iterable of (date, hosp, attends) tuples.
+
+        Returns:
+        -------
+        int
+            The number of days appended.
+        '''
+        import numpy as np
+        import pandas as pd
+
+        if not isinstance(records, pd.DataFrame):
+            records = pd.DataFrame(list(records),
+                                   columns=['date', 'hosp', 'attends'])
+
+        if records.empty:
+            return 0
+
+        dates = pd.to_datetime(records['date']).to_numpy()
+        attends = records['attends'].to_numpy()
+        one_day = np.timedelta64(1, 'D')
+        day_offset = (dates - self._dates[self.n_days - 1]) // one_day - 1
+        hosp_pos = self._hosp_pos.get_indexer(records['hosp'])
+
+        n_new = int(day_offset.max()) + 1
+        self._validate(day_offset, hosp_pos, n_new)
+
+        self._reserve(self.n_days + n_new, narrowest_int_dtype(attends))
+        rows = self.n_days + day_offset
+        self._values[rows, hosp_pos] = attends
+        self._dates[self.n_days:self.n_days + n_new] = \
+            self._dates[self.n_days - 1] + one_day * np.arange(1, n_new + 1)
+        self._fill_long(self.n_days, self.n_days + n_new)
+
+        self.n_days += n_new
+        self.version += 1
+        return n_new
+
+    def _validate(self, day_offset, hosp_pos, n_new):
+        '''
+        Check the new records continue the series and are complete.
+        '''
+        import numpy as np
+
+        if (hosp_pos == -1).any():
+            raise ValueError('records contain an unknown hospital.')
+
+        if day_offset.min() < 0:
+            raise ValueError('records must be dated after '
+                             + f'{self.end_date.date()}.')
+
+        n_hosps = len(self.columns)
+        counts = np.bincount(day_offset * n_hosps + hosp_pos,
+                             minlength=n_new * n_hosps)
+        if (counts != 1).any():
+            raise ValueError('records must have one row per hospital for '
+                             + 'each new date with no gaps in the dates.')
+
+    def _reserve(self, n_days, dtype):
+        '''
+        Make room for `n_days` and values of `dtype`.  Buffers are doubled
+        in size so the cost of resizing is amortised over many appends.
+        '''
+        import numpy as np
+
+        dtype = np.promote_types(self._values.dtype, dtype)
+        capacity = self.capacity
+
+        if n_days <= capacity and dtype == self._values.dtype:
+            return
+
+        while capacity < n_days:
+            capacity *= 2
+
+        self._dates = self._resized(self._dates, capacity)
+        self._values = self._resized(self._values, capacity, dtype)
+
+        n_hosps = len(self.columns)
+        self._long_dates = self._resized(self._long_dates, capacity * n_hosps,
+                                         n_rows=self.n_days * n_hosps)
+        self._long_hosp = self._resized(self._long_hosp, capacity * n_hosps,
+                                        n_rows=self.n_days * n_hosps)
+
+    def _resized(self, buffer, capacity, dtype=None, n_rows=None):
+        '''
+        Copy the filled rows of `buffer` into a new buffer of `capacity` rows
+        '''
+        import numpy as np
+
+        if n_rows is None:
+            n_rows = self.n_days
+
+        resized = np.empty((capacity,) + buffer.shape[1:], 
+                           dtype=dtype or buffer.dtype)
+        resized[:n_rows] = buffer[:n_rows]
+        return resized
+
+    def _fill_long(self, start, end):
+        '''
+        Write the long format date and hosp columns for days start to end
+        '''
+        import numpy as np
+
+        n_hosps = len(self.columns)
+        rows = slice(start * n_hosps, end * n_hosps)
+        self._long_dates[rows] = np.repeat(self._dates[start:end], n_hosps)
+        self._long_hosp[rows] = np.tile(self.hosp_ids.to_numpy(), end - start)
+
+    def _view(self, buffer, n_rows=None):
+        '''
+        Read-only view of the filled part of a buffer
+        '''
+        if n_rows is None:
+            n_rows = self.n_days
+
+        view = buffer[:n_rows]
+        view.flags.writeable = False
+        return view
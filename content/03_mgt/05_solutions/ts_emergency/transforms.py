@@ -0,0 +1,112 @@
+'''
+transforms - cached derived series for the ED time series
+
+Plotting and analysis functions often need a derived series (e.g. the first
+difference of a hospital's attendances) for a single hospital.
+`derived_series` computes the transform for the requested column only
+instead of the whole wide frame.
+
+Results are cached for the versioned, read-only frames returned by
+`ts_emergency.store.EDStore`.  The cache key is the identity of the buffer
+that holds the data, `attrs['version']`, the hospital, the transform and its
+parameters.  `EDStore.append` bumps the version, so a new day of data never
+returns a stale result.  Each entry keeps a reference to its buffer so the
+id cannot be reused by another array while the entry is cached.
+
+Any other frame may be edited in place and is never cached.
+'''
+
+from ts_emergency.cache import LRUCache
+
+# number of derived series kept in memory
+DERIVED_CACHE_SIZE = 64
+
+_derived = LRUCache(maxsize=DERIVED_CACHE_SIZE)
+
+
+def _diff(series, periods=1):
+    return series.diff(periods=periods)
+
+
+TRANSFORMS = {'diff': _diff}
+
+
+def derived_series(wide_df, hosp_id, transform='diff', **params):
+    '''
+    Return a derived series for a single hospital.  Only the `hosp_id`
+    column is transformed rather than the whole frame.
+
+    Results for `EDStore` frames are cached and returned read-only.  Use
+    `derived_series.cache_info()` and `derived_series.cache_clear()` to
+    inspect or clear the cache.
+
+    Params:
+    ------
+    wide_df: pandas.DataFrame
+        ED data in wide format
+
+    hosp_id: str
+        column name for hospital
+
+    transform: str, optional (default='diff')
+        One of TRANSFORMS
+
+    **params:
+        Parameters of the transform e.g. periods=7 for a seasonal 'diff'
+
+    Returns:
+    -------
+    pandas.Series
+    '''
+    if transform not in TRANSFORMS:
+        raise ValueError(f'transform should be one of {list(TRANSFORMS)}')
+
+    series = wide_df[hosp_id]
+    buffer = _versioned_buffer(wide_df, series)
+    if buffer is None:
+        return TRANSFORMS[transform](series, **params)
+
+    key = (id(buffer), wide_df.attrs['version'], hosp_id, transform,
+           tuple(sorted(params.items())))
+    entry = _derived.get(key)
+    if entry is not None:
+        return entry[1]
+
+    result = _read_only(TRANSFORMS[transform](series, **params))
+    _derived.put(key, (buffer, result))
+    return result
+
+
+derived_series.cache_info = _derived.cache_info
+derived_series.cache_clear = _derived.cache_clear
+
+
+def _versioned_buffer(wide_df, series):
+    '''
+    Return the array that owns the data of `series` if the frame is
+    versioned and read-only, else None.
+    '''
+    import numpy as np
+
+    if 'version' not in wide_df.attrs:
+        return None
+
+    values = series.to_numpy()
+    if values.flags.writeable:
+        return None
+
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values
+
+
+def _read_only(series):
+    '''
+    Stop callers modifying a cached result in place
+    '''
+    import pandas as pd
+
+    values = series.to_numpy(copy=True)
+    values.flags.writeable = False
+    return pd.Series(values, index=series.index, name=series.name,
+                     copy=False)